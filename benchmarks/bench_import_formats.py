@@ -0,0 +1,122 @@
+"""Compare CSV and Parquet ingest of the same deliveries on SQLite.
+
+Usage:
+    python -m benchmarks.bench_import_formats [--rows 100000]
+"""
+
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.database import default_db
+from src.services.dimension_cache import dimension_cache
+from src.tasks.csv_processor import process_columnar, process_csv_orm
+
+COLUMNS = [
+    "id_atendimento",
+    "id_cliente",
+    "angel",
+    "polo",
+    "data_limite",
+    "data_de_atendimento",
+    "status",
+]
+
+
+def make_rows(rows: int) -> List[list]:
+    start = datetime(2024, 1, 1)
+    data = []
+    for source_id in range(1, rows + 1):
+        served_at = start + timedelta(minutes=random.randint(0, 500_000))
+        data.append(
+            [
+                source_id,
+                random.randint(1, 5_000),
+                f"Angel {random.randint(1, 200)}",
+                f"Polo {random.randint(1, 30)}",
+                served_at + timedelta(days=random.randint(-2, 2)),
+                served_at,
+                random.choice(["PENDING", "DONE"]),
+            ]
+        )
+    return data
+
+
+def write_csv(path: str, data: List[list]) -> None:
+    with open(path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file, delimiter=";")
+        writer.writerow(COLUMNS)
+        for row in data:
+            writer.writerow(
+                [
+                    value.strftime("%Y-%m-%d %H:%M:%S")
+                    if isinstance(value, datetime)
+                    else value
+                    for value in row
+                ]
+            )
+
+
+def write_parquet(path: str, data: List[list]) -> None:
+    columns = list(zip(*data))
+    pq.write_table(
+        pa.table({name: list(values) for name, values in zip(COLUMNS, columns)}),
+        path,
+    )
+
+
+def rows_per_second(workdir: str, rows: int, run: Callable[[Session], dict]) -> float:
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    default_db.metadata.drop_all(engine)
+    default_db.metadata.create_all(engine)
+    dimension_cache.clear()
+
+    with Session(engine) as session:
+        started = time.perf_counter()
+        result = run(session)
+        elapsed = time.perf_counter() - started
+
+    assert result["successful_rows"] == rows, result
+    engine.dispose()
+    return rows / elapsed
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--rows", type=int, default=100_000)
+    args = arg_parser.parse_args()
+
+    data = make_rows(args.rows)
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = os.path.join(workdir, "deliveries.csv")
+        parquet_path = os.path.join(workdir, "deliveries.parquet")
+        write_csv(csv_path, data)
+        write_parquet(parquet_path, data)
+
+        csv_speed = rows_per_second(
+            workdir, args.rows, lambda session: process_csv_orm(csv_path, session)
+        )
+        parquet_speed = rows_per_second(
+            workdir,
+            args.rows,
+            lambda session: process_columnar(parquet_path, session, "parquet"),
+        )
+
+    print(f"    csv: {csv_speed:>10,.0f} rows/s")
+    print(
+        f"parquet: {parquet_speed:>10,.0f} rows/s ({parquet_speed / csv_speed:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Compare Flask's default JSON provider with the orjson one on list pages.
+
+The rows are read from SQLite through the list query, so they hold the
+same values (and datetimes) as the API's responses.
+
+Usage:
+    python -m benchmarks.bench_json [--rows 100 1000] [--repeat 200]
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from flask import Flask
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from src.database import default_db
+from src.json_provider import ISO_DATETIME_FORMAT, OrjsonProvider
+from src.models import Angel, Client, Delivery, Polo
+from src.repositories import DeliveryRepository
+
+
+def make_deliveries(session: Session, rows: int) -> None:
+    session.execute(insert(Angel), [{"name": f"Angel {i}"} for i in range(200)])
+    session.execute(insert(Polo), [{"name": f"Polo {i}"} for i in range(30)])
+    session.execute(insert(Client), [{"id": i} for i in range(1, 5_001)])
+
+    start = datetime(2024, 1, 1)
+    deliveries = []
+    for _ in range(rows):
+        served_at = start + timedelta(minutes=random.randint(0, 500_000))
+        deliveries.append(
+            {
+                "cliente_id": random.randint(1, 5_000),
+                "id_angel": random.randint(1, 200),
+                "id_polo": random.randint(1, 30),
+                "data_limite": served_at + timedelta(days=random.randint(-2, 2)),
+                "data_de_atendimento": served_at,
+                "status": random.choice(["PENDING", "DONE"]),
+            }
+        )
+    session.execute(insert(Delivery), deliveries)
+    session.commit()
+
+
+def pages_per_second(repeat: int, encode: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        encode()
+    return repeat / (time.perf_counter() - started)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000])
+    arg_parser.add_argument("--repeat", type=int, default=200)
+    args = arg_parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    default_db.metadata.create_all(engine)
+    default_app, http_app, iso_app = Flask(__name__), Flask(__name__), Flask(__name__)
+    http_app.json = OrjsonProvider(http_app)
+    iso_app.json = OrjsonProvider(iso_app, datetime_format=ISO_DATETIME_FORMAT)
+
+    with Session(engine) as session:
+        make_deliveries(session, max(args.rows))
+        repository = DeliveryRepository(session=session)
+
+        for rows in args.rows:
+            page, _ = repository.get_page(rows, "id")
+            # The list endpoint encodes dicts; the export endpoint, rows.
+            items: List[dict] = [row._asdict() for row in page]
+
+            def default_page() -> object:
+                with default_app.app_context():
+                    return default_app.json.response({"data": items})
+
+            default = pages_per_second(args.repeat, default_page)
+            print(f"{rows:>6} rows | default {default:>8,.0f} pages/s")
+            for name, app in (("orjson", http_app), ("orjson iso", iso_app)):
+
+                def orjson_page() -> object:
+                    with app.app_context():
+                        return app.json.response({"data": items})
+
+                speed = pages_per_second(args.repeat, orjson_page)
+                print(
+                    f"{rows:>6} rows | {name:<10} {speed:>8,.0f} pages/s "
+                    f"({speed / default:.1f}x)"
+                )
+
+            export_default = pages_per_second(
+                args.repeat, lambda: [default_app.json.dumps(row._asdict()) for row in page]
+            )
+            export_orjson = pages_per_second(
+                args.repeat, lambda: [iso_app.json.dumps(row) for row in page]
+            )
+            print(
+                f"{rows:>6} rows | export default {export_default:>8,.0f} chunks/s | "
+                f"orjson iso {export_orjson:>8,.0f} chunks/s "
+                f"({export_orjson / export_default:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Generate a synthetic delivery CSV for import benchmarks.
+
+Usage:
+    python -m benchmarks.generate_deliveries deliveries.csv [--rows 100000]
+        [--angels 200] [--polos 30] [--clients 5000] [--error-rate 0.01]
+        [--date-format iso|br|us|mixed] [--seed 42]
+"""
+
+import argparse
+import csv
+import random
+from datetime import datetime, timedelta
+
+COLUMNS = [
+    "id_atendimento",
+    "id_cliente",
+    "angel",
+    "polo",
+    "data_limite",
+    "data_de_atendimento",
+    "status",
+]
+
+DATE_FORMATS = {
+    "iso": "%Y-%m-%d %H:%M:%S",
+    "br": "%d/%m/%Y %H:%M:%S",
+    "us": "%m/%d/%Y %H:%M",
+}
+
+STATUSES = ("PENDING", "DONE", "CANCELED")
+
+START = datetime(2024, 1, 1)
+
+
+def _broken(row: list, rng: random.Random) -> list:
+    """Corrupt one field the way real exports do."""
+    row = list(row)
+    kind = rng.randrange(3)
+    if kind == 0:
+        row[2] = ""  # missing angel
+        row[5] = ""  # and attendance date
+    elif kind == 1:
+        row[1] = f"C{row[1]}"  # non-integer client id
+    else:
+        row[5] = "31/02/2024 25:61"  # unparseable date
+    return row
+
+
+def generate_deliveries(
+    path: str,
+    rows: int,
+    angels: int = 200,
+    polos: int = 30,
+    clients: int = 5_000,
+    error_rate: float = 0.01,
+    date_format: str = "iso",
+    seed: int = 42,
+) -> None:
+    """Write `rows` deliveries to `path`, `error_rate` of them invalid."""
+    rng = random.Random(seed)
+    formats = (
+        list(DATE_FORMATS.values())
+        if date_format == "mixed"
+        else [DATE_FORMATS[date_format]]
+    )
+
+    with open(path, "w", newline="", encoding="UTF-8") as csv_file:
+        writer = csv.writer(csv_file, delimiter=";")
+        writer.writerow(COLUMNS)
+
+        for source_id in range(1, rows + 1):
+            served_at = START + timedelta(minutes=rng.randint(0, 500_000))
+            deadline = served_at + timedelta(days=rng.randint(-2, 3))
+            fmt = rng.choice(formats)
+            row = [
+                source_id,
+                rng.randint(1, clients),
+                f"Angel {rng.randint(1, angels)}",
+                f"{rng.randint(1, polos):02d} - POLO",
+                deadline.strftime(fmt),
+                served_at.strftime(fmt),
+                rng.choice(STATUSES),
+            ]
+            if rng.random() < error_rate:
+                row = _broken(row, rng)
+            writer.writerow(row)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("path")
+    arg_parser.add_argument("--rows", type=int, default=100_000)
+    arg_parser.add_argument("--angels", type=int, default=200)
+    arg_parser.add_argument("--polos", type=int, default=30)
+    arg_parser.add_argument("--clients", type=int, default=5_000)
+    arg_parser.add_argument("--error-rate", type=float, default=0.01)
+    arg_parser.add_argument(
+        "--date-format", choices=[*DATE_FORMATS, "mixed"], default="iso"
+    )
+    arg_parser.add_argument("--seed", type=int, default=42)
+    args = arg_parser.parse_args()
+
+    generate_deliveries(
+        args.path,
+        args.rows,
+        angels=args.angels,
+        polos=args.polos,
+        clients=args.clients,
+        error_rate=args.error_rate,
+        date_format=args.date_format,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -9,8 +9,10 @@ from flask_celeryext import FlaskCeleryExt
 from flask_sqlalchemy import SQLAlchemy
 
 from src.api import atendimento_routes, base_routes
+from src.api.compression import compress_response
 from src.celery_utils import make_celery
 from src.database import default_db
+from src.json_provider import OrjsonProvider
 
 from .config import Settings, settings
 
@@ -39,12 +41,14 @@ def create_app(
     db: SQLAlchemy = default_db,
 ) -> Flask:
     app = Flask(__name__, instance_relative_config=True)
+    app.json = OrjsonProvider(app, datetime_format=settings_dict.JSON_DATETIME_FORMAT)
 
     app.config.from_mapping(
         SQLALCHEMY_DATABASE_URI=settings_dict.SQLALCHEMY_DATABASE_URI,
         CELERY=dict(
             broker_url=settings_dict.CELERY_BROKER_URL,
             result_backend=settings_dict.CELERY_RESULT_BACKEND,
+            result_expires=settings_dict.CELERY_RESULT_EXPIRES,
         ),
     )
 
@@ -61,6 +65,8 @@ def create_app(
         atendimento_routes, url_prefix=f"{settings_dict.API_V1_PREFIX}/atendimento"
     )
 
+    app.after_request(compress_response)
+
     app.register_error_handler(code_or_exception=Exception, f=handle_exception)
     app.register_error_handler(
         code_or_exception=werkzeug.exceptions.BadRequest, f=handle_bad_request
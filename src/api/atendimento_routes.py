@@ -1,13 +1,34 @@
+import dataclasses
+import os
 from typing import Any
 
 import werkzeug.exceptions
 from celery.result import AsyncResult
-from flask import Blueprint, jsonify, request, url_for
-
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    request,
+    stream_with_context,
+    url_for,
+)
+
+from src.api.conditional import conditional
+from src.config import settings
 from src.domain import Delivery as DeliveryDT
-from src.domain import DeliveryDomainUpdate
+from src.domain import DeliveryDomainUpdate, DeliveryFilters
 from src.services.atendimento_service import DeliveryService
-from src.tasks import import_csv_task
+from src.services.delivery_export import CSV_EXPORT, EXPORT_FORMATS, export_chunks
+from src.services.import_job_service import ImportJobService
+from src.services.pagination import encode_cursor
+from src.tasks import import_csv_task, validate_csv_task
+from src.tasks.columnar_source import CSV_FORMAT, detect_format
+from src.tasks.csv_source import CONTENT_ENCODINGS, FILE_EXTENSIONS, detect_compression
+from src.tasks.import_mode import IMPORT_MODES, INSERT_MODE
+from src.tasks.progress import PROGRESS_STATE, collect_progress
+from src.tasks.spool import remove_spooled_file, spool_upload
+from src.tasks.view_refresh import schedule_productivity_refresh
 
 bp = Blueprint("atendimento", __name__)
 
@@ -15,6 +36,33 @@ atendimentos: list[DeliveryDT] = []
 errors: list[str] = []
 
 
+def _is_true(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes")
+
+
+def _split(value: str) -> list[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+FILTER_ARGS = tuple(
+    field.name
+    for field in dataclasses.fields(DeliveryFilters)
+    if field.name not in ("id_angel", "id_polo")
+)
+
+
+def _filter_args() -> dict:
+    """The filter query parameters of the request, to carry them over to links."""
+    return {name: request.args[name] for name in FILTER_ARGS if name in request.args}
+
+
+def _filters() -> DeliveryFilters:
+    try:
+        return DeliveryFilters.from_dict(_filter_args())
+    except ValueError as e:
+        raise werkzeug.exceptions.BadRequest(str(e))
+
+
 @bp.route("", methods=["POST"])
 def create() -> Any:
     data = request.get_json()
@@ -31,6 +79,7 @@ def create() -> Any:
     delivery_service = DeliveryService()
 
     entity = delivery_service.create(atendimento)
+    schedule_productivity_refresh()
     item = atendimento.__dict__
     item["id"] = entity.id
 
@@ -39,81 +88,141 @@ def create() -> Any:
 
 @bp.route("", methods=["GET"])
 def get_all() -> Any:
-    page = request.args.get("page", default=1, type=int)
-    per_page = request.args.get("per_page", default=10, type=int)
+    return conditional(DeliveryService().get_version(), _get_all)
+
+
+def _get_all() -> Any:
+    if "page" in request.args:
+        raise werkzeug.exceptions.BadRequest(
+            "page is not supported: follow the next and prev links, "
+            "which carry a cursor"
+        )
+
+    cursor = request.args.get("cursor", default=None, type=str)
+    per_page = request.args.get("per_page", default=settings.DEFAULT_PAGE_SIZE, type=int)
+    per_page = max(1, min(per_page, settings.MAX_PAGE_SIZE))
     order_by_param = request.args.get("order_by", default="id", type=str)
+    filters = _filters()
+    fields = request.args.get("fields", default=None, type=_split)
+    # Opt-in, as even a cached COUNT is not free: "exact" or "estimate".
+    include_total = request.args.get("include_total", default=None, type=str)
 
     atendimento_service = DeliveryService()
-    atendimentos = atendimento_service.get_all(page, per_page, order_by_param)
+    page = atendimento_service.get_all(
+        per_page, order_by_param, cursor, filters, fields, include_total
+    )
 
+    # The cursors are opaque tokens holding the sort key and id of the last
+    # (or first) row, so following them costs the same on any page.
     next_page = (
         url_for(
             "atendimento.get_all",
-            page=page + 1,
+            **_filter_args(),
+            cursor=encode_cursor(page.next_cursor),
             per_page=per_page,
             order_by=order_by_param,
+            fields=request.args.get("fields"),
+            include_total=include_total,
         )
-        if len(atendimentos) == per_page
+        if page.next_cursor
         else None
     )
     prev_page = (
         url_for(
             "atendimento.get_all",
-            page=page - 1,
+            **_filter_args(),
+            cursor=encode_cursor(page.prev_cursor),
             per_page=per_page,
             order_by=order_by_param,
+            fields=request.args.get("fields"),
+            include_total=include_total,
         )
-        if page > 1
+        if page.prev_cursor
         else None
     )
 
-    serialized_items = []
-    for atendimento in atendimentos:
-        item = DeliveryDT(
-            id=atendimento.id,
-            cliente_id=atendimento.cliente_id,
-            angel=atendimento.angel.name,
-            polo=atendimento.polo.name,
-            data_limite=atendimento.data_limite,
-            data_de_atendimento=atendimento.data_de_atendimento,
+    body: dict[str, Any] = {
+        "data": page.items,
+        "next": next_page,
+        "prev": prev_page,
+    }
+    if page.total is not None:
+        body["total"] = page.total
+    return jsonify(body)
+
+
+@bp.route("/export", methods=["GET"])
+def export() -> Any:
+    export_format = request.args.get("format", default=CSV_EXPORT, type=str)
+    order_by_param = request.args.get("order_by", default="id", type=str)
+    if export_format not in EXPORT_FORMATS:
+        raise werkzeug.exceptions.BadRequest(
+            f"format must be one of {list(EXPORT_FORMATS)}"
         )
-        serialized_items.append(item.__dict__)
 
-    return jsonify(
-        {
-            "data": serialized_items,
-            "next": next_page,
-            "prev": prev_page,
-        }
+    filters = _filters()
+    fields = request.args.get("fields", default=None, type=_split)
+
+    atendimento_service = DeliveryService()
+    rows = atendimento_service.export(order_by_param, filters, fields)
+
+    # The response is streamed from the database cursor as it is read; the
+    # request context (and its session) stays open until the last chunk.
+    chunks = export_chunks(
+        rows, export_format, settings.EXPORT_BATCH_SIZE, current_app.json.dumps
     )
+    return Response(
+        stream_with_context(chunks),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="atendimentos.{export_format}"'
+        },
+    )
+
 
 @bp.route("/angel_productivity", methods=["GET"])
 def get_angel_productivity() -> Any:
     at_most = request.args.get("at_most", default=100, type=int)
 
     atendimento_service = DeliveryService()
-    atendimentos = atendimento_service.get_angel_productivity(at_most=at_most)
-
+    # The views are snapshots refreshed after writes; None means a live view.
+    refreshed_at = atendimento_service.get_refreshed_at("angel_productivity")
+
+    # The view is only read when the client's copy is stale.
+    def build() -> Any:
+        atendimentos = atendimento_service.get_angel_productivity(at_most=at_most)
+        return jsonify(
+            {
+                "total": len(atendimentos),
+                "data": [at for at in atendimentos],
+                "refreshed_at": refreshed_at,
+            }
+        )
 
-    return jsonify(
-        {
-            "total": len(atendimentos),
-            "data": [at for at in atendimentos],
-        }
+    return conditional(
+        atendimento_service.get_productivity_version(refreshed_at), build
     )
 
+
 @bp.route("/polo_productivity", methods=["GET"])
 def get_polo_productivity() -> Any:
     at_most = request.args.get("at_most", default=100, type=int)
 
     atendimento_service = DeliveryService()
-    atendimentos = atendimento_service.get_polo_productivity(at_most=at_most)
+    refreshed_at = atendimento_service.get_refreshed_at("polo_productivity")
+
+    def build() -> Any:
+        atendimentos = atendimento_service.get_polo_productivity(at_most=at_most)
+        return jsonify(
+            {
+                "total": len(atendimentos),
+                "data": [at for at in atendimentos],
+                "refreshed_at": refreshed_at,
+            }
+        )
 
-    return jsonify(
-        {
-            "total": len(atendimentos),
-            "data": [at for at in atendimentos],
-        }
+    return conditional(
+        atendimento_service.get_productivity_version(refreshed_at), build
     )
 
 
@@ -135,6 +244,7 @@ def update(id: int) -> Any:
     entity = delivery_service.update(atendimento, id)
     if not entity:
         raise werkzeug.exceptions.NotFound(description="Resource not found")
+    schedule_productivity_refresh()
 
     item = atendimento.__dict__
     item["id"] = entity.id
@@ -144,31 +254,127 @@ def update(id: int) -> Any:
 
 @bp.route("/import_csv", methods=["POST"])
 def import_csv() -> Any:
-    if "file" not in request.files and not request.data:
+    if "file" not in request.files and not request.content_length:
         return jsonify({"error": "No file part"}), 400
 
+    # "upsert" updates the deliveries already imported instead of skipping them.
+    mode = request.args.get("mode", default=INSERT_MODE, type=str)
+    if mode not in IMPORT_MODES:
+        return jsonify({"error": f"mode must be one of {list(IMPORT_MODES)}"}), 400
+
     file = request.files.get("file")
     if file:
-        if file.filename == "":
+        if not file.filename:
             return jsonify({"error": "No selected file"}), 400
 
-        file_content = file.stream.read().decode("UTF-8")
+        stream = file.stream
+        content_type = file.content_type
+        extension = os.path.splitext(file.filename)[1].lower()
+        declared_compression = FILE_EXTENSIONS.get(extension)
     else:
-        file_content = request.data.decode("UTF-8")
-
-    if not file_content:
+        stream = request.stream
+        content_type = request.content_type
+        content_encoding = request.headers.get("Content-Encoding", "identity").lower()
+        if content_encoding not in ("identity", *CONTENT_ENCODINGS):
+            return jsonify(
+                {"error": f"Unsupported Content-Encoding: {content_encoding}"}
+            ), 415
+        declared_compression = CONTENT_ENCODINGS.get(content_encoding)
+
+    # Stream the upload to the spool directory, so neither the web process
+    # nor the broker ever hold the whole file. Compressed uploads are spooled
+    # as they are and decompressed by the worker while it reads them.
+    spooled = spool_upload(stream)
+    if not spooled.size:
+        remove_spooled_file(spooled.path)
         return jsonify({"error": "Empty file"}), 400
 
-    task = import_csv_task.delay(file_content)
+    compression = detect_compression(spooled.path)
+    if declared_compression and declared_compression != compression:
+        remove_spooled_file(spooled.path)
+        return jsonify({"error": f"File is not {declared_compression} compressed"}), 400
+
+    file_format = CSV_FORMAT if compression else detect_format(spooled.path, content_type)
+
+    # A dry run only parses and validates the file: no import job, no session.
+    if request.args.get("dry_run", default=False, type=_is_true):
+        task = validate_csv_task.delay(spooled.path, spooled.checksum, file_format)
+        return jsonify({"message": "CSV file is being validated", "task_id": task.id}), 202
+
+    # Imports are identified by the checksum of the file and the mode, so
+    # re-uploading a file returns the import that is running or already finished.
+    import_job_service = ImportJobService()
+    job, created = import_job_service.get_or_create(spooled.checksum, mode)
+    if job.status == "COMPLETED":
+        remove_spooled_file(spooled.path)
+        return jsonify(
+            {
+                "message": "CSV file was already imported",
+                "task_id": job.task_id,
+                "result": job.result,
+            }
+        ), 200
+
+    # Failed and stale imports are dispatched again; they resume from their
+    # checkpoints. The upload that created the job dispatches it, and of
+    # concurrent re-uploads only the one that claims the job does.
+    if not created and not import_job_service.claim(job.id):
+        remove_spooled_file(spooled.path)
+        return jsonify(
+            {"message": "CSV file is already being processed", "task_id": job.task_id}
+        ), 202
+
+    task = import_csv_task.delay(
+        spooled.path, spooled.checksum, job.id, file_format, mode
+    )
+    import_job_service.start(job.id, task.id)
 
     return jsonify({"message": "CSV file is being processed", "task_id": task.id}), 202
 
 
+@bp.route("/import/<task_id>/errors", methods=["GET"])
+def import_errors(task_id: str) -> Any:
+    cursor = request.args.get("cursor", default=0, type=int)
+    per_page = request.args.get("per_page", default=100, type=int)
+    per_page = max(1, min(per_page, settings.MAX_PAGE_SIZE))
+
+    import_job_service = ImportJobService()
+    errors = import_job_service.get_errors(task_id, cursor, per_page)
+
+    # Keyset pagination: the cursor is the id of the last error returned.
+    next_page = (
+        url_for(
+            "atendimento.import_errors",
+            task_id=task_id,
+            cursor=errors[-1].id,
+            per_page=per_page,
+        )
+        if len(errors) == per_page
+        else None
+    )
+
+    return jsonify(
+        {
+            "data": [
+                {"line": error.line, "error": error.error, "data": error.data}
+                for error in errors
+            ],
+            "next": next_page,
+        }
+    )
+
+
 @bp.route("/task_status/<task_id>", methods=["GET"])
 def task_status(task_id: str) -> Any:
     task_result = AsyncResult(task_id)
     if task_result.state == "PENDING":
         response = {"state": task_result.state, "status": "Pending..."}
+    elif task_result.state == PROGRESS_STATE:
+        response = {
+            "state": task_result.state,
+            "status": "Processing...",
+            "progress": collect_progress(task_result.info),
+        }
     elif task_result.state != "FAILURE":
         response = {
             "state": task_result.state,
@@ -0,0 +1,141 @@
+import zlib
+from typing import Callable, Iterable, Iterator, Protocol, cast
+
+import brotli
+import zstandard
+from flask import Response, request
+
+from src.config import settings
+
+# Media types worth compressing: the API's JSON, CSV and NDJSON.
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "text/csv",
+    "text/plain",
+}
+
+
+class _Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes:
+        """Return the compressed data so far, so it can be sent as a chunk."""
+        ...
+
+    def finish(self) -> bytes: ...
+
+
+class _GzipCompressor:
+    def __init__(self, level: int) -> None:
+        # wbits 31 writes the gzip header and trailer.
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self, level: int) -> None:
+        # brotli ships no type hints, hence the casts below.
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return cast(bytes, self._compressor.process(data))
+
+    def flush(self) -> bytes:
+        return cast(bytes, self._compressor.flush())
+
+    def finish(self) -> bytes:
+        return cast(bytes, self._compressor.finish())
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+# Content codings by preference, when the client accepts several equally.
+ENCODINGS: dict[str, Callable[[int], _Compressor]] = {
+    "br": _BrotliCompressor,
+    "zstd": _ZstdCompressor,
+    "gzip": _GzipCompressor,
+}
+
+
+def _compressed_stream(
+    chunks: Iterable[bytes], compressor: _Compressor
+) -> Iterator[bytes]:
+    # Each chunk is flushed as it is compressed, so streamed responses keep
+    # reaching the client chunk by chunk.
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def compress_response(response: Response) -> Response:
+    """Compress `response` with the best encoding the client accepts.
+
+    Registered as an `after_request` hook. Buffered bodies smaller than
+    `COMPRESSION_MIN_SIZE` are sent as they are; streamed ones are compressed
+    chunk by chunk, as they are sent.
+    """
+    if response.status_code == 304:
+        # A 304 stands for the response it revalidates, which varies too.
+        response.vary.add("Accept-Encoding")
+        return response
+
+    if (
+        request.method == "HEAD"
+        or response.status_code < 200
+        or response.status_code in (204, 206)
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    # Caches must keep the identity and the compressed responses apart, even
+    # when this one is sent as it is.
+    response.vary.add("Accept-Encoding")
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    if encoding is None:
+        return response
+
+    compressor = ENCODINGS[encoding](settings.COMPRESSION_LEVELS[encoding])
+    if response.is_streamed:
+        # The original body is closed with the response, even if it is never
+        # read, so its request context does not outlive the request.
+        source = response.response
+        if hasattr(source, "close"):
+            response.call_on_close(source.close)
+        response.response = _compressed_stream(response.iter_encoded(), compressor)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        response.set_data(compressor.compress(data) + compressor.finish())
+
+    response.content_encoding = encoding
+    # The compressed body is another representation of the same data.
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
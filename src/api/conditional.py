@@ -0,0 +1,59 @@
+import hashlib
+from datetime import UTC, datetime
+from typing import Callable
+
+from flask import Response, make_response, request
+from flask.typing import ResponseReturnValue
+
+
+def _last_modified(version: tuple) -> datetime | None:
+    """The latest timestamp of `version`; naive timestamps are in UTC."""
+    timestamps = [value for value in version if isinstance(value, datetime)]
+    if not timestamps:
+        return None
+
+    latest = max(
+        value if value.tzinfo else value.replace(tzinfo=UTC) for value in timestamps
+    )
+    # HTTP dates have a resolution of one second.
+    return latest.replace(microsecond=0)
+
+
+def _etag(version: tuple) -> str:
+    # The query string selects what the response holds, so it is part of
+    # the tag: another page of the list is another representation.
+    key = repr((request.path, request.query_string, version))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _not_modified(etag: str, last_modified: datetime | None) -> bool:
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2).
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def conditional(
+    version: tuple, build: Callable[[], ResponseReturnValue]
+) -> Response:
+    """Answer a conditional GET for data at `version`.
+
+    `version` is a cheap value that changes whenever the data does. The
+    response is only built, by calling `build`, when the client's copy is
+    stale; otherwise it is a bodiless 304 Not Modified.
+    """
+    etag = _etag(version)
+    last_modified = _last_modified(version)
+
+    if _not_modified(etag, last_modified):
+        response = Response(status=304)
+    else:
+        response = make_response(build())
+
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Clients may keep the response, but must revalidate it before use.
+    response.cache_control.no_cache = True
+    return response
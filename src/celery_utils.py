@@ -11,6 +11,7 @@ def make_celery(app: Flask) -> Celery:
     celery.conf.update(
         result_backend=settings.CELERY_BROKER_URL,
         broker_url=settings.CELERY_RESULT_BACKEND,
+        result_expires=settings.CELERY_RESULT_EXPIRES,
     )
 
     return celery
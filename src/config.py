@@ -12,9 +12,49 @@ class Settings(BaseSettings):
     PORT: int = 7012
     DEBUG: bool = True
     TESTING: bool = False
+    # "http" encodes JSON datetimes as HTTP dates, like Flask does; "iso"
+    # as RFC 3339 strings, which orjson encodes natively and much faster.
+    JSON_DATETIME_FORMAT: str = os.getenv("JSON_DATETIME_FORMAT", "http")
+    # Responses smaller than this (in bytes) are sent uncompressed.
+    COMPRESSION_MIN_SIZE: int = 1024
+    # Compression level of each content coding: gzip 1-9, br 0-11, zstd 1-22.
+    COMPRESSION_LEVELS: dict[str, int] = {"gzip": 6, "br": 5, "zstd": 3}
     DEFAULT_PAGE_SIZE: int = 10
+    MAX_PAGE_SIZE: int = 100
+    # Exact list totals are cached per filter set, for at most this many seconds.
+    TOTAL_CACHE_SIZE: int = 1000
+    TOTAL_CACHE_TTL: int = 30
+    # Rows fetched per round trip (and sent per chunk) by the export endpoint.
+    EXPORT_BATCH_SIZE: int = 1000
     CELERY_BROKER_URL: str = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
     CELERY_RESULT_BACKEND: str = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
+    # Directory shared by the web and worker containers for CSV uploads.
+    IMPORT_SPOOL_DIR: str = os.getenv("IMPORT_SPOOL_DIR", "/tmp/indicators-spool")
+    IMPORT_SPOOL_CHUNK_SIZE: int = 1024 * 1024
+    # "auto" uses the COPY/staging-table engine on PostgreSQL and the ORM
+    # engine elsewhere; "orm" and "staging" force one of them.
+    IMPORT_ENGINE: str = os.getenv("IMPORT_ENGINE", "auto")
+    # Files larger than this are split into chunks processed by separate workers.
+    IMPORT_CHUNK_SIZE: int = 32 * 1024 * 1024
+    # Parsed batches the import parser thread may queue ahead of the database
+    # writes; 0 parses and writes each batch in turn.
+    IMPORT_PIPELINE_DEPTH: int = int(os.getenv("IMPORT_PIPELINE_DEPTH", 2))
+    # Row errors are stored in the import_error table; task results only keep
+    # the count and this many samples.
+    IMPORT_ERROR_SAMPLE_SIZE: int = 100
+    # Seconds without progress after which an unfinished import is considered
+    # lost, and a re-upload of its file dispatches it again.
+    IMPORT_JOB_STALE_AFTER: int = int(os.getenv("IMPORT_JOB_STALE_AFTER", 30 * 60))
+    # Seconds task results (and progress) are kept in the result backend.
+    CELERY_RESULT_EXPIRES: int = int(os.getenv("CELERY_RESULT_EXPIRES", 24 * 60 * 60))
+    # Seconds from an API write to the refresh of the productivity views; the
+    # writes of that delay share one refresh.
+    VIEW_REFRESH_DELAY: int = int(os.getenv("VIEW_REFRESH_DELAY", 30))
+    # Shared tier of the dimension id cache; unset keeps the cache in-process.
+    DIMENSION_CACHE_REDIS_URL: str | None = os.getenv("DIMENSION_CACHE_REDIS_URL")
+    DIMENSION_CACHE_SIZE: int = 10_000
+    DIMENSION_CACHE_TTL: int = 3600
+    DIMENSION_CACHE_NEGATIVE_TTL: int = 5
     # DB_POOL_SIZE: int = 5
     # DB_MAX_OVERFLOW: int = 10
     # DB_POOL_TIMEOUT: int = 30
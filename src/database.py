@@ -48,13 +48,17 @@ def close_db(e: Optional[Exception] = None) -> None:
 
 # Inject a custom engine, if passed (mainly used in tests).
 def init_db(db: SQLAlchemy = default_db) -> None:
-    from src.models import Delivery, Angel, Client, Polo  # noqa
+    from src.models import Delivery, Angel, Client, Polo, ImportJob  # noqa
 
     db.create_all()
 
 
 def destroy_db(db: SQLAlchemy = default_db) -> None:
+    from src.services.dimension_cache import dimension_cache
+
     db.drop_all()
+    # cached dimension ids refer to the dropped rows.
+    dimension_cache.clear()
 
 
 @click.command("init-db")
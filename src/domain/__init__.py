@@ -1,4 +1,5 @@
-from .atendimento import Delivery, DeliveryDomainCreate, DeliveryDomainUpdate # noqa
+from .atendimento import Delivery, DeliveryDomainCreate, DeliveryDomainUpdate, DeliveryFilters # noqa
 from .polo import Polo  # noqa
 from .angel import Angel  # noqa
 from .client import Client  # noqa
+from .date_parser import DateParser  # noqa
@@ -1,14 +1,13 @@
 from dataclasses import asdict, dataclass
 from datetime import datetime
 
-from dateutil.parser import parse
+from src.domain.date_parser import DateParser, default_date_parser
 
 
-def handle_date(date: str) -> datetime | None:
-    try:
-        return parse(date)  # type: ignore
-    except Exception:
-        return None
+def handle_date(
+    date: str, date_parser: DateParser = default_date_parser
+) -> datetime | None:
+    return date_parser.parse(date)
 
 
 def _to_dict(obj: object) -> dict:
@@ -30,14 +29,18 @@ class Delivery:
     status: str = "PENDING"
 
     @classmethod
-    def from_dict(cls, data: dict) -> "Delivery":
+    def from_dict(
+        cls, data: dict, date_parser: DateParser = default_date_parser
+    ) -> "Delivery":
         return cls(
             id=int(data.get("id_atendimento", -999)),
             cliente_id=int(data.get("id_cliente", -999)),
             angel=data.get("angel", None),
             polo=data.get("polo", None),
-            data_limite=handle_date(data.get("data_limite", None)),
-            data_de_atendimento=handle_date(data.get("data_de_atendimento", None)),
+            data_limite=handle_date(data.get("data_limite", None), date_parser),
+            data_de_atendimento=handle_date(
+                data.get("data_de_atendimento", None), date_parser
+            ),
             status=data.get("status", "PENDING")
         )
 
@@ -69,14 +72,78 @@ class DeliveryDomainUpdate:
     status: str
 
     @classmethod
-    def from_dict(cls, data: dict) -> "DeliveryDomainUpdate":
+    def from_dict(
+        cls, data: dict, date_parser: DateParser = default_date_parser
+    ) -> "DeliveryDomainUpdate":
         return cls(
             id=int(data.get("id_atendimento", -999)),
-            data_limite=handle_date(data.get("data_limite", None)),
-            data_de_atendimento=handle_date(data.get("data_de_atendimento", None)),
+            data_limite=handle_date(data.get("data_limite", None), date_parser),
+            data_de_atendimento=handle_date(
+                data.get("data_de_atendimento", None), date_parser
+            ),
             status=data.get("status", None)
         )
 
     def to_dict(self) -> dict:
         # Only include non-None values
         return _to_dict(self)
+
+
+TRUE_VALUES = ("1", "true", "yes")
+FALSE_VALUES = ("0", "false", "no")
+
+
+def _parse_filter_date(
+    data: dict, key: str, date_parser: DateParser
+) -> datetime | None:
+    value = data.get(key)
+    if not value:
+        return None
+
+    parsed = handle_date(value, date_parser)
+    if parsed is None:
+        raise ValueError(f"Invalid {key}: {value}")
+    return parsed
+
+
+@dataclass
+class DeliveryFilters:
+    """Filters of the list and export endpoints; date ranges are inclusive."""
+
+    angel: str | None = None
+    polo: str | None = None
+    cliente_id: int | None = None
+    status: str | None = None
+    data_limite_from: datetime | None = None
+    data_limite_to: datetime | None = None
+    data_de_atendimento_from: datetime | None = None
+    data_de_atendimento_to: datetime | None = None
+    # Served after data_limite (or, when False, on time).
+    late: bool | None = None
+    # Ids of `angel` and `polo`, resolved by the service; None if unknown.
+    id_angel: int | None = None
+    id_polo: int | None = None
+
+    @classmethod
+    def from_dict(
+        cls, data: dict, date_parser: DateParser = default_date_parser
+    ) -> "DeliveryFilters":
+        late = data.get("late")
+        if late is not None and late.lower() not in TRUE_VALUES + FALSE_VALUES:
+            raise ValueError(f"Invalid late: {late}")
+
+        return cls(
+            angel=data.get("angel") or None,
+            polo=data.get("polo") or None,
+            cliente_id=int(data["cliente_id"]) if data.get("cliente_id") else None,
+            status=data.get("status") or None,
+            data_limite_from=_parse_filter_date(data, "data_limite_from", date_parser),
+            data_limite_to=_parse_filter_date(data, "data_limite_to", date_parser),
+            data_de_atendimento_from=_parse_filter_date(
+                data, "data_de_atendimento_from", date_parser
+            ),
+            data_de_atendimento_to=_parse_filter_date(
+                data, "data_de_atendimento_to", date_parser
+            ),
+            late=None if late is None else late.lower() in TRUE_VALUES,
+        )
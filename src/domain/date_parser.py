@@ -0,0 +1,108 @@
+from datetime import date, datetime, time
+from itertools import islice
+from typing import Any, Iterable, Sequence
+
+from dateutil.parser import parse
+
+# Pseudo format handled by `datetime.fromisoformat`, the fastest parser.
+ISO_FORMAT = "iso"
+
+# Tried in this order when a sample matches several of them. Month-first
+# comes before day-first so ambiguous files parse as dateutil would.
+CANDIDATE_FORMATS = (
+    ISO_FORMAT,
+    "%Y/%m/%d %H:%M:%S",
+    "%Y/%m/%d",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y",
+    "%d-%m-%Y %H:%M:%S",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+)
+
+DEFAULT_SAMPLE_SIZE = 1_000
+
+
+def _parse_with_format(value: str, fmt: str) -> datetime:
+    if fmt == ISO_FORMAT:
+        return datetime.fromisoformat(value)
+    return datetime.strptime(value, fmt)
+
+
+def _matches(value: str, fmt: str) -> bool:
+    try:
+        _parse_with_format(value, fmt)
+    except ValueError:
+        return False
+    return True
+
+
+class DateParser:
+    """Date parser with a fixed-format fast path and a dateutil fallback.
+
+    `detect` picks, once per file, the formats that cover a sample of its
+    values. `parse` then tries only those formats and falls back to
+    `dateutil.parser.parse` for values none of them match.
+    """
+
+    def __init__(self, formats: Sequence[str] = (ISO_FORMAT,)):
+        self.formats = tuple(formats)
+
+    @classmethod
+    def detect(
+        cls, values: Iterable[Any], sample_size: int = DEFAULT_SAMPLE_SIZE
+    ) -> "DateParser":
+        sample = [
+            value.strip()
+            for value in islice((v for v in values if isinstance(v, str)), sample_size)
+            if value.strip()
+        ]
+
+        # Greedily pick the format covering most of the remaining sample.
+        formats: list[str] = []
+        while sample:
+            matches = {
+                fmt: [value for value in sample if _matches(value, fmt)]
+                for fmt in CANDIDATE_FORMATS
+                if fmt not in formats
+            }
+            best = max(matches, key=lambda fmt: len(matches[fmt]), default=None)
+            if best is None or not matches[best]:
+                break
+
+            formats.append(best)
+            matched = set(matches[best])
+            sample = [value for value in sample if value not in matched]
+
+        return cls(formats or (ISO_FORMAT,))
+
+    def parse(self, value: Any) -> datetime | None:
+        if value is None or isinstance(value, datetime):
+            return value
+        # Typed sources (Parquet, Arrow) may hold plain dates.
+        if isinstance(value, date):
+            return datetime.combine(value, time.min)
+        if not isinstance(value, str):
+            return None
+
+        value = value.strip()
+        if not value:
+            return None
+
+        for fmt in self.formats:
+            try:
+                return _parse_with_format(value, fmt)
+            except ValueError:
+                continue
+
+        try:
+            return parse(value)
+        except Exception:
+            return None
+
+
+default_date_parser = DateParser()
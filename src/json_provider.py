@@ -0,0 +1,95 @@
+import decimal
+from datetime import UTC, date, datetime
+from typing import Any, cast
+
+import orjson
+from flask import Flask, Response
+from flask.json.provider import JSONProvider
+from sqlalchemy import Row
+
+HTTP_DATETIME_FORMAT = "http"
+ISO_DATETIME_FORMAT = "iso"
+DATETIME_FORMATS = (HTTP_DATETIME_FORMAT, ISO_DATETIME_FORMAT)
+
+_DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_MONTHS = ("", "Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+def _http_date(value: date) -> str:
+    """`werkzeug.http.http_date`, in half the time: it runs once per date."""
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    elif value.tzinfo is not None:
+        value = value.astimezone(UTC)
+    return (
+        f"{_DAYS[value.weekday()]}, {value.day:02d} {_MONTHS[value.month]} "
+        f"{value.year:04d} {value.hour:02d}:{value.minute:02d}:{value.second:02d} GMT"
+    )
+
+
+class OrjsonProvider(JSONProvider):
+    """A JSON provider encoding and decoding with orjson.
+
+    It reads like Flask's default provider: keys are sorted, responses are
+    indented in debug mode and dates are HTTP dates, unless
+    `datetime_format` is "iso", which leaves them to orjson's native (and
+    much faster) RFC 3339 encoding. Dataclasses are encoded natively and
+    SQLAlchemy rows as objects of their columns.
+
+    Keyword arguments of `json.dumps` and `json.loads` are ignored.
+    """
+
+    sort_keys = True
+    compact: bool | None = None
+    mimetype = "application/json"
+
+    def __init__(
+        self, app: Flask, datetime_format: str = HTTP_DATETIME_FORMAT
+    ) -> None:
+        super().__init__(app)
+        if datetime_format not in DATETIME_FORMATS:
+            raise ValueError(f"datetime_format must be one of {list(DATETIME_FORMATS)}")
+        self.datetime_format = datetime_format
+
+    def _option(self, indent: bool = False) -> int:
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if self.datetime_format == HTTP_DATETIME_FORMAT:
+            option |= orjson.OPT_PASSTHROUGH_DATETIME
+        else:
+            # Like HTTP dates, naive datetimes are read as UTC.
+            option |= orjson.OPT_NAIVE_UTC
+        return option
+
+    @staticmethod
+    def _default(o: Any) -> Any:
+        if isinstance(o, Row):
+            return o._asdict()
+        if isinstance(o, date):
+            return _http_date(o)
+        if isinstance(o, decimal.Decimal):
+            return str(o)
+        if hasattr(o, "__html__"):
+            return str(o.__html__())
+        raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=self._default, option=self._option())
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return self.dumps_bytes(obj).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        # Only responses are indented: `dumps` also writes NDJSON lines.
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=self._default, option=self._option(indent))
+        # The encoded bytes go straight into the body, never through a str.
+        response_class = cast(type[Response], self._app.response_class)
+        return response_class(body + b"\n", mimetype=self.mimetype)
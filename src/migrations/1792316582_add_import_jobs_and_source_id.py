@@ -0,0 +1,64 @@
+"""Add import jobs, import checkpoints and atendimento.source_id
+
+Revision ID: 1792316582
+Revises: 1738183539
+Create Date: 2026-10-18 09:43:02.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1792316582'
+down_revision: Union[str, None] = '1738183539'
+branch_labels: Union[str, Sequence[str], None] = ()
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('atendimento', sa.Column('source_id', sa.Integer(), nullable=True))
+    op.create_unique_constraint(op.f('uq_atendimento_source_id'), 'atendimento', ['source_id'])
+    op.create_table('import_job',
+    sa.Column('checksum', sa.String(length=64), nullable=False),
+    sa.Column('task_id', sa.String(length=255), nullable=True),
+    sa.Column('status', sa.String(length=32), nullable=False),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('checksum')
+    )
+    op.create_index(op.f('ix_import_job_created_at'), 'import_job', ['created_at'], unique=False)
+    op.create_index(op.f('ix_import_job_updated_at'), 'import_job', ['updated_at'], unique=False)
+    op.create_table('import_checkpoint',
+    sa.Column('import_job_id', sa.Integer(), nullable=False),
+    sa.Column('range_start', sa.BigInteger(), nullable=False),
+    sa.Column('rows_done', sa.Integer(), nullable=False),
+    sa.Column('successful_rows', sa.Integer(), nullable=False),
+    sa.Column('duplicate_rows', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['import_job_id'], ['import_job.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('import_job_id', 'range_start')
+    )
+    op.create_index(op.f('ix_import_checkpoint_created_at'), 'import_checkpoint', ['created_at'], unique=False)
+    op.create_index(op.f('ix_import_checkpoint_updated_at'), 'import_checkpoint', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_import_checkpoint_updated_at'), table_name='import_checkpoint')
+    op.drop_index(op.f('ix_import_checkpoint_created_at'), table_name='import_checkpoint')
+    op.drop_table('import_checkpoint')
+    op.drop_index(op.f('ix_import_job_updated_at'), table_name='import_job')
+    op.drop_index(op.f('ix_import_job_created_at'), table_name='import_job')
+    op.drop_table('import_job')
+    op.drop_constraint(op.f('uq_atendimento_source_id'), 'atendimento', type_='unique')
+    op.drop_column('atendimento', 'source_id')
@@ -0,0 +1,38 @@
+"""Add import errors
+
+Revision ID: 1792403000
+Revises: 1792316582
+Create Date: 2026-10-18 11:03:20.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1792403000'
+down_revision: Union[str, None] = '1792316582'
+branch_labels: Union[str, Sequence[str], None] = ()
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('import_error',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('import_job_id', sa.Integer(), nullable=False),
+    sa.Column('line', sa.BigInteger(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=False),
+    sa.Column('data', sa.JSON(), nullable=True),
+    sa.ForeignKeyConstraint(['import_job_id'], ['import_job.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_import_error_import_job_id_id', 'import_error', ['import_job_id', 'id'], unique=False)
+    op.create_index(op.f('ix_import_job_task_id'), 'import_job', ['task_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_import_job_task_id'), table_name='import_job')
+    op.drop_index('ix_import_error_import_job_id_id', table_name='import_error')
+    op.drop_table('import_error')
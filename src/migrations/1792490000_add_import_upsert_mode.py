@@ -0,0 +1,32 @@
+"""Add import_job.mode and import_checkpoint.updated_rows
+
+Revision ID: 1792490000
+Revises: 1792403000
+Create Date: 2026-10-18 14:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1792490000'
+down_revision: Union[str, None] = '1792403000'
+branch_labels: Union[str, Sequence[str], None] = ()
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('import_job', sa.Column('mode', sa.String(length=16), server_default='insert', nullable=False))
+    op.drop_constraint('import_job_checksum_key', 'import_job', type_='unique')
+    op.create_unique_constraint('import_job_checksum_mode_key', 'import_job', ['checksum', 'mode'])
+    op.add_column('import_checkpoint', sa.Column('updated_rows', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('import_checkpoint', 'updated_rows')
+    op.drop_constraint('import_job_checksum_mode_key', 'import_job', type_='unique')
+    op.create_unique_constraint('import_job_checksum_key', 'import_job', ['checksum'])
+    op.drop_column('import_job', 'mode')
@@ -0,0 +1,37 @@
+"""Add the composite indexes of the atendimento list filters
+
+Revision ID: 1792570000
+Revises: 1792490000
+Create Date: 2026-10-18 16:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1792570000'
+down_revision: Union[str, None] = '1792490000'
+branch_labels: Union[str, Sequence[str], None] = ()
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ACTIVE = 'deleted_at IS NULL'
+
+
+def upgrade() -> None:
+    op.create_index('ix_atendimento_id_polo_data_de_atendimento', 'atendimento', ['id_polo', 'data_de_atendimento'], unique=False, postgresql_where=sa.text(ACTIVE))
+    op.create_index('ix_atendimento_id_angel_data_de_atendimento', 'atendimento', ['id_angel', 'data_de_atendimento'], unique=False, postgresql_where=sa.text(ACTIVE))
+    op.create_index('ix_atendimento_cliente_id_data_de_atendimento', 'atendimento', ['cliente_id', 'data_de_atendimento'], unique=False, postgresql_where=sa.text(ACTIVE))
+    op.create_index('ix_atendimento_status_data_limite', 'atendimento', ['status', 'data_limite'], unique=False, postgresql_where=sa.text(ACTIVE))
+    op.create_index('ix_atendimento_late_data_limite', 'atendimento', ['data_limite'], unique=False, postgresql_where=sa.text(f'{ACTIVE} AND data_de_atendimento > data_limite'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_atendimento_late_data_limite', table_name='atendimento')
+    op.drop_index('ix_atendimento_status_data_limite', table_name='atendimento')
+    op.drop_index('ix_atendimento_cliente_id_data_de_atendimento', table_name='atendimento')
+    op.drop_index('ix_atendimento_id_angel_data_de_atendimento', table_name='atendimento')
+    op.drop_index('ix_atendimento_id_polo_data_de_atendimento', table_name='atendimento')
@@ -0,0 +1,77 @@
+"""Turn the productivity views into materialized views
+
+Revision ID: 1792650000
+Revises: 1792570000
+Create Date: 2026-10-18 19:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1792650000'
+down_revision: Union[str, None] = '1792570000'
+branch_labels: Union[str, Sequence[str], None] = ()
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ANGEL_PRODUCTIVITY = """
+    SELECT
+        angel.name AS courier,
+        COUNT(a.id) AS total_deliveries,
+        SUM(CASE WHEN a.data_de_atendimento <= a.data_limite THEN 1 ELSE 0 END) AS on_time_deliveries,
+        ROUND(100.0 * SUM(CASE WHEN a.data_de_atendimento <= a.data_limite THEN 1 ELSE 0 END) / COUNT(a.id), 2) AS on_time_percentage
+    FROM atendimento a
+    JOIN angel ON a.id_angel = angel.id
+    WHERE a.data_de_atendimento IS NOT NULL AND a.deleted_at IS NULL
+    GROUP BY angel.name
+    ORDER BY on_time_percentage DESC
+"""
+
+POLO_PRODUCTIVITY = """
+    SELECT
+        polo.name AS polo,
+        TO_CHAR(a.data_de_atendimento, 'Day') AS weekday,
+        COUNT(*) AS total_deliveries
+    FROM atendimento a
+    JOIN polo ON a.id_polo = polo.id
+    WHERE a.data_de_atendimento IS NOT NULL AND a.deleted_at IS NULL
+    GROUP BY polo, weekday
+    ORDER BY total_deliveries DESC
+"""
+
+
+def upgrade() -> None:
+    op.execute('DROP VIEW IF EXISTS angel_productivity')
+    op.execute('DROP VIEW IF EXISTS polo_productivity')
+    op.execute(f'CREATE MATERIALIZED VIEW angel_productivity AS {ANGEL_PRODUCTIVITY}')
+    op.execute(f'CREATE MATERIALIZED VIEW polo_productivity AS {POLO_PRODUCTIVITY}')
+    # REFRESH ... CONCURRENTLY needs a unique index on the rows of the view.
+    op.create_index('ux_angel_productivity_courier', 'angel_productivity', ['courier'], unique=True)
+    op.create_index('ux_polo_productivity_polo_weekday', 'polo_productivity', ['polo', 'weekday'], unique=True)
+
+    op.create_table(
+        'view_refresh',
+        sa.Column('name', sa.String(length=63), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    # The views were populated as they were created.
+    op.execute(
+        """
+        INSERT INTO view_refresh (name, refreshed_at)
+        VALUES ('angel_productivity', now() AT TIME ZONE 'UTC'),
+               ('polo_productivity', now() AT TIME ZONE 'UTC')
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('view_refresh')
+    op.execute('DROP MATERIALIZED VIEW IF EXISTS angel_productivity')
+    op.execute('DROP MATERIALIZED VIEW IF EXISTS polo_productivity')
+    op.execute(f'CREATE VIEW angel_productivity AS {ANGEL_PRODUCTIVITY}')
+    op.execute(f'CREATE VIEW polo_productivity AS {POLO_PRODUCTIVITY}')
@@ -2,4 +2,6 @@ from .atendimento import Delivery  # noqa
 from .base_model import BaseModel  # noqa
 from .client import Client  # noqa
 from .angel import Angel, angel_productivity_view, polo_productivity_view  # noqa
-from .polo import Polo  # noqa
\ No newline at end of file
+from .polo import Polo  # noqa
+from .import_job import ImportCheckpoint, ImportJob, ImportRowError  # noqa
+from .view_refresh import ViewRefresh  # noqa
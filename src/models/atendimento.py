@@ -1,5 +1,5 @@
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.database import default_db
@@ -9,9 +9,39 @@ from src.models.client import Client
 from src.models.polo import Polo
 
 
+def _active_index(name: str, *columns: str, where: str = "") -> Index:
+    """An index on the deliveries that aren't soft-deleted, as the API reads them."""
+    condition = text(" AND ".join(filter(None, ["deleted_at IS NULL", where])))
+    return Index(name, *columns, postgresql_where=condition, sqlite_where=condition)
+
+
 # mypy: ignore-errors
 class Delivery(BaseModel, default_db.Model):
     __tablename__ = "atendimento"
+    # Composite indexes of the list endpoint filters.
+    __table_args__ = (
+        _active_index(
+            "ix_atendimento_id_polo_data_de_atendimento",
+            "id_polo",
+            "data_de_atendimento",
+        ),
+        _active_index(
+            "ix_atendimento_id_angel_data_de_atendimento",
+            "id_angel",
+            "data_de_atendimento",
+        ),
+        _active_index(
+            "ix_atendimento_cliente_id_data_de_atendimento",
+            "cliente_id",
+            "data_de_atendimento",
+        ),
+        _active_index("ix_atendimento_status_data_limite", "status", "data_limite"),
+        _active_index(
+            "ix_atendimento_late_data_limite",
+            "data_limite",
+            where="data_de_atendimento > data_limite",
+        ),
+    )
 
     cliente_id: Mapped[int] = mapped_column(ForeignKey("cliente.id"))
     id_angel: Mapped[int] = mapped_column(ForeignKey("angel.id"))
@@ -19,6 +49,8 @@ class Delivery(BaseModel, default_db.Model):
     data_limite: Mapped[timestamp] = mapped_column(index=True)
     data_de_atendimento: Mapped[timestamp] = mapped_column(index=True)
     status: Mapped[str] = mapped_column(index=True)
+    # id_atendimento of the source file, used to deduplicate imports.
+    source_id: Mapped[int | None] = mapped_column(unique=True, nullable=True)
 
     cliente: Mapped[Client] = relationship("Client")
     angel: Mapped[Angel] = relationship("Angel")
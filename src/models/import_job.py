@@ -0,0 +1,66 @@
+from typing import Any
+
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.database import default_db
+from src.models.base_model import BaseModel
+
+
+# mypy: ignore-errors
+class ImportJob(BaseModel, default_db.Model):
+    __tablename__ = "import_job"
+    __table_args__ = (UniqueConstraint("checksum", "mode"),)
+
+    # SHA-256 of the uploaded file: identical uploads in the same mode map to
+    # the same job.
+    checksum: Mapped[str] = mapped_column(String(64))
+    # "insert" skips the deliveries already imported, "upsert" updates them.
+    mode: Mapped[str] = mapped_column(String(16), default="insert", server_default="insert")
+    task_id: Mapped[str | None] = mapped_column(String(255), nullable=True, index=True)
+    status: Mapped[str] = mapped_column(String(32), default="PENDING")
+    result: Mapped[Any] = mapped_column(JSON, nullable=True)
+
+
+class ImportCheckpoint(BaseModel, default_db.Model):
+    __tablename__ = "import_checkpoint"
+    __table_args__ = (UniqueConstraint("import_job_id", "range_start"),)
+
+    import_job_id: Mapped[int] = mapped_column(ForeignKey("import_job.id"))
+    # Byte offset where the checkpointed range starts (0 for serial imports).
+    range_start: Mapped[int] = mapped_column(BigInteger)
+    rows_done: Mapped[int] = mapped_column(default=0)
+    successful_rows: Mapped[int] = mapped_column(default=0)
+    duplicate_rows: Mapped[int] = mapped_column(default=0)
+    # Rows of `successful_rows` that updated an existing delivery (upserts).
+    updated_rows: Mapped[int] = mapped_column(default=0, server_default="0")
+
+
+class ImportRowError(default_db.Model):
+    """A row rejected by an import.
+
+    Badly formatted files produce millions of these, so unlike the other
+    models they carry no timestamp columns (nor their indexes).
+    """
+
+    __tablename__ = "import_error"
+    # Keyset pagination of the errors of one import.
+    __table_args__ = (Index("ix_import_error_import_job_id_id", "import_job_id", "id"),)
+
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True
+    )
+    import_job_id: Mapped[int] = mapped_column(ForeignKey("import_job.id"))
+    # CSV line number; NULL for errors affecting a whole batch or file.
+    line: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    error: Mapped[str] = mapped_column(Text)
+    data: Mapped[Any] = mapped_column(JSON, nullable=True)
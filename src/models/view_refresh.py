@@ -0,0 +1,19 @@
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.database import default_db
+from src.models.base_model import timestamp
+
+
+# mypy: ignore-errors
+class ViewRefresh(default_db.Model):
+    """When a materialized view was last refreshed.
+
+    `refreshed_at` (UTC) is taken before the refresh starts, so the view holds
+    every write committed before it.
+    """
+
+    __tablename__ = "view_refresh"
+
+    name: Mapped[str] = mapped_column(String(63), primary_key=True)
+    refreshed_at: Mapped[timestamp]
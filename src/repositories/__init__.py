@@ -1,4 +1,5 @@
 from .atendimento_repository import DeliveryRepository # noqa
 from .polo_repository import PoloRepository # noqa
 from .angel_repository import AngelRepository # noqa
-from .client_repository import ClientRepository # noqa
\ No newline at end of file
+from .client_repository import ClientRepository # noqa
+from .import_job_repository import ImportJobRepository # noqa
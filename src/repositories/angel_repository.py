@@ -8,7 +8,7 @@ from sqlalchemy.orm import Session
 from src.database import default_db as db
 from src.domain import Angel as AngelDomain
 from src.models import Angel
-from src.repositories.base import BaseRepository
+from src.repositories.base import BaseRepository, bulk_get_or_create
 
 
 class AngelRepository(BaseRepository):
@@ -34,6 +34,8 @@ class AngelRepository(BaseRepository):
 
         return entities
 
+    def bulk_get_or_create(self, names: list[str]) -> dict[str, int]:
+        return bulk_get_or_create(self.session, Angel.name, names)
 
     def get_by_names(self, names: list[str]) -> list[Angel]:  # pragma: no cover
         stmt = select(Angel).where(Angel.name.in_(names))
@@ -63,11 +65,6 @@ class AngelRepository(BaseRepository):
     def get_by_id(self, id: int) -> Angel | None:
         pass
 
-    def get_paginated(
-        self, page: int, per_page: int, order_by_param: str
-    ) -> list[Angel]:
-        raise NotImplementedError
-
     def update(self, entity: Angel) -> Angel:
         raise NotImplementedError
 
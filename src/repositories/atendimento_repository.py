@@ -1,45 +1,84 @@
 import datetime
-from typing import Sequence
+import json
+from typing import Any, Sequence
 
 import sqlalchemy.exc
 import werkzeug.exceptions
-from sqlalchemy import Row, select
+from sqlalchemy import (
+    Result,
+    Row,
+    Select,
+    and_,
+    func,
+    or_,
+    select,
+    text,
+    tuple_,
+)
 from sqlalchemy.orm import Session
 
-from src.database import default_db as db
 from src.domain import Delivery as DeliveryDomain
-from src.domain.atendimento import DeliveryDomainCreate, DeliveryDomainUpdate
+from src.domain.atendimento import (
+    DeliveryDomainCreate,
+    DeliveryDomainUpdate,
+    DeliveryFilters,
+)
 from src.models import (
     Angel,
-    Client,
     Delivery,
     Polo,
+    ViewRefresh,
     angel_productivity_view,
     polo_productivity_view,
 )
-from src.repositories.base import BaseRepository
+from src.repositories.base import BaseRepository, dialect_insert
+
+PRODUCTIVITY_VIEWS = (angel_productivity_view, polo_productivity_view)
 
 
 class DeliveryRepository(BaseRepository[Delivery]):
-    available_order_by_dict = {
+    # Sort keys of the list endpoint, ties broken by id. Keyset pagination
+    # compares (key, id) pairs, so a key can't be NULL: rows never updated
+    # sort by their creation time.
+    sort_keys = {
         "id": Delivery.id,
-        "-id": Delivery.id.desc(),
         "created_at": Delivery.created_at,
-        "-created_at": Delivery.created_at.desc(),
-        "updated_at": Delivery.updated_at,
-        "-updated_at": Delivery.updated_at.desc(),
+        "updated_at": func.coalesce(Delivery.updated_at, Delivery.created_at),
+        "cliente_id": Delivery.cliente_id,
+        "angel": Angel.name,
+        "polo": Polo.name,
+        "data_limite": Delivery.data_limite,
+        "data_de_atendimento": Delivery.data_de_atendimento,
+    }
+    # "-key" sorts by `key`, descending.
+    available_order_by_dict = {
+        order_by: column.desc() if descending else column
+        for name, column in sort_keys.items()
+        for order_by, descending in ((name, False), (f"-{name}", True))
+    }
+
+    # Columns selected by the list and export endpoints, by output field. They
+    # are read as plain rows: no ORM objects, no lazy loads of angel or polo.
+    list_columns = {
+        "id": Delivery.id,
         "cliente_id": Delivery.cliente_id,
-        "-cliente_id": Delivery.cliente_id.desc(),
         "angel": Angel.name,
-        "-angel": Angel.name.desc(),
         "polo": Polo.name,
-        "-polo": Polo.name.desc(),
         "data_limite": Delivery.data_limite,
-        "-data_limite": Delivery.data_limite.desc(),
         "data_de_atendimento": Delivery.data_de_atendimento,
-        "-data_de_atendimento": Delivery.data_de_atendimento.desc(),
+        "status": Delivery.status,
     }
 
+    # Columns an upsert overwrites when they differ from the stored delivery.
+    upsert_columns = (
+        "cliente_id",
+        "id_angel",
+        "id_polo",
+        "data_limite",
+        "data_de_atendimento",
+        "status",
+    )
+
     # constructor injection for the session (dependency injection)
     def __init__(self, session: Session):
         self.session = session
@@ -53,27 +92,166 @@ class DeliveryRepository(BaseRepository[Delivery]):
 
         return entity
 
-    def get_paginated(
-        self, page: int, per_page: int, order_by_param: str
-    ) -> list[Delivery]:
+    def _sort_key(self, order_by_param: str) -> tuple[Any, bool]:
+        """Return the sort key of `order_by_param` and whether it descends."""
         if order_by_param not in self.available_order_by_dict.keys():
             raise ValueError(
                 f"order_by_param must be one of {list(self.available_order_by_dict.keys())}"
             )
 
-        query = (
-            select(Delivery)
-            .join(Client, Delivery.cliente_id == Client.id)
-            .join(Angel, Delivery.id_angel == Angel.id)
-            .join(Polo, Delivery.id_polo == Polo.id)
-            .order_by(self.available_order_by_dict[order_by_param])
-            .filter(Delivery.deleted_at.is_(None))
+        descending = order_by_param.startswith("-")
+        return self.sort_keys[order_by_param.lstrip("-")], descending
+
+    @staticmethod
+    def _check_position(key: Any, position: tuple) -> None:
+        """Check that `position` is a (sort key, id) pair of the types of `key`."""
+        sort_key, id = position
+        key_type = key.type.python_type
+        for value, value_type in ((sort_key, key_type), (id, int)):
+            if not isinstance(value, value_type) or isinstance(value, bool):
+                raise ValueError("the cursor does not match the order_by")
+
+    # Tables joined only when a selected column or the sort key reads them.
+    dimension_joins = {
+        "angel": (Angel, Delivery.id_angel == Angel.id),
+        "polo": (Polo, Delivery.id_polo == Polo.id),
+    }
+
+    def _fields(self, fields: list[str] | None) -> list[str]:
+        if fields is None:
+            return list(self.list_columns)
+
+        unknown = [field for field in fields if field not in self.list_columns]
+        if unknown or not fields:
+            raise ValueError(f"fields must be some of {list(self.list_columns)}")
+        return [field for field in self.list_columns if field in fields]
+
+    @staticmethod
+    def _filter(query: Select, filters: DeliveryFilters) -> Select:
+        # Angels and polos are matched by id, so the filters are served by the
+        # (id_angel|id_polo, data_de_atendimento) indexes. An unknown name has
+        # no id, and `== None` matches no delivery.
+        if filters.angel is not None:
+            query = query.where(Delivery.id_angel == filters.id_angel)
+        if filters.polo is not None:
+            query = query.where(Delivery.id_polo == filters.id_polo)
+        if filters.cliente_id is not None:
+            query = query.where(Delivery.cliente_id == filters.cliente_id)
+        if filters.status is not None:
+            query = query.where(Delivery.status == filters.status)
+        if filters.data_limite_from is not None:
+            query = query.where(Delivery.data_limite >= filters.data_limite_from)
+        if filters.data_limite_to is not None:
+            query = query.where(Delivery.data_limite <= filters.data_limite_to)
+        if filters.data_de_atendimento_from is not None:
+            query = query.where(
+                Delivery.data_de_atendimento >= filters.data_de_atendimento_from
+            )
+        if filters.data_de_atendimento_to is not None:
+            query = query.where(
+                Delivery.data_de_atendimento <= filters.data_de_atendimento_to
+            )
+        if filters.late is True:
+            query = query.where(Delivery.data_de_atendimento > Delivery.data_limite)
+        elif filters.late is False:
+            query = query.where(Delivery.data_de_atendimento <= Delivery.data_limite)
+
+        return query
+
+    def _list_query(
+        self,
+        order_by_param: str,
+        fields: list[str],
+        *columns: Any,
+        reverse: bool = False,
+        filters: DeliveryFilters | None = None,
+    ) -> Select:
+        """Select `fields` of `list_columns`, and `columns`, from the deliveries."""
+        key, descending = self._sort_key(order_by_param)
+        order_by: tuple[Any, ...]
+        if descending != reverse:
+            order_by = (key.desc(), Delivery.id.desc())
+        else:
+            order_by = (key, Delivery.id)
+
+        query = select(
+            *(self.list_columns[field].label(field) for field in fields), *columns
+        ).select_from(Delivery)
+        for name, (table, onclause) in self.dimension_joins.items():
+            if name in fields or order_by_param.lstrip("-") == name:
+                query = query.join(table, onclause)
+
+        query = query.order_by(*order_by).filter(Delivery.deleted_at.is_(None))
+        return self._filter(query, filters or DeliveryFilters())
+
+    def get_page(
+        self,
+        per_page: int,
+        order_by_param: str,
+        position: tuple | None = None,
+        before: bool = False,
+        filters: DeliveryFilters | None = None,
+        fields: list[str] | None = None,
+    ) -> tuple[list[Row], list[tuple], bool]:
+        """Return a page of the list query, by keyset pagination.
+
+        The page holds up to `per_page` rows of the `fields` of `list_columns`
+        (all of them by default) after `position`, a (sort key, id) pair, or
+        before it when `before` is set. Also returns the position of each row,
+        so the caller can build the positions of the next pages, and whether
+        more rows follow in the direction of the walk.
+        """
+        key, descending = self._sort_key(order_by_param)
+        fields = self._fields(fields)
+        query = self._list_query(
+            order_by_param,
+            fields,
+            key.label("sort_key"),
+            Delivery.id.label("sort_id"),
+            reverse=before,
+            filters=filters,
         )
-        paginated_query = db.paginate(
-            query, page=page, per_page=per_page, error_out=False
+
+        if position is not None:
+            self._check_position(key, position)
+            # The (key, id) > (...) row-value comparison is an index range
+            # scan, however deep the page is.
+            row_key = tuple_(key, Delivery.id)
+            if descending != before:
+                query = query.where(row_key < tuple_(*position))
+            else:
+                query = query.where(row_key > tuple_(*position))
+
+        # One more row than needed tells whether there is a next page. The
+        # rows keep only the selected fields, and are encoded as they are.
+        result = self.session.execute(query.limit(per_page + 1)).freeze()
+        rows = result().columns(*fields).all()
+        positions = [tuple(row) for row in result().columns("sort_key", "sort_id")]
+        has_more = len(rows) > per_page
+        rows, positions = list(rows[:per_page]), positions[:per_page]
+        if before:
+            rows.reverse()
+            positions.reverse()
+
+        return rows, positions, has_more
+
+    def stream_all(
+        self,
+        order_by_param: str,
+        batch_size: int,
+        filters: DeliveryFilters | None = None,
+        fields: list[str] | None = None,
+    ) -> Result:
+        """Return every row of the list query, as flat `fields` columns.
+
+        Rows are fetched `batch_size` at a time from a server-side cursor, so
+        memory use does not depend on the size of the table.
+        """
+        query = self._list_query(
+            order_by_param, self._fields(fields), filters=filters
         )
 
-        return paginated_query.items  # type: ignore
+        return self.session.execute(query.execution_options(yield_per=batch_size))
 
     def create(self, data: DeliveryDomainCreate) -> Delivery:
         entity = Delivery(
@@ -98,21 +276,42 @@ class DeliveryRepository(BaseRepository[Delivery]):
 
         return entity
 
-    def create_many(self, data: list[DeliveryDomain]) -> list[Delivery]:
-        entities = [
-            Delivery(
-                cliente_id=item.cliente_id,
-                id_angel=item.id_angel,
-                id_polo=item.id_polo,
-                data_limite=item.data_limite,
-                data_de_atendimento=item.data_de_atendimento,
-            )
+    @staticmethod
+    def _import_values(data: list[DeliveryDomain]) -> list[dict]:
+        return [
+            {
+                "cliente_id": item.cliente_id,
+                "id_angel": item.id_angel,
+                "id_polo": item.id_polo,
+                "data_limite": item.data_limite,
+                "data_de_atendimento": item.data_de_atendimento,
+                "status": item.status,
+                # -999 is what `Delivery.from_dict` uses for a missing id.
+                "source_id": None if item.id in (None, -999) else item.id,
+            }
             for item in data
         ]
 
+    def create_many(self, data: list[DeliveryDomain], commit: bool = True) -> int:
+        """Insert the deliveries, skipping source ids already imported.
+
+        Returns the number of rows actually inserted. With `commit=False` the
+        rows are left for the caller to commit.
+        """
+        values = self._import_values(data)
+        if not values:
+            return 0
+
+        stmt = (
+            dialect_insert(self.session, Delivery)
+            .on_conflict_do_nothing(index_elements=[Delivery.source_id])
+            .returning(Delivery.id)
+        )
+
         try:
-            self.session.bulk_save_objects(entities)
-            self.session.commit()
+            inserted = len(self.session.execute(stmt, values).all())
+            if commit:
+                self.session.commit()
         except sqlalchemy.exc.DBAPIError as e:
             self.session.rollback()
             raise Exception(
@@ -120,7 +319,62 @@ class DeliveryRepository(BaseRepository[Delivery]):
                 e,
             )
 
-        return entities
+        return inserted
+
+    def upsert_many(
+        self, data: list[DeliveryDomain], commit: bool = True
+    ) -> tuple[int, int]:
+        """Insert new deliveries and update the changed ones, by source id.
+
+        A single INSERT ... ON CONFLICT DO UPDATE per batch; its WHERE clause
+        skips the rows whose values did not change, as well as soft-deleted
+        deliveries. Returns the number of inserted and of updated rows.
+        """
+        # A statement cannot update the same row twice: the last occurrence
+        # of a source id in the batch wins.
+        values_by_source_id: dict = {}
+        without_source_id = []
+        for value in self._import_values(data):
+            if value["source_id"] is None:
+                without_source_id.append(value)
+            else:
+                values_by_source_id[value["source_id"]] = value
+        values = without_source_id + list(values_by_source_id.values())
+        if not values:
+            return 0, 0
+
+        insert_stmt = dialect_insert(self.session, Delivery)
+        excluded = insert_stmt.excluded
+        changed = or_(
+            *(
+                Delivery.__table__.c[column].is_distinct_from(excluded[column])
+                for column in self.upsert_columns
+            )
+        )
+        stmt = insert_stmt.on_conflict_do_update(
+            index_elements=[Delivery.source_id],
+            set_={
+                **{column: excluded[column] for column in self.upsert_columns},
+                "updated_at": func.now(),
+            },
+            where=and_(Delivery.deleted_at.is_(None), changed),
+        )
+        stmt = stmt.returning(Delivery.updated_at)
+
+        try:
+            returned = self.session.execute(stmt, values).all()
+            if commit:
+                self.session.commit()
+        except sqlalchemy.exc.DBAPIError as e:
+            self.session.rollback()
+            raise Exception(
+                "An error occurred while trying to upsert the entities.",
+                e,
+            )
+
+        # Inserted rows are the only ones returned without an updated_at.
+        inserted = sum(1 for row in returned if row.updated_at is None)
+        return inserted, len(returned) - inserted
 
     def update(self, data: DeliveryDomainUpdate, id: int = None) -> Delivery | None:
         entity = self.get_by_id(data.id if id is None else id)
@@ -145,18 +399,133 @@ class DeliveryRepository(BaseRepository[Delivery]):
 
         return entity
 
+    def _count_query(self, filters: DeliveryFilters | None, *columns: Any) -> Select:
+        query = (
+            select(*columns)
+            .select_from(Delivery)
+            .filter(Delivery.deleted_at.is_(None))
+        )
+        return self._filter(query, filters or DeliveryFilters())
+
+    def count(self, filters: DeliveryFilters | None = None) -> int:
+        """Count the deliveries of the list query, without its joins."""
+        query = self._count_query(filters, func.count())
+        return int(self.session.execute(query).scalar_one())
+
+    def estimate_count(self, filters: DeliveryFilters | None = None) -> int | None:
+        """Return the planner's estimate of `count`, without running the query.
+
+        Only PostgreSQL keeps the statistics it is read from; other databases
+        return None.
+        """
+        bind = self.session.get_bind()
+        if bind.dialect.name != "postgresql":
+            return None
+
+        compiled = self._count_query(filters, Delivery.id).compile(dialect=bind.dialect)
+        plan = self.session.connection().exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+        ).scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def get_version(self) -> Row:
+        """Return the write high-water marks of the deliveries.
+
+        Every write to the deliveries (or to the angel and polo names they are
+        listed with) moves one of them, and each is the max of an indexed
+        column, so they are read without scanning the table.
+        """
+        stmt = select(
+            *(
+                select(func.max(column)).scalar_subquery().label(name)
+                for name, column in (
+                    ("max_id", Delivery.id),
+                    ("created_at", Delivery.created_at),
+                    ("updated_at", Delivery.updated_at),
+                    ("angel_updated_at", Angel.updated_at),
+                    ("polo_updated_at", Polo.updated_at),
+                )
+            )
+        )
+        return self.session.execute(stmt).one()
+
     def get_angel_productivity_view(self, at_most: int) -> Sequence[Row]:
-        stmt = select(angel_productivity_view).limit(at_most)
+        # A concurrent refresh rewrites the rows of the materialized view in
+        # any order, so the order of the view's query is not kept.
+        view = angel_productivity_view.c
+        stmt = (
+            select(
+                view.courier.label("angel"),
+                view.total_deliveries,
+                view.on_time_deliveries,
+                view.on_time_percentage,
+            )
+            .order_by(view.on_time_percentage.desc(), view.courier)
+            .limit(at_most)
+        )
         items = self.session.execute(stmt).fetchall()
 
         return items
 
     def get_polo_productivity_view(self, at_most: int) -> Sequence[Row]:
-        stmt = select(polo_productivity_view).limit(at_most)
+        view = polo_productivity_view.c
+        stmt = (
+            select(polo_productivity_view)
+            .order_by(view.total_deliveries.desc(), view.polo, view.weekday)
+            .limit(at_most)
+        )
         items = self.session.execute(stmt).fetchall()
 
         return items
 
+    def has_materialized_views(self) -> bool:
+        """Whether the productivity views are materialized (on PostgreSQL)."""
+        return self.session.get_bind().dialect.name == "postgresql"
+
+    def get_refreshed_at(self, view_name: str) -> datetime.datetime | None:
+        stmt = select(ViewRefresh.refreshed_at).where(ViewRefresh.name == view_name)
+        return self.session.execute(stmt).scalar_one_or_none()
+
+    def refresh_productivity_views(self) -> datetime.datetime | None:
+        """Refresh the productivity views and return when the refresh started.
+
+        Concurrent refreshes keep the views readable while they run. Plain
+        views (on databases other than PostgreSQL) are never stale, and are
+        left as they are: this returns None.
+        """
+        if not self.has_materialized_views():
+            return None
+
+        refreshed_at = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+        try:
+            for view in PRODUCTIVITY_VIEWS:
+                self.session.execute(
+                    text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view.name}")
+                )
+            stmt = dialect_insert(self.session, ViewRefresh).values(
+                [
+                    {"name": view.name, "refreshed_at": refreshed_at}
+                    for view in PRODUCTIVITY_VIEWS
+                ]
+            )
+            self.session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[ViewRefresh.name],
+                    set_={"refreshed_at": stmt.excluded.refreshed_at},
+                )
+            )
+            self.session.commit()
+        except sqlalchemy.exc.DBAPIError as e:
+            self.session.rollback()
+            raise Exception(
+                "An error occurred while trying to refresh the views.",
+                e,
+            )
+
+        return refreshed_at
+
     def delete(self, id: int) -> bool:
         raise NotImplementedError
 
@@ -1,9 +1,62 @@
 from abc import ABC, abstractmethod
-from typing import Any, Generic, TypeVar
+from typing import Any, Generic, Iterable, TypeVar
+
+import sqlalchemy.exc
+import werkzeug.exceptions
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import InstrumentedAttribute, Session
 
 T = TypeVar("T")
 
 
+def dialect_insert(session: Session, model: Any) -> Any:
+    """Build an INSERT for `model` that supports ON CONFLICT in this dialect."""
+    if session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def bulk_get_or_create(
+    session: Session, key: InstrumentedAttribute, values: Iterable[Any]
+) -> dict[Any, int]:
+    """Return a `key` -> id map of the rows of `key`, creating the missing ones.
+
+    Safe under concurrent imports: conflicting inserts are skipped and the
+    rows another transaction created are read back in a single lookup.
+    """
+    model = key.class_
+    keys = sorted(set(values))
+    if not keys:
+        return {}
+
+    stmt = (
+        dialect_insert(session, model)
+        .values([{key.key: value} for value in keys])
+        .on_conflict_do_nothing(index_elements=[key])
+        .returning(key, model.id)
+    )
+
+    try:
+        ids = dict(session.execute(stmt).tuples().all())
+        existing = [value for value in keys if value not in ids]
+        if existing:
+            ids.update(
+                session.execute(select(key, model.id).where(key.in_(existing)))
+                .tuples()
+                .all()
+            )
+        session.commit()
+    except sqlalchemy.exc.DBAPIError as e:
+        session.rollback()
+        raise werkzeug.exceptions.InternalServerError(
+            description="An error occurred while trying to create the entities.",
+            original_exception=e,
+        )
+
+    return ids
+
+
 class BaseRepository(ABC, Generic[T]):
     @abstractmethod
     def get_by_id(self, id: int) -> T | None:
@@ -13,12 +66,6 @@ class BaseRepository(ABC, Generic[T]):
     def get_by_attribute(self, attribute: Any) -> T | None:
         pass
 
-    @abstractmethod
-    def get_paginated(
-        self, page: int, per_page: int, order_by_param: str
-    ) -> list[T]:
-        pass
-
     @abstractmethod
     async def create(self, entity: T) -> T:
         pass
@@ -8,7 +8,7 @@ from sqlalchemy.orm import Session
 from src.database import default_db as db
 from src.domain import Client as ClientDomain
 from src.models import Client
-from src.repositories.base import BaseRepository
+from src.repositories.base import BaseRepository, bulk_get_or_create
 
 
 class ClientRepository(BaseRepository):
@@ -55,10 +55,10 @@ class ClientRepository(BaseRepository):
 
         return entities
 
-    def get_by_attribute(self, attribute):
-        raise NotImplementedError
+    def bulk_get_or_create(self, ids: list[int]) -> dict[int, int]:
+        return bulk_get_or_create(self.session, Client.id, ids)
 
-    def get_paginated(self, page: int, per_page: int, order_by_param: str) -> list[Client]:
+    def get_by_attribute(self, attribute):
         raise NotImplementedError
 
     def update(self, entity: Client) -> Client | None:
@@ -0,0 +1,202 @@
+import datetime
+from typing import Any
+
+import sqlalchemy.exc
+import werkzeug.exceptions
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from src.models import ImportCheckpoint, ImportJob, ImportRowError
+from src.repositories.base import BaseRepository, dialect_insert
+
+
+class ImportJobRepository(BaseRepository[ImportJob]):
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_by_id(self, id: int) -> ImportJob | None:
+        return self.session.get(ImportJob, id)
+
+    def get_by_attribute(self, attribute: Any) -> ImportJob | None:
+        return self.get_by_checksum(attribute)
+
+    def get_by_checksum(self, checksum: str, mode: str = "insert") -> ImportJob | None:
+        stmt = select(ImportJob).where(
+            ImportJob.checksum == checksum, ImportJob.mode == mode
+        )
+        return self.session.execute(stmt).scalar_one_or_none()
+
+    def get_by_task_id(self, task_id: str) -> ImportJob | None:
+        stmt = select(ImportJob).where(ImportJob.task_id == task_id)
+        return self.session.execute(stmt).scalar_one_or_none()
+
+    def get_or_create(
+        self, checksum: str, mode: str = "insert"
+    ) -> tuple[ImportJob, bool]:
+        """Return the job for `checksum` and `mode` and whether this call created it."""
+        stmt = (
+            dialect_insert(self.session, ImportJob)
+            .values(checksum=checksum, mode=mode, status="PENDING")
+            .on_conflict_do_nothing(index_elements=[ImportJob.checksum, ImportJob.mode])
+            .returning(ImportJob.id)
+        )
+
+        try:
+            created_id = self.session.execute(stmt).scalar_one_or_none()
+            self.session.commit()
+        except sqlalchemy.exc.DBAPIError as e:
+            self.session.rollback()
+            raise werkzeug.exceptions.InternalServerError(
+                description="An error occurred while trying to create the entity.",
+                original_exception=e,
+            )
+
+        return self.get_by_checksum(checksum, mode), created_id is not None  # type: ignore
+
+    def update_status(
+        self, id: int, status: str, task_id: str | None = None, result: Any = None
+    ) -> ImportJob | None:
+        entity = self.get_by_id(id)
+        if entity is None:
+            return None
+
+        entity.updated_at = datetime.datetime.now(datetime.UTC)
+        entity.status = status
+        if task_id is not None:
+            entity.task_id = task_id
+        if result is not None:
+            entity.result = result
+
+        try:
+            self.session.commit()
+        except sqlalchemy.exc.DBAPIError as e:
+            self.session.rollback()
+            raise werkzeug.exceptions.InternalServerError(
+                description="An error occurred while trying to update the entity.",
+                original_exception=e,
+            )
+
+        return entity
+
+    def claim(self, id: int, stale_before: datetime.datetime) -> bool:
+        """Mark the job PENDING again if it failed or went stale, atomically.
+
+        A job is stale when it made no progress since `stale_before`. The
+        check and the update are one statement, so of concurrent claims of
+        the same job exactly one succeeds. Returns whether this call won.
+        """
+        last_progress = func.coalesce(ImportJob.updated_at, ImportJob.created_at)
+        stmt = (
+            update(ImportJob)
+            .where(
+                ImportJob.id == id,
+                ImportJob.status != "COMPLETED",
+                (ImportJob.status == "FAILED") | (last_progress < stale_before),
+            )
+            .values(
+                status="PENDING",
+                updated_at=datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
+            )
+            .returning(ImportJob.id)
+        )
+
+        try:
+            claimed_id = self.session.execute(stmt).scalar_one_or_none()
+            self.session.commit()
+        except sqlalchemy.exc.DBAPIError as e:
+            self.session.rollback()
+            raise werkzeug.exceptions.InternalServerError(
+                description="An error occurred while trying to update the entity.",
+                original_exception=e,
+            )
+
+        return claimed_id is not None
+
+    def get_checkpoint(self, id: int, range_start: int) -> ImportCheckpoint | None:
+        stmt = select(ImportCheckpoint).where(
+            ImportCheckpoint.import_job_id == id,
+            ImportCheckpoint.range_start == range_start,
+        )
+        return self.session.execute(stmt).scalar_one_or_none()
+
+    def save_checkpoint(
+        self,
+        id: int,
+        range_start: int,
+        rows_done: int,
+        successful_rows: int,
+        duplicate_rows: int,
+        updated_rows: int = 0,
+        commit: bool = True,
+    ) -> None:
+        """Save the progress of a range of the job.
+
+        The job's updated_at is bumped as well, so it tells how recently the
+        import made progress. With `commit=False` the checkpoint is left for
+        the caller to commit, along with the rows it accounts for.
+        """
+        entity = self.get_checkpoint(id, range_start) or ImportCheckpoint(
+            import_job_id=id, range_start=range_start
+        )
+        entity.rows_done = rows_done
+        entity.successful_rows = successful_rows
+        entity.duplicate_rows = duplicate_rows
+        entity.updated_rows = updated_rows
+
+        job = self.get_by_id(id)
+        if job is not None:
+            job.updated_at = datetime.datetime.now(datetime.UTC)
+
+        try:
+            self.session.add(entity)
+            if commit:
+                self.session.commit()
+        except sqlalchemy.exc.DBAPIError as e:
+            self.session.rollback()
+            raise werkzeug.exceptions.InternalServerError(
+                description="An error occurred while trying to save the checkpoint.",
+                original_exception=e,
+            )
+
+    def add_errors(self, id: int, errors: list[dict]) -> None:
+        values = [
+            {
+                "import_job_id": id,
+                # "batch" and "file" errors have no line of their own.
+                "line": error["line"] if isinstance(error["line"], int) else None,
+                "error": error["error"],
+                "data": error["data"],
+            }
+            for error in errors
+        ]
+        if not values:
+            return
+
+        try:
+            self.session.execute(insert(ImportRowError), values)
+            self.session.commit()
+        except sqlalchemy.exc.DBAPIError as e:
+            self.session.rollback()
+            raise werkzeug.exceptions.InternalServerError(
+                description="An error occurred while trying to save the errors.",
+                original_exception=e,
+            )
+
+    def get_errors(self, id: int, after: int, limit: int) -> list[ImportRowError]:
+        """Return up to `limit` errors of the job whose id is above `after`."""
+        stmt = (
+            select(ImportRowError)
+            .where(ImportRowError.import_job_id == id, ImportRowError.id > after)
+            .order_by(ImportRowError.id)
+            .limit(limit)
+        )
+        return list(self.session.execute(stmt).scalars())
+
+    def create(self, entity: ImportJob) -> ImportJob:
+        raise NotImplementedError
+
+    def update(self, entity: ImportJob) -> ImportJob | None:
+        raise NotImplementedError
+
+    def delete(self, id: int) -> bool:
+        raise NotImplementedError
@@ -8,7 +8,7 @@ from sqlalchemy.orm import Session
 from src.database import default_db as db
 from src.domain import Polo as PoloDomain
 from src.models import Polo
-from src.repositories.base import BaseRepository
+from src.repositories.base import BaseRepository, bulk_get_or_create
 
 
 class PoloRepository(BaseRepository):
@@ -24,6 +24,9 @@ class PoloRepository(BaseRepository):
         result = self.session.execute(stmt)
         return result.scalars().all()
 
+    def bulk_get_or_create(self, names: list[str]) -> dict[str, int]:
+        return bulk_get_or_create(self.session, Polo.name, names)
+
     def create(self, polo: PoloDomain) -> Polo:
         entity = Polo(name=polo.name)
 
@@ -58,9 +61,6 @@ class PoloRepository(BaseRepository):
     def get_by_id(self, id):
         raise NotImplementedError
 
-    def get_paginated(self, page, per_page, order_by_param):
-        raise NotImplementedError
-
     def update(self, entity):
         raise NotImplementedError
 
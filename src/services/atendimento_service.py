@@ -1,13 +1,14 @@
-from typing import List
+import dataclasses
+import datetime
+from typing import List, Sequence
 
 import werkzeug.exceptions
+from sqlalchemy import Result, Row
 
+from src.config import settings
 from src.database import default_db as db
-from src.domain import Angel as AngelDomain
-from src.domain import Client as ClientDomain
 from src.domain import Delivery as DeliveryDomain
-from src.domain import DeliveryDomainCreate, DeliveryDomainUpdate
-from src.domain import Polo as PoloDomain
+from src.domain import DeliveryDomainCreate, DeliveryDomainUpdate, DeliveryFilters
 from src.models import Delivery
 from src.repositories import (
     AngelRepository,
@@ -15,6 +16,19 @@ from src.repositories import (
     DeliveryRepository,
     PoloRepository,
 )
+from src.repositories.atendimento_repository import PRODUCTIVITY_VIEWS
+from src.services.dimension_cache import LRUCache, dimension_cache
+from src.services.pagination import (
+    ESTIMATED_TOTAL,
+    TOTAL_MODES,
+    Cursor,
+    Page,
+    decode_cursor,
+)
+
+# Exact totals of the list, by filter set and version of the deliveries: a
+# write moves the version, so a cached total is never stale.
+total_cache = LRUCache(settings.TOTAL_CACHE_SIZE)
 
 
 class DeliveryService:
@@ -27,38 +41,130 @@ class DeliveryService:
     def get_by_id(self, id: int) -> Delivery | None:
         return self.repository.get_by_id(id)
 
-    def get_all(self, page: int, per_page: int, order_by_param: str) -> List[Delivery]:
+    def _resolve_filters(self, filters: DeliveryFilters | None) -> DeliveryFilters:
+        """Resolve the angel and polo names of `filters` to their ids."""
+        filters = filters or DeliveryFilters()
+        if filters.angel is not None:
+            filters.id_angel = dimension_cache.lookup(
+                "angel",
+                [filters.angel],
+                lambda names: {
+                    angel.name: angel.id
+                    for angel in AngelRepository().get_by_names(names)
+                },
+            ).get(filters.angel)
+        if filters.polo is not None:
+            filters.id_polo = dimension_cache.lookup(
+                "polo",
+                [filters.polo],
+                lambda names: {
+                    polo.name: polo.id
+                    for polo in PoloRepository().get_by_attributes(names)
+                },
+            ).get(filters.polo)
+        return filters
+
+    def get_all(
+        self,
+        per_page: int,
+        order_by_param: str,
+        cursor: str | None = None,
+        filters: DeliveryFilters | None = None,
+        fields: List[str] | None = None,
+        include_total: str | None = None,
+    ) -> Page[Row]:
+        filters = self._resolve_filters(filters)
         try:
-            return self.repository.get_paginated(page, per_page, order_by_param)
+            if include_total not in (None, *TOTAL_MODES):
+                raise ValueError(f"include_total must be one of {list(TOTAL_MODES)}")
+
+            position = decode_cursor(cursor) if cursor else None
+            if position is not None and position.order_by != order_by_param:
+                raise ValueError("the cursor belongs to another order_by")
+
+            rows, positions, has_more = self.repository.get_page(
+                per_page,
+                order_by_param,
+                position.position if position else None,
+                before=position.before if position else False,
+                filters=filters,
+                fields=fields,
+            )
         except ValueError as e:
             raise werkzeug.exceptions.BadRequest(
                 description=f"Error getting the atendimentos: {str(e)}",
             )
 
+        page = Page[Row](items=rows)
+        if include_total is not None:
+            page.total = self._total(filters, include_total)
+        if not rows:
+            return page
+
+        # The query tells whether rows follow in the direction it walked; a
+        # cursor means rows were left behind in the other one.
+        backwards = position is not None and position.before
+        more_after = True if backwards else has_more
+        more_before = has_more if backwards else position is not None
+        if more_after:
+            page.next_cursor = Cursor(order_by_param, positions[-1])
+        if more_before:
+            page.prev_cursor = Cursor(order_by_param, positions[0], before=True)
+        return page
+
+    def _total(self, filters: DeliveryFilters, include_total: str) -> int:
+        # Databases without planner statistics fall back to the exact total.
+        if include_total == ESTIMATED_TOTAL:
+            estimate = self.repository.estimate_count(filters)
+            if estimate is not None:
+                return estimate
+
+        key = (dataclasses.astuple(filters), self.get_version())
+        total = total_cache.get(key)
+        if total is None:
+            total = self.repository.count(filters)
+            total_cache.set(key, total, settings.TOTAL_CACHE_TTL)
+        return total
+
+    def export(
+        self,
+        order_by_param: str,
+        filters: DeliveryFilters | None = None,
+        fields: List[str] | None = None,
+    ) -> Result:
+        filters = self._resolve_filters(filters)
+        try:
+            return self.repository.stream_all(
+                order_by_param, settings.EXPORT_BATCH_SIZE, filters, fields
+            )
+        except ValueError as e:
+            raise werkzeug.exceptions.BadRequest(
+                description=f"Error exporting the atendimentos: {str(e)}",
+            )
+
     def create(self, atendimento: DeliveryDomain) -> Delivery:
         angel_repository = AngelRepository()
         polo_repository = PoloRepository()
         client_repository = ClientRepository()
 
-        # check if the related entities exists.
-        angel = angel_repository.get_by_name(atendimento.angel)
-        polo = polo_repository.get_by_attribute(atendimento.polo)
-        client = client_repository.get_by_id(atendimento.cliente_id)
-
-        # if any of the related entities doesn't exist, create them.
-        if angel is None:
-            angel = angel_repository.create(AngelDomain(name=atendimento.angel))
-        if polo is None:
-            polo = polo_repository.create(PoloDomain(name=atendimento.polo))
-        if client is None:
-            client = client_repository.create(ClientDomain(id=atendimento.cliente_id))
+        # resolve the related entities through the dimension cache, creating
+        # them if they don't exist.
+        angel_id = dimension_cache.get_or_create(
+            "angel", [atendimento.angel], angel_repository.bulk_get_or_create
+        ).get(atendimento.angel)
+        polo_id = dimension_cache.get_or_create(
+            "polo", [atendimento.polo], polo_repository.bulk_get_or_create
+        ).get(atendimento.polo)
+        client_id = dimension_cache.get_or_create(
+            "cliente", [atendimento.cliente_id], client_repository.bulk_get_or_create
+        ).get(atendimento.cliente_id)
 
         try:
             # Create the atendimento
             atendimento_create = DeliveryDomainCreate(
-                cliente_id=client.id,  # type: ignore
-                id_angel=angel.id,  # type: ignore
-                id_polo=polo.id,  # type: ignore
+                cliente_id=client_id,  # type: ignore
+                id_angel=angel_id,  # type: ignore
+                id_polo=polo_id,  # type: ignore
                 data_limite=atendimento.data_limite,
                 data_de_atendimento=atendimento.data_de_atendimento,
                 status=atendimento.status,
@@ -70,7 +176,7 @@ class DeliveryService:
 
         return self.repository.create(atendimento_create)
 
-    def create_many(self, atendimentos: List[DeliveryDomain]) -> List[Delivery]:
+    def create_many(self, atendimentos: List[DeliveryDomain]) -> int:
         return self.repository.create_many(atendimentos)
 
     def update(
@@ -81,43 +187,67 @@ class DeliveryService:
     def delete(self, id: int) -> bool:
         return self.repository.delete(id)
 
-    def get_angel_productivity(self, at_most: int) -> List[dict]:
+    def get_version(self) -> tuple:
+        """A value that changes whenever the deliveries read by the API do."""
+        return tuple(self.repository.get_version())
+
+    def has_materialized_views(self) -> bool:
+        return self.repository.has_materialized_views()
+
+    def get_refreshed_at(self, view_name: str) -> datetime.datetime | None:
+        """When the view was last refreshed; None if it is not materialized."""
+        if not self.has_materialized_views():
+            return None
+        return self.repository.get_refreshed_at(view_name)
+
+    def get_productivity_version(
+        self, refreshed_at: datetime.datetime | None
+    ) -> tuple:
+        """A value that changes whenever a productivity view does.
+
+        A materialized view only changes when it is refreshed; a plain one
+        with every write to the deliveries.
+        """
+        if refreshed_at is not None:
+            return (refreshed_at,)
+        return self.get_version()
+
+    def refresh_productivity_views(
+        self, requested_at: datetime.datetime | None = None
+    ) -> datetime.datetime | None:
+        """Refresh the productivity views, and return when the refresh started.
+
+        A refresh requested at `requested_at` is skipped (returning None) when
+        another one started after it: the views already hold the writes that
+        asked for it.
+        """
+        if requested_at is not None:
+            refreshed_at = [
+                self.repository.get_refreshed_at(view.name)
+                for view in PRODUCTIVITY_VIEWS
+            ]
+            if all(
+                refreshed is not None and refreshed >= requested_at
+                for refreshed in refreshed_at
+            ):
+                return None
+
+        return self.repository.refresh_productivity_views()
+
+    def get_angel_productivity(self, at_most: int) -> Sequence[Row]:
         try:
-            sequence = self.repository.get_angel_productivity_view(at_most)
+            return self.repository.get_angel_productivity_view(at_most)
         except Exception as e:
             raise werkzeug.exceptions.InternalServerError(
                 description=f"Error getting the angel productivity: {str(e)}",
                 original_exception=e,
             )
 
-        serialized_items = []
-        for row in sequence:
-            item = {
-                "angel": row[0],
-                "total_deliveries": row[1],
-                "on_time_deliveries": row[2],
-                "on_time_percentage": row[3],
-            }
-            serialized_items.append(item)
-
-        return serialized_items
-
-    def get_polo_productivity(self, at_most: int) -> List[dict]:
+    def get_polo_productivity(self, at_most: int) -> Sequence[Row]:
         try:
-            sequence = self.repository.get_polo_productivity_view(at_most)
+            return self.repository.get_polo_productivity_view(at_most)
         except Exception as e:
             raise werkzeug.exceptions.InternalServerError(
                 description=f"Error getting the polo productivity: {str(e)}",
                 original_exception=e,
             )
-
-        serialized_items = []
-        for row in sequence:
-            item = {
-                "polo": row[0],
-                "weekday": row[1],
-                "total_deliveries": row[2],
-            }
-            serialized_items.append(item)
-
-        return serialized_items
@@ -0,0 +1,45 @@
+import csv
+import io
+from typing import Callable, Iterator
+
+from sqlalchemy import Result, Row
+
+CSV_EXPORT = "csv"
+NDJSON_EXPORT = "ndjson"
+EXPORT_FORMATS = {
+    CSV_EXPORT: "text/csv",
+    NDJSON_EXPORT: "application/x-ndjson",
+}
+
+
+def export_chunks(
+    rows: Result,
+    export_format: str,
+    chunk_rows: int,
+    dumps: Callable[[Row], str],
+) -> Iterator[str]:
+    """Serialize `rows` as CSV or NDJSON, `chunk_rows` rows per chunk.
+
+    Rows are consumed as they are yielded, so only one chunk is held in
+    memory. NDJSON lines are written with `dumps`, the app's JSON encoder, which
+    encodes rows as objects.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if export_format == CSV_EXPORT:
+        writer.writerow(rows.keys())
+
+    for count, row in enumerate(rows, start=1):
+        if export_format == CSV_EXPORT:
+            writer.writerow(row)
+        else:
+            buffer.write(dumps(row))
+            buffer.write("\n")
+
+        if count % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
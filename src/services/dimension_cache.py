@@ -0,0 +1,214 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Callable, Hashable, Iterable, cast
+
+import redis
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Marks a key known to be absent from the database (negative cache entry).
+MISSING = -1
+# Prefix of the keys of the shared tier.
+REDIS_NAMESPACE = "dimension"
+
+
+class LRUCache:
+    """Bounded, thread-safe LRU mapping with a TTL per entry."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DimensionCache:
+    """Two-tier cache of dimension key -> id lookups (angel, polo, cliente).
+
+    Lookups hit an in-process LRU first and a shared Redis tier second, so
+    every web and worker process benefits from ids another one resolved.
+
+    Negative entries (keys missing from the database) are kept only in the
+    local tier and only for `negative_ttl` seconds; creating a dimension
+    through `get_or_create` overwrites them, so a new angel/polo/client is never
+    hidden for longer than that on other processes.
+    """
+
+    def __init__(
+        self,
+        redis_url: str | None = None,
+        max_size: int = 10_000,
+        ttl: int = 3600,
+        negative_ttl: int = 5,
+    ):
+        self.local = LRUCache(max_size)
+        self.redis_url = redis_url
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._redis: redis.Redis | None = None
+
+    @property
+    def shared(self) -> redis.Redis | None:
+        if self.redis_url and self._redis is None:
+            self._redis = redis.Redis.from_url(
+                self.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5
+            )
+        return self._redis
+
+    @staticmethod
+    def _redis_key(kind: str, key: Hashable) -> str:
+        return f"{REDIS_NAMESPACE}:{kind}:{key}"
+
+    def get_many(self, kind: str, keys: Iterable[Hashable]) -> dict[Hashable, int]:
+        """Return the cached ids (or `MISSING`) for the keys that are cached."""
+        found: dict[Hashable, int] = {}
+        remote_keys = []
+        for key in keys:
+            value = self.local.get((kind, key))
+            if value is None:
+                remote_keys.append(key)
+            else:
+                found[key] = value
+
+        if remote_keys and self.shared is not None:
+            try:
+                # A synchronous client returns the values, not an awaitable.
+                values = cast(
+                    list[Any],
+                    self.shared.mget([self._redis_key(kind, key) for key in remote_keys]),
+                )
+            except redis.RedisError as e:
+                logger.warning("Dimension cache unavailable: %s", str(e))
+                values = []
+
+            for key, value in zip(remote_keys, values):
+                if value is not None:
+                    found[key] = int(value)
+                    self.local.set((kind, key), int(value), self.ttl)
+
+        return found
+
+    def set_many(self, kind: str, ids: dict[Hashable, int]) -> None:
+        for key, id in ids.items():
+            self.local.set((kind, key), id, self.ttl)
+
+        if ids and self.shared is not None:
+            try:
+                pipeline = self.shared.pipeline(transaction=False)
+                for key, id in ids.items():
+                    pipeline.set(self._redis_key(kind, key), id, ex=self.ttl)
+                pipeline.execute()  # type: ignore[no-untyped-call]
+            except redis.RedisError as e:
+                logger.warning("Dimension cache unavailable: %s", str(e))
+
+    def set_missing(self, kind: str, keys: Iterable[Hashable]) -> None:
+        for key in keys:
+            self.local.set((kind, key), MISSING, self.negative_ttl)
+
+    def clear(self) -> None:
+        """Forget every cached id, in this process and in the shared tier.
+
+        The local tiers of the other processes keep theirs until they expire.
+        """
+        self.local.clear()
+        if self.shared is None:
+            return
+
+        try:
+            keys = self.shared.scan_iter(match=f"{REDIS_NAMESPACE}:*", count=1000)
+            while batch := list(islice(keys, 1000)):
+                self.shared.unlink(*batch)
+        except redis.RedisError as e:
+            logger.warning("Dimension cache unavailable: %s", str(e))
+
+    def _resolve(
+        self,
+        kind: str,
+        keys: Iterable[Hashable],
+        loader: Callable[[list], dict],
+        use_negative: bool,
+    ) -> dict[Hashable, int]:
+        keys = set(keys)
+        cached = self.get_many(kind, keys)
+        if not use_negative:
+            cached = {key: id for key, id in cached.items() if id != MISSING}
+
+        misses = [key for key in keys if key not in cached]
+        if misses:
+            loaded = loader(misses)
+            self.set_many(kind, loaded)
+            self.set_missing(kind, [key for key in misses if key not in loaded])
+            cached.update(loaded)
+
+        return {key: id for key, id in cached.items() if id != MISSING}
+
+    def lookup(
+        self,
+        kind: str,
+        keys: Iterable[Hashable],
+        loader: Callable[[list], dict],
+    ) -> dict[Hashable, int]:
+        """Return a key -> id map of the existing dimensions.
+
+        `loader` only reads: it receives the cache misses and returns the ids
+        it found. Keys it does not return are negatively cached.
+        """
+        return self._resolve(kind, keys, loader, use_negative=True)
+
+    def get_or_create(
+        self,
+        kind: str,
+        keys: Iterable[Hashable],
+        creator: Callable[[list], dict],
+    ) -> dict[Hashable, int]:
+        """Return a key -> id map, creating the missing dimensions.
+
+        `creator` receives the cache misses, including negatively cached keys,
+        and returns an id for each of them. Caching those ids replaces any
+        negative entry, which is how a creation invalidates the cache.
+        """
+        return self._resolve(kind, keys, creator, use_negative=False)
+
+
+dimension_cache = DimensionCache(
+    redis_url=settings.DIMENSION_CACHE_REDIS_URL,
+    max_size=settings.DIMENSION_CACHE_SIZE,
+    ttl=settings.DIMENSION_CACHE_TTL,
+    negative_ttl=settings.DIMENSION_CACHE_NEGATIVE_TTL,
+)
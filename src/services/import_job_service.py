@@ -0,0 +1,82 @@
+import datetime
+
+import werkzeug.exceptions
+
+from src.config import settings
+from src.database import default_db as db
+from src.models import ImportCheckpoint, ImportJob, ImportRowError
+from src.repositories import ImportJobRepository
+
+
+class ImportJobService:
+    # constructor injection for the repository (dependency injection)
+    def __init__(
+        self, repository: ImportJobRepository = ImportJobRepository(session=db.session)
+    ):
+        self.repository = repository
+
+    def get_by_id(self, id: int) -> ImportJob | None:
+        return self.repository.get_by_id(id)
+
+    def get_or_create(
+        self, checksum: str, mode: str = "insert"
+    ) -> tuple[ImportJob, bool]:
+        return self.repository.get_or_create(checksum, mode)
+
+    def start(self, id: int, task_id: str) -> ImportJob | None:
+        return self.repository.update_status(id, "PENDING", task_id=task_id)
+
+    def mark_processing(self, id: int) -> ImportJob | None:
+        return self.repository.update_status(id, "PROCESSING")
+
+    def complete(self, id: int, result: dict) -> ImportJob | None:
+        return self.repository.update_status(id, "COMPLETED", result=result)
+
+    def fail(self, id: int) -> ImportJob | None:
+        return self.repository.update_status(id, "FAILED")
+
+    def claim(self, id: int) -> bool:
+        """Claim a failed or lost job, to dispatch it again.
+
+        A job whose task was lost can be claimed once it made no progress for
+        IMPORT_JOB_STALE_AFTER seconds. Only one of concurrent claims wins.
+        """
+        now = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+        return self.repository.claim(
+            id, now - datetime.timedelta(seconds=settings.IMPORT_JOB_STALE_AFTER)
+        )
+
+    def get_checkpoint(self, id: int, range_start: int) -> ImportCheckpoint | None:
+        return self.repository.get_checkpoint(id, range_start)
+
+    def save_checkpoint(
+        self,
+        id: int,
+        range_start: int,
+        rows_done: int,
+        successful_rows: int,
+        duplicate_rows: int,
+        updated_rows: int = 0,
+        commit: bool = True,
+    ) -> None:
+        self.repository.save_checkpoint(
+            id,
+            range_start,
+            rows_done,
+            successful_rows,
+            duplicate_rows,
+            updated_rows,
+            commit=commit,
+        )
+
+    def add_errors(self, id: int, errors: list[dict]) -> None:
+        self.repository.add_errors(id, errors)
+
+    def get_errors(self, task_id: str, cursor: int, limit: int) -> list[ImportRowError]:
+        job = self.repository.get_by_task_id(task_id)
+        if job is None:
+            raise werkzeug.exceptions.NotFound(
+                description=f"No import found for task {task_id}"
+            )
+
+        return self.repository.get_errors(job.id, cursor, limit)
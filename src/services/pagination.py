@@ -0,0 +1,71 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Generic, List, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class Cursor:
+    """A position in a keyset-paginated list.
+
+    `position` is the (sort key, id) of the row next to the requested page:
+    the page starts after it, or ends before it when `before` is set.
+    """
+
+    order_by: str
+    position: tuple
+    before: bool = False
+
+
+# How the total of a list is counted: a (cached) COUNT or the planner's estimate.
+EXACT_TOTAL = "exact"
+ESTIMATED_TOTAL = "estimate"
+TOTAL_MODES = (EXACT_TOTAL, ESTIMATED_TOTAL)
+
+
+@dataclass
+class Page(Generic[T]):
+    items: List[T] = field(default_factory=list)
+    next_cursor: Cursor | None = None
+    prev_cursor: Cursor | None = None
+    total: int | None = None
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"datetime": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value["datetime"])
+    return value
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    payload = {
+        "order_by": cursor.order_by,
+        "position": [_encode_value(value) for value in cursor.position],
+        "before": cursor.before,
+    }
+    token = base64.urlsafe_b64encode(json.dumps(payload).encode())
+    return token.decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Cursor:
+    """Decode a token made by `encode_cursor`, raising ValueError if it is not."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        sort_key, id = payload["position"]
+        return Cursor(
+            order_by=payload["order_by"],
+            position=(_decode_value(sort_key), int(id)),
+            before=bool(payload["before"]),
+        )
+    except (binascii.Error, KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"invalid cursor: {token}") from e
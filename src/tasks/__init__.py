@@ -1 +1,2 @@
-from .csv_processor import import_csv_task # noqa
\ No newline at end of file
+from .csv_processor import import_csv_task, validate_csv_task # noqa
+from .view_refresh import refresh_productivity_views_task # noqa
@@ -0,0 +1,101 @@
+from contextlib import contextmanager
+from typing import Generator, Iterator, List
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+CSV_FORMAT = "csv"
+PARQUET_FORMAT = "parquet"
+ARROW_FORMAT = "arrow"
+
+COLUMNAR_FORMATS = (PARQUET_FORMAT, ARROW_FORMAT)
+
+PARQUET_MAGIC = b"PAR1"
+ARROW_FILE_MAGIC = b"ARROW1"
+# Arrow IPC streams start with a continuation marker instead of a magic string.
+ARROW_STREAM_MARKER = b"\xff\xff\xff\xff"
+
+CONTENT_TYPES = {
+    "application/vnd.apache.parquet": PARQUET_FORMAT,
+    "application/x-parquet": PARQUET_FORMAT,
+    "application/vnd.apache.arrow.file": ARROW_FORMAT,
+    "application/vnd.apache.arrow.stream": ARROW_FORMAT,
+}
+
+# Columns read from columnar files; any other column is never decoded.
+DELIVERY_COLUMNS = (
+    "id_atendimento",
+    "id_cliente",
+    "angel",
+    "polo",
+    "data_limite",
+    "data_de_atendimento",
+    "status",
+)
+
+
+def detect_format(file_path: str, content_type: str | None = None) -> str:
+    """Detect the format of a spooled upload from its magic bytes.
+
+    The content type is only used when the magic bytes are inconclusive.
+    """
+    with open(file_path, "rb") as raw:
+        head = raw.read(len(ARROW_FILE_MAGIC))
+
+    if head.startswith(PARQUET_MAGIC):
+        return PARQUET_FORMAT
+    if head.startswith(ARROW_FILE_MAGIC) or head.startswith(ARROW_STREAM_MARKER):
+        return ARROW_FORMAT
+
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return CONTENT_TYPES.get(media_type, CSV_FORMAT)
+
+
+@contextmanager
+def open_record_batches(
+    file_path: str, file_format: str, batch_size: int
+) -> Generator[tuple[int, Iterator[pa.RecordBatch]], None, None]:
+    """Open a Parquet or Arrow IPC file as record batches of the delivery columns.
+
+    Yields the total number of rows and an iterator of batches of at most
+    `batch_size` rows.
+    """
+    if file_format == PARQUET_FORMAT:
+        parquet_file = pq.ParquetFile(file_path)
+        try:
+            columns = _delivery_columns(parquet_file.schema_arrow.names)
+            yield (
+                parquet_file.metadata.num_rows,
+                parquet_file.iter_batches(batch_size=batch_size, columns=columns),
+            )
+        finally:
+            parquet_file.close()
+        return
+
+    with pa.memory_map(file_path) as source:
+        if source.read(len(ARROW_FILE_MAGIC)) == ARROW_FILE_MAGIC:
+            source.seek(0)
+            file_reader = pa.ipc.open_file(source)
+            batches = [
+                file_reader.get_batch(i) for i in range(file_reader.num_record_batches)
+            ]
+            # Batches are memory-mapped, so counting their rows reads no data.
+            total_rows = sum(batch.num_rows for batch in batches)
+            yield total_rows, _rebatch(iter(batches), batch_size)
+        else:
+            source.seek(0)
+            # Streams carry no row count up front.
+            yield 0, _rebatch(iter(pa.ipc.open_stream(source)), batch_size)
+
+
+def _delivery_columns(names: List[str]) -> List[str]:
+    return [name for name in DELIVERY_COLUMNS if name in names]
+
+
+def _rebatch(
+    batches: Iterator[pa.RecordBatch], batch_size: int
+) -> Iterator[pa.RecordBatch]:
+    for batch in batches:
+        batch = batch.select(_delivery_columns(batch.schema.names))
+        for offset in range(0, batch.num_rows, batch_size):
+            yield batch.slice(offset, batch_size)
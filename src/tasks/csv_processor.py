@@ -1,26 +1,77 @@
 import csv
-from io import StringIO
-from typing import Dict, List, Tuple
+import hashlib
+import inspect
+import os
+import time
+from dataclasses import asdict
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Tuple,
+    cast,
+)
 
-from celery import shared_task
+import pyarrow as pa
+from celery import Task, chord, shared_task
 from celery.utils.log import get_task_logger
 from sqlalchemy.orm import Session
 
+from src.config import settings
 from src.database import get_celery_session
-from src.domain import Angel as AngelDomain
-from src.domain import Client as ClientDomain
+from src.domain import DateParser
 from src.domain import Delivery as DeliveryDT
-from src.domain import Polo as PoloDomain
+from src.domain.date_parser import default_date_parser
 from src.repositories import (
     AngelRepository,
     ClientRepository,
     DeliveryRepository,
+    ImportJobRepository,
     PoloRepository,
 )
+from src.services.dimension_cache import dimension_cache
+from src.services.import_job_service import ImportJobService
+from src.tasks.columnar_source import (
+    COLUMNAR_FORMATS,
+    CSV_FORMAT,
+    open_record_batches,
+)
+from src.tasks.csv_source import (
+    ByteRange,
+    bytes_consumed,
+    data_range,
+    open_spooled_csv,
+    plan_byte_ranges,
+    read_layout,
+)
+from src.tasks.import_errors import ErrorLog
+from src.tasks.import_mode import INSERT_MODE, UPSERT_MODE, mode_counts
+from src.tasks.pipeline import prefetch
+from src.tasks.progress import PROGRESS_STATE, ImportProgress
+from src.tasks.spool import file_checksum, remove_spooled_file
+from src.tasks.staging_import import process_csv_staging
+from src.tasks.view_refresh import refresh_productivity_views_task
 
 BATCH_SIZE = 10_000
+DATE_COLUMNS = ("data_limite", "data_de_atendimento")
 logger = get_task_logger(__name__)
 
+
+class ParsedBatch(NamedTuple):
+    # Rows read from the file so far, including this batch.
+    rows_read: int
+    bytes_read: int
+    deliveries: List[DeliveryDT]
+    errors: List[Dict]
+    # Seconds spent reading and validating the batch, recorded by the
+    # consumer since the batch may be parsed in another thread.
+    parse_seconds: float
+
 # Very hard to test this file because:
 # 1. It uses a celery task to perform the logic
 # 2. It uses an db session to interact with the database
@@ -32,34 +83,212 @@ logger = get_task_logger(__name__)
 # That's why I added pragmas to ignore coverage for this file :)
 
 
-@shared_task
-def import_csv_task(file_content: str) -> dict:  # pragma: no cover
-    result = process_csv(file_content)
+def import_job_service(session: Session) -> ImportJobService:
+    return ImportJobService(ImportJobRepository(session=session))
+
+
+class ImportJobTask(Task):
+    """Task of an import job, marking the job FAILED if it raises.
+
+    A re-upload of the file then dispatches the import again right away,
+    instead of waiting for the job to go stale.
+    """
+
+    def on_failure(
+        self,
+        exc: Exception,
+        task_id: str,
+        args: tuple,
+        kwargs: dict,
+        einfo: Any,
+    ) -> None:  # pragma: no cover
+        arguments = inspect.signature(self.run).bind(*args, **kwargs).arguments
+        with get_celery_session() as session:
+            import_job_service(session).fail(arguments["import_job_id"])
+
+
+# Late acks put the message back in the queue if the worker dies mid-import;
+# the redelivered task resumes from the checkpoints of the import job.
+@shared_task(
+    bind=True, base=ImportJobTask, acks_late=True, reject_on_worker_lost=True
+)
+def import_csv_task(
+    self: Task,
+    file_path: str,
+    checksum: str,
+    import_job_id: int,
+    file_format: str = CSV_FORMAT,
+    mode: str = INSERT_MODE,
+) -> dict:  # pragma: no cover
+    byte_ranges = []
+    digest = hashlib.sha256()
+    if file_format == CSV_FORMAT:
+        try:
+            # The chunks are planned in the same read that checks the file.
+            byte_ranges = plan_byte_ranges(
+                file_path, settings.IMPORT_CHUNK_SIZE, on_block=digest.update
+            )
+        except Exception as e:
+            # Let the serial path report the unreadable file in its result.
+            logger.warning("Could not split %s into chunks: %s", file_path, str(e))
+    spooled_checksum = digest.hexdigest() if byte_ranges else file_checksum(file_path)
+    if spooled_checksum != checksum:
+        raise ValueError(f"Checksum mismatch for spooled file {file_path}")
+
+    with get_celery_session() as session:
+        import_job_service(session).mark_processing(import_job_id)
+
+    if len(byte_ranges) > 1:
+        logger.info("Fanning out %s in %d chunks", file_path, len(byte_ranges))
+        chunk_tasks = [
+            import_csv_chunk_task.s(file_path, asdict(byte_range), import_job_id, mode)
+            for byte_range in byte_ranges
+        ]
+        chunk_task_ids = [chunk_task.freeze().id for chunk_task in chunk_tasks]
+        # `task_status` aggregates the progress of the chunks from these ids
+        # until the merge callback stores the final result.
+        self.update_state(
+            state=PROGRESS_STATE,
+            meta={
+                "chunk_task_ids": chunk_task_ids,
+                "chunk_sizes": [r.end - r.start for r in byte_ranges],
+            },
+        )
+        workflow = chord(
+            chunk_tasks, merge_import_results_task.s(file_path, import_job_id, mode)
+        )
+        # The chord callback inherits this task id, so `task_status` keeps
+        # working with the id returned by the upload endpoint.
+        return cast(dict, self.replace(workflow))
+
+    result = process_csv(
+        file_path,
+        on_progress=publish_progress(self),
+        import_job_id=import_job_id,
+        file_format=file_format,
+        mode=mode,
+    )
+    complete_import_job(import_job_id, result)
+    remove_spooled_file(file_path)
     return result
 
-def process_batch(
-    rows: List[Dict],
-    repositories: Tuple[
-        DeliveryRepository, AngelRepository, PoloRepository, ClientRepository
-    ],
-    session: Session,
-) -> Tuple[int, List[Dict]]:  # pragma: no cover
-    """Process a batch of CSV rows"""
-    successful_rows = 0
-    errors = []
-    skipped_rows = 0
 
-    delivery_repo, angel_repo, polo_repo, client_repo = repositories
+@shared_task(
+    bind=True, base=ImportJobTask, acks_late=True, reject_on_worker_lost=True
+)
+def import_csv_chunk_task(
+    self: Task,
+    file_path: str,
+    byte_range: dict,
+    import_job_id: int,
+    mode: str = INSERT_MODE,
+) -> dict:  # pragma: no cover
+    return process_csv(
+        file_path,
+        ByteRange(**byte_range),
+        on_progress=publish_progress(self),
+        import_job_id=import_job_id,
+        mode=mode,
+    )
 
-    # Collect unique entities to create
-    angels_to_create = set()
-    polos_to_create = set()
-    clients_to_create = set()
-    deliveries_to_create = []
+
+@shared_task(base=ImportJobTask)
+def merge_import_results_task(
+    results: List[dict], file_path: str, import_job_id: int, mode: str = INSERT_MODE
+) -> dict:  # pragma: no cover
+    result = merge_import_results(results, mode)
+    complete_import_job(import_job_id, result)
+    remove_spooled_file(file_path)
+    return result
+
+
+def complete_import_job(import_job_id: int, result: dict) -> None:  # pragma: no cover
+    with get_celery_session() as session:
+        import_job_service(session).complete(import_job_id, result)
+
+    # The productivity views only show the imported rows once refreshed. The
+    # import is complete either way, so a broker error is only logged.
+    if result.get("successful_rows"):
+        try:
+            refresh_productivity_views_task.delay()
+        except Exception as e:
+            logger.error(
+                "Could not schedule the productivity views refresh: %s", str(e)
+            )
+
+
+@shared_task(bind=True)
+def validate_csv_task(
+    self: Task, file_path: str, checksum: str, file_format: str = CSV_FORMAT
+) -> dict:  # pragma: no cover
+    if file_checksum(file_path) != checksum:
+        raise ValueError(f"Checksum mismatch for spooled file {file_path}")
+
+    result = validate_csv(
+        file_path, on_progress=publish_progress(self), file_format=file_format
+    )
+    remove_spooled_file(file_path)
+    return result
+
+
+def merge_import_results(results: List[dict], mode: str = INSERT_MODE) -> dict:
+    total_rows = sum(result["total_rows"] for result in results)
+    successful_rows = sum(result["successful_rows"] for result in results)
+    duplicate_rows = sum(result["duplicate_rows"] for result in results)
+    updated_rows = sum(result.get("updated_rows", 0) for result in results)
+
+    return {
+        "status": "completed",
+        "total_rows": total_rows,
+        "successful_rows": successful_rows,
+        "duplicate_rows": duplicate_rows,
+        "failed_rows": total_rows - successful_rows - duplicate_rows,
+        **mode_counts(mode, successful_rows, updated_rows, duplicate_rows),
+        "error_count": sum(result["error_count"] for result in results),
+        # Each chunk stored all of its errors; keep as many samples as one import.
+        "errors": [error for result in results for error in result["errors"]][
+            : settings.IMPORT_ERROR_SAMPLE_SIZE
+        ],
+    }
+
+
+def publish_progress(task: Task) -> Callable[[dict], None]:  # pragma: no cover
+    def publish(meta: dict) -> None:
+        task.update_state(state=PROGRESS_STATE, meta=meta)
+
+    return publish
+
+
+def detect_date_parser(rows: List[Dict]) -> DateParser:
+    return DateParser.detect(
+        row.get(column) for row in rows for column in DATE_COLUMNS
+    )
+
+
+def validate_batch(
+    rows: List[Tuple[int, Dict]], date_parser: DateParser = default_date_parser
+) -> Tuple[List[DeliveryDT], List[Dict]]:
+    """Parse and validate a batch of rows, without touching the database.
+
+    Returns the valid deliveries and the errors of the other rows.
+    """
+    deliveries = []
+    errors = []
 
     for row_num, row in rows:
         try:
-            obj = DeliveryDT.from_dict(row)
+            # Read like the staging engine: names are trimmed, a blank one is
+            # missing and a blank status is the default one. Errors still
+            # report the raw row.
+            obj = DeliveryDT.from_dict(
+                dict(
+                    row,
+                    angel=(row.get("angel") or "").strip() or None,
+                    polo=(row.get("polo") or "").strip() or None,
+                    status=(row.get("status") or "").strip() or "PENDING",
+                ),
+                date_parser,
+            )
 
             # Skip if required fields are None
             if any(
@@ -69,56 +298,68 @@ def process_batch(
                 logger.warning(
                     "Skipping row %d: Missing required fields in data: %s", row_num, row
                 )
-                skipped_rows += 1
                 errors.append(
                     {"line": row_num, "error": "Missing required fields", "data": row}
                 )
                 continue
 
-            # Track entities that need to be created
-            angels_to_create.add(obj.angel)
-            polos_to_create.add(obj.polo)
-            clients_to_create.add(obj.cliente_id)
-            deliveries_to_create.append(obj)
+            deliveries.append(obj)
 
         except Exception as e:
             logger.error("Error processing row %d: %s. Data: %s", row_num, str(e), row)
             errors.append({"line": row_num, "error": str(e), "data": row})
             continue
 
+    return deliveries, errors
+
+
+def write_batch(
+    deliveries_to_create: List[DeliveryDT],
+    repositories: Tuple[
+        DeliveryRepository, AngelRepository, PoloRepository, ClientRepository
+    ],
+    progress: ImportProgress,
+    mode: str = INSERT_MODE,
+    commit: bool = True,
+) -> Tuple[int, int, int, List[Dict]]:  # pragma: no cover
+    """Write a batch of validated deliveries, creating the missing dimensions.
+
+    Returns the number of written rows, how many of them updated an existing
+    delivery (upserts only), the number of skipped rows (duplicates, or
+    unchanged rows of an upsert) and the batch errors. With `commit=False`
+    the deliveries are left for the caller to commit.
+    """
+    successful_rows = 0
+    updated_rows = 0
+    duplicate_rows = 0
+    errors: List[Dict] = []
+
+    delivery_repo, angel_repo, polo_repo, client_repo = repositories
+
+    # Collect unique entities to create
+    angels_to_create = {delivery.angel for delivery in deliveries_to_create}
+    polos_to_create = {delivery.polo for delivery in deliveries_to_create}
+    clients_to_create = {delivery.cliente_id for delivery in deliveries_to_create}
+
     # Skip batch processing if no valid deliveries
     if not deliveries_to_create:
         logger.info("No valid deliveries in batch to process")
-        return successful_rows, errors
+        return successful_rows, updated_rows, duplicate_rows, errors
 
     try:
-        # Batch create angels
-        existing_angels = angel_repo.get_by_names(list(angels_to_create))
-        new_angels = angels_to_create - {angel.name for angel in existing_angels}
-        created_angels = angel_repo.bulk_create(
-            [AngelDomain(name=name) for name in new_angels]
-        )
-        angels_map = {
-            angel.name: angel.id for angel in [*existing_angels, *created_angels]
-        }
-
-        # Batch create polos
-        existing_polos = polo_repo.get_by_attributes(list(polos_to_create))
-        new_polos = polos_to_create - {polo.name for polo in existing_polos}
-        created_polos = polo_repo.bulk_create(
-            [PoloDomain(name=name) for name in new_polos]
-        )
-        polos_map = {polo.name: polo.id for polo in [*existing_polos, *created_polos]}
-
-        # Batch create clients
-        existing_clients = client_repo.get_by_ids(list(clients_to_create))
-        new_clients = clients_to_create - {client.id for client in existing_clients}
-        created_clients = client_repo.bulk_create(
-            [ClientDomain(id=client_id) for client_id in new_clients]
-        )
-        clients_map = {
-            client.id: client.id for client in [*existing_clients, *created_clients]
-        }
+        # Resolve (and create, if missing) the related entities. Cache misses
+        # cost an INSERT ... ON CONFLICT DO NOTHING plus at most one lookup,
+        # so concurrent batches and imports never trip the unique constraints.
+        with progress.stage("dimensions"):
+            angels_map = dimension_cache.get_or_create(
+                "angel", angels_to_create, angel_repo.bulk_get_or_create
+            )
+            polos_map = dimension_cache.get_or_create(
+                "polo", polos_to_create, polo_repo.bulk_get_or_create
+            )
+            clients_map = dimension_cache.get_or_create(
+                "cliente", clients_to_create, client_repo.bulk_get_or_create
+            )
 
         # Update deliveries with related entity IDs
         for delivery in deliveries_to_create:
@@ -127,9 +368,23 @@ def process_batch(
             delivery.cliente_id = clients_map[delivery.cliente_id]
 
         # Batch create deliveries
-        delivery_repo.create_many(deliveries_to_create)
-        successful_rows = len(deliveries_to_create)
-        logger.info("Successfully processed batch with %d deliveries", successful_rows)
+        with progress.stage("insert"):
+            if mode == UPSERT_MODE:
+                inserted_rows, updated_rows = delivery_repo.upsert_many(
+                    deliveries_to_create, commit=commit
+                )
+                successful_rows = inserted_rows + updated_rows
+            else:
+                successful_rows = delivery_repo.create_many(
+                    deliveries_to_create, commit=commit
+                )
+        duplicate_rows = len(deliveries_to_create) - successful_rows
+        logger.info(
+            "Successfully processed batch with %d deliveries (%d updated, %d skipped)",
+            successful_rows,
+            updated_rows,
+            duplicate_rows,
+        )
 
     except Exception as e:
         logger.error("Batch processing error: %s", str(e))
@@ -141,79 +396,430 @@ def process_batch(
             }
         )
 
-    return successful_rows, errors
+    return successful_rows, updated_rows, duplicate_rows, errors
+
+
+def select_import_engine(session: Session) -> str:
+    if settings.IMPORT_ENGINE != "auto":
+        return settings.IMPORT_ENGINE
+
+    dialect = session.get_bind().dialect.name
+    return "staging" if dialect == "postgresql" else "orm"
+
 
+def process_csv(
+    file_path: str,
+    byte_range: ByteRange | None = None,
+    on_progress: Callable[[dict], None] | None = None,
+    import_job_id: int | None = None,
+    file_format: str = CSV_FORMAT,
+    session_factory: Callable[[], ContextManager[Session]] = get_celery_session,
+    mode: str = INSERT_MODE,
+) -> dict:  # pragma: no cover
+    # The session factory is injectable so benchmarks can target any database.
+    with session_factory() as session:
+        if file_format in COLUMNAR_FORMATS:
+            return process_columnar(
+                file_path, session, file_format, on_progress, import_job_id, mode
+            )
+
+        if select_import_engine(session) == "staging":
+            return process_csv_staging(
+                file_path, session, byte_range, on_progress, import_job_id, mode
+            )
+
+        return process_csv_orm(
+            file_path, session, byte_range, on_progress, import_job_id, mode
+        )
 
-def process_csv(file_content: str) -> dict:  # pragma: no cover
+
+def process_csv_orm(
+    file_path: str,
+    session: Session,
+    byte_range: ByteRange | None = None,
+    on_progress: Callable[[dict], None] | None = None,
+    import_job_id: int | None = None,
+    mode: str = INSERT_MODE,
+) -> dict:  # pragma: no cover
     total_rows = 0
     successful_rows = 0
-    errors = []
-    current_batch = []
-    current_batch_row_nums = []
+    updated_rows = 0
+    duplicate_rows = 0
+    # Rows committed by a previous attempt of this import, from its checkpoint.
+    rows_done = 0
+    errors = ErrorLog(
+        import_job_service(session) if import_job_id is not None else None,
+        import_job_id,
+    )
+    progress = ImportProgress(total_bytes=0, on_progress=on_progress)
 
     logger.info("Starting CSV import process")
 
-    with get_celery_session() as session:
-        repositories = (
-            DeliveryRepository(session=session),
-            AngelRepository(session=session),
-            PoloRepository(session=session),
-            ClientRepository(session=session),
+    repositories = (
+        DeliveryRepository(session=session),
+        AngelRepository(session=session),
+        PoloRepository(session=session),
+        ClientRepository(session=session),
+    )
+
+    try:
+        layout = read_layout(file_path)
+        byte_range = byte_range or data_range(file_path, layout)
+        progress.total_bytes = byte_range.end - byte_range.start
+
+        checkpoint = None
+        if import_job_id is not None:
+            checkpoint = import_job_service(session).get_checkpoint(
+                import_job_id, byte_range.start
+            )
+        if checkpoint is not None:
+            rows_done = total_rows = checkpoint.rows_done
+            successful_rows = checkpoint.successful_rows
+            updated_rows = checkpoint.updated_rows
+            duplicate_rows = checkpoint.duplicate_rows
+            logger.info("Resuming CSV import after %d rows", rows_done)
+
+        # Rows are read lazily, so only the queued batches are held in memory.
+        with open_spooled_csv(file_path, byte_range) as decoded_stream:
+            csv_input = csv.DictReader(
+                decoded_stream,
+                fieldnames=layout.fieldnames,
+                delimiter=layout.delimiter,
+            )
+
+            def parse_batches() -> Iterator[ParsedBatch]:
+                date_parser = None
+                rows = enumerate(csv_input, start=byte_range.first_line)
+                # Rows committed by a previous attempt are read, not parsed.
+                skipped = sum(1 for _ in islice(rows, rows_done))
+                rows_read = skipped
+
+                while True:
+                    read_started = time.perf_counter()
+                    batch_rows = list(islice(rows, BATCH_SIZE))
+                    if not batch_rows:
+                        return
+                    rows_read += len(batch_rows)
+                    # The date formats are detected once, from the first batch.
+                    date_parser = date_parser or detect_date_parser(
+                        [row for _, row in batch_rows]
+                    )
+                    deliveries, batch_errors = validate_batch(batch_rows, date_parser)
+                    yield ParsedBatch(
+                        rows_read,
+                        bytes_consumed(decoded_stream),
+                        deliveries,
+                        batch_errors,
+                        time.perf_counter() - read_started,
+                    )
+
+            # Batches are parsed in a background thread while the previous
+            # ones are written, up to IMPORT_PIPELINE_DEPTH batches ahead.
+            for parsed in prefetch(parse_batches(), settings.IMPORT_PIPELINE_DEPTH):
+                progress.add_stage_time("parse", parsed.parse_seconds)
+                success_count, updated_count, duplicate_count, batch_errors = (
+                    write_batch(
+                        parsed.deliveries, repositories, progress, mode, commit=False
+                    )
+                )
+                total_rows = parsed.rows_read
+                successful_rows += success_count
+                updated_rows += updated_count
+                duplicate_rows += duplicate_count
+
+                # The batch is committed with its checkpoint and its errors, so
+                # a retry neither skips nor repeats any of them.
+                if import_job_id is not None:
+                    import_job_service(session).save_checkpoint(
+                        import_job_id,
+                        byte_range.start,
+                        total_rows,
+                        successful_rows,
+                        duplicate_rows,
+                        updated_rows,
+                        commit=False,
+                    )
+                errors.extend(parsed.errors + batch_errors)
+                session.commit()
+
+                progress.rows_read = total_rows
+                progress.rows_committed = successful_rows
+                progress.errors = len(errors)
+                progress.bytes_read = parsed.bytes_read
+                progress.publish()
+
+    except Exception as e:
+        logger.error("File processing error: %s", str(e))
+        errors.add(
+            {
+                "line": "file",
+                "error": f"File processing error: {str(e)}",
+                "data": None,
+            }
         )
 
-        try:
-            with StringIO(file_content) as decoded_stream:
-                sample = decoded_stream.read(1024)
-                decoded_stream.seek(0)
-                dialect = csv.Sniffer().sniff(sample)
-                decoded_stream.seek(0)
-                csv_input = csv.DictReader(decoded_stream, delimiter=dialect.delimiter)
-
-                for row_num, row in enumerate(csv_input, start=2):
-                    total_rows += 1
-                    current_batch.append(row)
-                    current_batch_row_nums.append(row_num)
-
-                    if len(current_batch) >= BATCH_SIZE:
-                        batch_rows = list(zip(current_batch_row_nums, current_batch))
-                        success_count, batch_errors = process_batch(
-                            batch_rows, repositories, session
-                        )
-                        successful_rows += success_count
-                        errors.extend(batch_errors)
-                        current_batch = []
-                        current_batch_row_nums = []
-
-                # Process remaining rows
-                if current_batch:
-                    batch_rows = list(zip(current_batch_row_nums, current_batch))
-                    success_count, batch_errors = process_batch(
-                        batch_rows, repositories, session
+    logger.info(
+        "CSV import completed. Total rows: %d, Successful: %d, Duplicates: %d, Failed: %d",
+        total_rows,
+        successful_rows,
+        duplicate_rows,
+        total_rows - successful_rows - duplicate_rows,
+    )
+
+    return {
+        "status": "completed",
+        "total_rows": total_rows,
+        "successful_rows": successful_rows,
+        "duplicate_rows": duplicate_rows,
+        "failed_rows": total_rows - successful_rows - duplicate_rows,
+        **mode_counts(mode, successful_rows, updated_rows, duplicate_rows),
+        "error_count": errors.count,
+        "errors": errors.samples,
+    }
+
+
+def _json_safe_error(error: Dict) -> Dict:
+    """Stringify the typed values (timestamps, decimals) of an error's row."""
+    if not error["data"]:
+        return error
+
+    data = {
+        key: value
+        if value is None or isinstance(value, (str, int, float, bool))
+        else str(value)
+        for key, value in error["data"].items()
+    }
+    return {**error, "data": data}
+
+
+def _columnar_rows(batch: pa.RecordBatch) -> List[Dict]:
+    rows: List[Dict] = batch.to_pylist()
+    for row in rows:
+        # Null statuses get the default, as missing CSV columns do.
+        if row.get("status") is None:
+            row.pop("status", None)
+    return rows
+
+
+def process_columnar(
+    file_path: str,
+    session: Session,
+    file_format: str,
+    on_progress: Callable[[dict], None] | None = None,
+    import_job_id: int | None = None,
+    mode: str = INSERT_MODE,
+) -> dict:  # pragma: no cover
+    """Import a Parquet or Arrow IPC file, record batch by record batch.
+
+    Values arrive typed (integers, timestamps), so rows skip the string
+    parsing and date format detection of the CSV path. Errors report the
+    1-based row number instead of a CSV line.
+    """
+    total_rows = 0
+    successful_rows = 0
+    updated_rows = 0
+    duplicate_rows = 0
+    rows_done = 0
+    errors = ErrorLog(
+        import_job_service(session) if import_job_id is not None else None,
+        import_job_id,
+    )
+    progress = ImportProgress(
+        total_bytes=os.path.getsize(file_path), on_progress=on_progress
+    )
+
+    logger.info("Starting %s import process", file_format)
+
+    repositories = (
+        DeliveryRepository(session=session),
+        AngelRepository(session=session),
+        PoloRepository(session=session),
+        ClientRepository(session=session),
+    )
+
+    try:
+        checkpoint = None
+        if import_job_id is not None:
+            checkpoint = import_job_service(session).get_checkpoint(import_job_id, 0)
+        if checkpoint is not None:
+            rows_done = total_rows = checkpoint.rows_done
+            successful_rows = checkpoint.successful_rows
+            updated_rows = checkpoint.updated_rows
+            duplicate_rows = checkpoint.duplicate_rows
+            logger.info("Resuming %s import after %d rows", file_format, rows_done)
+
+        with open_record_batches(file_path, file_format, BATCH_SIZE) as (
+            expected_rows,
+            batches,
+        ):
+
+            def parse_batches() -> Iterator[ParsedBatch]:
+                rows_read = 0
+                for batch in batches:
+                    first_row = rows_read + 1
+                    rows_read += batch.num_rows
+                    if rows_read <= rows_done:
+                        continue
+
+                    read_started = time.perf_counter()
+                    rows = list(enumerate(_columnar_rows(batch), start=first_row))
+                    deliveries, batch_errors = validate_batch(rows, default_date_parser)
+                    parse_seconds = time.perf_counter() - read_started
+                    bytes_read = (
+                        progress.total_bytes * rows_read // expected_rows
+                        if expected_rows
+                        else 0
+                    )
+                    yield ParsedBatch(
+                        rows_read, bytes_read, deliveries, batch_errors, parse_seconds
                     )
-                    successful_rows += success_count
-                    errors.extend(batch_errors)
 
-        except Exception as e:
-            logger.error("File processing error: %s", str(e))
-            errors.append(
-                {
-                    "line": "file",
-                    "error": f"File processing error: {str(e)}",
-                    "data": None,
-                }
-            )
+            for parsed in prefetch(parse_batches(), settings.IMPORT_PIPELINE_DEPTH):
+                progress.add_stage_time("parse", parsed.parse_seconds)
+                success_count, updated_count, duplicate_count, batch_errors = (
+                    write_batch(
+                        parsed.deliveries, repositories, progress, mode, commit=False
+                    )
+                )
+                total_rows = parsed.rows_read
+                successful_rows += success_count
+                updated_rows += updated_count
+                duplicate_rows += duplicate_count
+
+                if import_job_id is not None:
+                    import_job_service(session).save_checkpoint(
+                        import_job_id,
+                        0,
+                        total_rows,
+                        successful_rows,
+                        duplicate_rows,
+                        updated_rows,
+                        commit=False,
+                    )
+                errors.extend(
+                    [_json_safe_error(error) for error in parsed.errors + batch_errors]
+                )
+                session.commit()
+
+                progress.rows_read = total_rows
+                progress.rows_committed = successful_rows
+                progress.errors = len(errors)
+                progress.bytes_read = parsed.bytes_read
+                progress.publish()
+
+    except Exception as e:
+        logger.error("File processing error: %s", str(e))
+        errors.add(
+            {
+                "line": "file",
+                "error": f"File processing error: {str(e)}",
+                "data": None,
+            }
+        )
 
     logger.info(
-        "CSV import completed. Total rows: %d, Successful: %d, Failed: %d",
+        "%s import completed. Total rows: %d, Successful: %d, Duplicates: %d, Failed: %d",
+        file_format,
         total_rows,
         successful_rows,
-        total_rows - successful_rows,
+        duplicate_rows,
+        total_rows - successful_rows - duplicate_rows,
     )
 
     return {
         "status": "completed",
         "total_rows": total_rows,
         "successful_rows": successful_rows,
-        "failed_rows": total_rows - successful_rows,
-        "errors": errors,
+        "duplicate_rows": duplicate_rows,
+        "failed_rows": total_rows - successful_rows - duplicate_rows,
+        **mode_counts(mode, successful_rows, updated_rows, duplicate_rows),
+        "error_count": errors.count,
+        "errors": errors.samples,
+    }
+
+
+def validate_csv(
+    file_path: str,
+    on_progress: Callable[[dict], None] | None = None,
+    file_format: str = CSV_FORMAT,
+) -> dict:
+    """Parse and validate a whole file like an import would, without a session.
+
+    Rows are only checked by `validate_batch`, so duplicates of rows already
+    in the database are not detected and count as successful rows.
+    """
+    total_rows = 0
+    valid_rows = 0
+    errors = ErrorLog()
+    date_parser = None
+    progress = ImportProgress(
+        total_bytes=os.path.getsize(file_path), on_progress=on_progress
+    )
+
+    logger.info("Starting %s validation (dry run)", file_format)
+
+    def validate(rows: List[Tuple[int, Dict]]) -> None:
+        nonlocal date_parser, valid_rows
+
+        with progress.stage("parse"):
+            date_parser = date_parser or detect_date_parser([row for _, row in rows])
+            deliveries, batch_errors = validate_batch(rows, date_parser)
+        valid_rows += len(deliveries)
+        errors.extend([_json_safe_error(error) for error in batch_errors])
+
+        progress.rows_read = total_rows
+        progress.errors = len(errors)
+
+    try:
+        if file_format in COLUMNAR_FORMATS:
+            with open_record_batches(file_path, file_format, BATCH_SIZE) as (
+                expected_rows,
+                batches,
+            ):
+                for batch in batches:
+                    first_row = total_rows + 1
+                    total_rows += batch.num_rows
+                    validate(list(enumerate(_columnar_rows(batch), start=first_row)))
+                    if expected_rows:
+                        progress.bytes_read = (
+                            progress.total_bytes * total_rows // expected_rows
+                        )
+                    progress.publish()
+        else:
+            layout = read_layout(file_path)
+            byte_range = data_range(file_path, layout)
+            with open_spooled_csv(file_path, byte_range) as decoded_stream:
+                csv_input = enumerate(
+                    csv.DictReader(
+                        decoded_stream,
+                        fieldnames=layout.fieldnames,
+                        delimiter=layout.delimiter,
+                    ),
+                    start=byte_range.first_line,
+                )
+                while batch_rows := list(islice(csv_input, BATCH_SIZE)):
+                    total_rows += len(batch_rows)
+                    validate(batch_rows)
+                    progress.bytes_read = bytes_consumed(decoded_stream)
+                    progress.publish()
+
+    except Exception as e:
+        logger.error("File processing error: %s", str(e))
+        errors.add(
+            {
+                "line": "file",
+                "error": f"File processing error: {str(e)}",
+                "data": None,
+            }
+        )
+
+    return {
+        "status": "completed",
+        "dry_run": True,
+        "total_rows": total_rows,
+        "successful_rows": valid_rows,
+        "duplicate_rows": 0,
+        "failed_rows": total_rows - valid_rows,
+        "error_count": errors.count,
+        "errors": errors.samples,
     }
@@ -0,0 +1,227 @@
+import csv
+import gzip
+import io
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import IO, BinaryIO, Callable, Generator, List, TextIO, cast
+
+import zstandard
+
+SNIFF_SAMPLE_SIZE = 1024
+SCAN_BLOCK_SIZE = 1024 * 1024
+
+GZIP = "gzip"
+ZSTD = "zstd"
+CONTENT_ENCODINGS = {"gzip": GZIP, "x-gzip": GZIP, "zstd": ZSTD}
+FILE_EXTENSIONS = {".gz": GZIP, ".zst": ZSTD}
+COMPRESSION_MAGIC = {
+    GZIP: b"\x1f\x8b",
+    ZSTD: b"\x28\xb5\x2f\xfd",
+}
+
+
+@dataclass
+class CsvLayout:
+    fieldnames: List[str]
+    delimiter: str
+    # Byte offset of the first data row, right after the header line.
+    data_offset: int
+
+
+@dataclass
+class ByteRange:
+    start: int
+    end: int
+    # CSV line number of the first row in the range (the header is line 1).
+    first_line: int = 2
+
+
+class _BoundedReader(io.RawIOBase):
+    """Raw reader that stops after `length` bytes of the wrapped file."""
+
+    def __init__(self, raw: io.RawIOBase, length: int | None) -> None:
+        self._raw = raw
+        self._remaining = length
+        self.consumed = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: memoryview) -> int:  # type: ignore[override]
+        size = len(buffer)
+        if self._remaining is not None:
+            size = min(size, self._remaining)
+        if size <= 0:
+            return 0
+
+        read = self._raw.readinto(memoryview(buffer)[:size]) or 0
+        self.consumed += read
+        if self._remaining is not None:
+            self._remaining -= read
+        return read
+
+
+class _DecompressingReader(io.RawIOBase):
+    """Raw reader over the decompressed data of a spooled file.
+
+    `consumed` counts the compressed bytes read, so progress is reported
+    against the size of the file on disk.
+    """
+
+    def __init__(self, compressed: _BoundedReader, compression: str) -> None:
+        self._compressed = compressed
+        self._reader: gzip.GzipFile | zstandard.ZstdDecompressionReader
+        if compression == GZIP:
+            self._reader = gzip.GzipFile(fileobj=compressed, mode="rb")
+        else:
+            # A raw reader is a binary file, if not nominally an IO[bytes].
+            self._reader = zstandard.ZstdDecompressor().stream_reader(
+                cast(IO[bytes], compressed), read_across_frames=True
+            )
+
+    @property
+    def consumed(self) -> int:
+        return self._compressed.consumed
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: memoryview) -> int:  # type: ignore[override]
+        return self._reader.readinto(buffer)
+
+    def close(self) -> None:
+        self._reader.close()
+        super().close()
+
+
+def detect_compression(file_path: str) -> str | None:
+    """Return the compression of a spooled file, from its magic bytes."""
+    with open(file_path, "rb") as raw:
+        head = raw.read(4)
+
+    for compression, magic in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+@contextmanager
+def _open_binary(
+    file_path: str, byte_range: ByteRange | None = None
+) -> Generator[BinaryIO, None, None]:
+    compression = detect_compression(file_path)
+    start = byte_range.start if byte_range else 0
+
+    with open(file_path, "rb", buffering=0) as raw:
+        if compression is None:
+            raw.seek(start)
+            length = byte_range.end - start if byte_range else None
+            reader: io.RawIOBase = _BoundedReader(raw, length)
+        else:
+            reader = _DecompressingReader(_BoundedReader(raw, None), compression)
+
+        buffered = io.BufferedReader(reader)
+        if compression is not None and start:
+            # Compressed data cannot be seeked into: read past the start instead.
+            buffered.read(start)
+        yield buffered
+
+
+def read_layout(file_path: str) -> CsvLayout:
+    with _open_binary(file_path) as binary:
+        header_line = binary.readline()
+        sample = (header_line + binary.read(SNIFF_SAMPLE_SIZE))[:SNIFF_SAMPLE_SIZE]
+
+    delimiter = csv.Sniffer().sniff(sample.decode("UTF-8", errors="ignore")).delimiter
+    fieldnames = next(csv.reader([header_line.decode("UTF-8")], delimiter=delimiter))
+    return CsvLayout(
+        fieldnames=fieldnames, delimiter=delimiter, data_offset=len(header_line)
+    )
+
+
+def data_range(file_path: str, layout: CsvLayout) -> ByteRange:
+    return ByteRange(start=layout.data_offset, end=os.path.getsize(file_path))
+
+
+@contextmanager
+def open_spooled_csv(
+    file_path: str, byte_range: ByteRange | None = None
+) -> Generator[TextIO, None, None]:
+    """Open the spooled file, or only `byte_range` of it, as a text stream.
+
+    gzip and zstd files are decompressed and decoded as they are read. Only
+    the start of `byte_range` applies to them, as an offset in the
+    decompressed data, and they are always read to the end.
+    """
+    with _open_binary(file_path, byte_range) as buffered:
+        # newline="" lets the csv module handle line endings inside quoted fields.
+        with io.TextIOWrapper(buffered, encoding="UTF-8", newline="") as stream:
+            yield stream
+
+
+def bytes_consumed(stream: TextIO) -> int:
+    """Bytes of the spooled file read so far through `open_spooled_csv`."""
+    # The stream wraps the buffered reader of `_open_binary`.
+    buffered = cast(io.BufferedReader, stream.buffer)
+    return cast(_BoundedReader | _DecompressingReader, buffered.raw).consumed
+
+
+def plan_byte_ranges(
+    file_path: str,
+    chunk_size: int,
+    on_block: Callable[[bytes], None] | None = None,
+) -> List[ByteRange]:
+    """Split the data rows of a spooled CSV into row-aligned byte ranges.
+
+    Boundaries are moved forward to the next line break, so this assumes rows
+    do not contain quoted line breaks. The file is read once, front to back,
+    to find the boundaries and the line number each range starts on; every
+    block read is also passed to `on_block`, so a checksum of the file can be
+    computed in the same pass.
+    """
+    layout = read_layout(file_path)
+    compressed = detect_compression(file_path) is not None
+    size = os.path.getsize(file_path)
+
+    ranges = []
+    start = layout.data_offset
+    first_line = 2
+    # Line breaks between `start` and the scanned position.
+    newlines = 0
+    target = start + chunk_size
+    block_start = 0
+    with open(file_path, "rb") as raw:
+        while block := raw.read(SCAN_BLOCK_SIZE):
+            if on_block is not None:
+                on_block(block)
+            if compressed or target >= size:
+                # Compressed files cannot be split, and past the last
+                # boundary the lines no longer need counting.
+                block_start += len(block)
+                continue
+
+            position = min(max(start - block_start, 0), len(block))
+            while target - block_start < len(block):
+                line_break = block.find(b"\n", max(target - block_start, position))
+                if line_break == -1:
+                    break
+                boundary = block_start + line_break + 1
+                if boundary >= size:
+                    target = size
+                    break
+                newlines += block.count(b"\n", position, line_break + 1)
+                ranges.append(ByteRange(start=start, end=boundary, first_line=first_line))
+                first_line += newlines
+                newlines = 0
+                start = boundary
+                target = boundary + chunk_size
+                position = line_break + 1
+            newlines += block.count(b"\n", position)
+            block_start += len(block)
+
+    if compressed:
+        # They are imported in one piece.
+        return [data_range(file_path, layout)]
+    ranges.append(ByteRange(start=start, end=size, first_line=first_line))
+    return ranges
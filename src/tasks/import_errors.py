@@ -0,0 +1,47 @@
+from typing import Dict, List
+
+from src.config import settings
+from src.services.import_job_service import ImportJobService
+
+
+class ErrorLog:
+    """Row errors of an import, kept out of the task result.
+
+    Only the error count and the first `sample_size` errors are held in
+    memory; with an import job, every error is also written to the
+    import_error table as it is reported.
+    """
+
+    def __init__(
+        self,
+        import_jobs: ImportJobService | None = None,
+        import_job_id: int | None = None,
+        sample_size: int | None = None,
+    ):
+        self.import_jobs = import_jobs
+        self.import_job_id = import_job_id
+        self.sample_size = (
+            settings.IMPORT_ERROR_SAMPLE_SIZE if sample_size is None else sample_size
+        )
+        self.count = 0
+        self.samples: List[Dict] = []
+
+    def add(self, error: Dict) -> None:
+        self.extend([error])
+
+    def extend(self, errors: List[Dict]) -> None:
+        if not errors:
+            return
+
+        self.count += len(errors)
+        self.samples.extend(errors[: max(self.sample_size - len(self.samples), 0)])
+        if self.import_jobs is not None and self.import_job_id is not None:
+            self.import_jobs.add_errors(self.import_job_id, errors)
+
+    def add_stored(self, count: int, samples: List[Dict]) -> None:
+        """Account for `count` errors the caller already wrote to the table."""
+        self.count += count
+        self.samples.extend(samples[: max(self.sample_size - len(self.samples), 0)])
+
+    def __len__(self) -> int:
+        return self.count
@@ -0,0 +1,21 @@
+INSERT_MODE = "insert"
+UPSERT_MODE = "upsert"
+IMPORT_MODES = (INSERT_MODE, UPSERT_MODE)
+
+
+def mode_counts(
+    mode: str, successful_rows: int, updated_rows: int, duplicate_rows: int
+) -> dict:
+    """The inserted/updated/unchanged breakdown of an upsert's result.
+
+    Upserts count the updated rows as successful and the unchanged ones as
+    duplicates, so the totals of both modes read the same.
+    """
+    if mode != UPSERT_MODE:
+        return {}
+
+    return {
+        "inserted_rows": successful_rows - updated_rows,
+        "updated_rows": updated_rows,
+        "unchanged_rows": duplicate_rows,
+    }
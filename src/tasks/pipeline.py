@@ -0,0 +1,60 @@
+import queue
+import threading
+from typing import Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+# Marks the end of the produced items (with the producer's error, if any).
+_DONE = object()
+
+_PUT_TIMEOUT = 0.1
+
+
+def prefetch(items: Iterable[T], depth: int) -> Iterator[T]:
+    """Iterate `items` in a background thread, at most `depth` items ahead.
+
+    The bounded queue is the backpressure: the producer blocks while `depth`
+    items wait to be consumed, so memory stays bounded however slow the
+    consumer is. Errors raised by the producer are re-raised to the consumer.
+    With a `depth` of 0, items are produced inline instead.
+    """
+    if depth <= 0:
+        yield from items
+        return
+
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+
+    def put(item: tuple) -> bool:
+        # Give up once the consumer is gone, instead of blocking forever.
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not put((item, None)):
+                    return
+        except BaseException as e:
+            put((_DONE, e))
+            return
+        put((_DONE, None))
+
+    producer = threading.Thread(target=produce, name="import-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stopped.set()
+        producer.join()
@@ -0,0 +1,126 @@
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Generator, List
+
+from celery.result import AsyncResult
+
+STAGES = ("parse", "dimensions", "insert")
+
+PROGRESS_STATE = "PROGRESS"
+
+
+@dataclass
+class ImportProgress:
+    """Running counters of an import, published after every batch."""
+
+    total_bytes: int
+    rows_read: int = 0
+    rows_committed: int = 0
+    errors: int = 0
+    bytes_read: int = 0
+    stage_seconds: Dict[str, float] = field(
+        default_factory=lambda: {stage: 0.0 for stage in STAGES}
+    )
+    started_at: float = field(default_factory=time.monotonic)
+    on_progress: Callable[[dict], None] | None = None
+
+    @contextmanager
+    def stage(self, name: str) -> Generator[None, None, None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage_time(name, time.perf_counter() - started)
+
+    def add_stage_time(self, name: str, seconds: float) -> None:
+        self.stage_seconds[name] += seconds
+
+    def snapshot(self) -> dict:
+        elapsed = time.monotonic() - self.started_at
+        rows_per_second = self.rows_read / elapsed if elapsed else 0.0
+
+        eta_seconds = None
+        if self.bytes_read and self.total_bytes:
+            bytes_per_second = self.bytes_read / elapsed if elapsed else 0.0
+            remaining = max(self.total_bytes - self.bytes_read, 0)
+            if bytes_per_second:
+                eta_seconds = round(remaining / bytes_per_second, 1)
+
+        return {
+            "rows_read": self.rows_read,
+            "rows_committed": self.rows_committed,
+            "errors": self.errors,
+            "bytes_read": self.bytes_read,
+            "total_bytes": self.total_bytes,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(rows_per_second, 1),
+            "eta_seconds": eta_seconds,
+            "stage_seconds": {
+                stage: round(seconds, 3) for stage, seconds in self.stage_seconds.items()
+            },
+        }
+
+    def publish(self) -> None:
+        if self.on_progress is not None:
+            self.on_progress(self.snapshot())
+
+
+def _result_progress(result: dict, size: int) -> dict:
+    return {
+        "rows_read": result.get("total_rows", 0),
+        "rows_committed": result.get("successful_rows", 0),
+        "errors": result.get("error_count", 0),
+        "bytes_read": size,
+        "total_bytes": size,
+    }
+
+
+def merge_progress(snapshots: List[dict]) -> dict:
+    """Combine the progress of the chunks of a fanned-out import."""
+    merged: dict = {
+        "rows_read": 0,
+        "rows_committed": 0,
+        "errors": 0,
+        "bytes_read": 0,
+        "total_bytes": 0,
+        "rows_per_second": 0.0,
+        "eta_seconds": None,
+        "stage_seconds": {stage: 0.0 for stage in STAGES},
+    }
+
+    for snapshot in snapshots:
+        for key in ("rows_read", "rows_committed", "errors", "bytes_read"):
+            merged[key] += snapshot.get(key, 0)
+        merged["total_bytes"] += snapshot.get("total_bytes", 0)
+        # Chunks run in parallel: throughputs add up, the slowest one finishes last.
+        merged["rows_per_second"] += snapshot.get("rows_per_second", 0.0)
+        if snapshot.get("eta_seconds") is not None:
+            merged["eta_seconds"] = max(merged["eta_seconds"] or 0, snapshot["eta_seconds"])
+        for stage, seconds in snapshot.get("stage_seconds", {}).items():
+            merged["stage_seconds"][stage] += seconds
+
+    return merged
+
+
+def collect_progress(meta: dict) -> dict:  # pragma: no cover
+    """Return the progress of a task, aggregating its chunks if it fanned out."""
+    chunk_task_ids = meta.get("chunk_task_ids")
+    if not chunk_task_ids:
+        return meta
+
+    snapshots = []
+    chunks_completed = 0
+    for task_id, size in zip(chunk_task_ids, meta["chunk_sizes"]):
+        chunk = AsyncResult(task_id)
+        if chunk.state == PROGRESS_STATE:
+            snapshots.append(chunk.info)
+        elif chunk.successful():
+            snapshots.append(_result_progress(chunk.result, size))
+            chunks_completed += 1
+
+    progress = merge_progress(snapshots)
+    progress["total_bytes"] = sum(meta["chunk_sizes"])
+    progress["chunks"] = len(chunk_task_ids)
+    progress["chunks_completed"] = chunks_completed
+    return progress
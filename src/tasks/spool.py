@@ -0,0 +1,58 @@
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from typing import IO
+
+from src.config import settings
+
+
+@dataclass
+class SpooledFile:
+    path: str
+    checksum: str
+    size: int
+
+
+def spool_upload(stream: IO[bytes], spool_dir: str | None = None) -> SpooledFile:
+    """Stream an upload to the spool directory in fixed-size chunks.
+
+    The checksum is computed while writing, so the upload is never held in
+    memory as a whole and is read only once.
+    """
+    spool_dir = spool_dir or settings.IMPORT_SPOOL_DIR
+    os.makedirs(spool_dir, exist_ok=True)
+
+    path = os.path.join(spool_dir, f"{uuid.uuid4().hex}.csv")
+    partial_path = f"{path}.part"
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(partial_path, "wb") as spool_file:
+            while chunk := stream.read(settings.IMPORT_SPOOL_CHUNK_SIZE):
+                spool_file.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        # Only expose complete files to the workers.
+        os.replace(partial_path, path)
+    except BaseException:
+        remove_spooled_file(partial_path)
+        raise
+
+    return SpooledFile(path=path, checksum=digest.hexdigest(), size=size)
+
+
+def file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as spooled:
+        while chunk := spooled.read(settings.IMPORT_SPOOL_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def remove_spooled_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
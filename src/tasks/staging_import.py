@@ -0,0 +1,482 @@
+import csv
+from itertools import chain, islice
+from typing import Any, Callable, Dict, Iterator, List, cast
+
+import psycopg
+from celery.utils.log import get_task_logger
+from psycopg import sql
+from sqlalchemy import CursorResult, text
+from sqlalchemy.orm import Session
+
+from src.domain import DateParser
+from src.domain.date_parser import DEFAULT_SAMPLE_SIZE
+from src.repositories import ImportJobRepository
+from src.services.import_job_service import ImportJobService
+from src.tasks.csv_source import (
+    ByteRange,
+    bytes_consumed,
+    data_range,
+    open_spooled_csv,
+    read_layout,
+)
+from src.tasks.import_errors import ErrorLog
+from src.tasks.import_mode import INSERT_MODE, UPSERT_MODE, mode_counts
+from src.tasks.progress import ImportProgress
+
+logger = get_task_logger(__name__)
+
+STAGING_TABLE = "import_staging"
+TYPED_STAGING_TABLE = "import_staging_typed"
+
+# Progress is published every PROGRESS_ROWS copied rows, like the ORM engine
+# does after every batch.
+PROGRESS_ROWS = 10_000
+
+# Columns the staging engine understands; any other header column is loaded
+# too (so the raw row can be reported back) but otherwise ignored.
+KNOWN_COLUMNS = (
+    "id_atendimento",
+    "id_cliente",
+    "angel",
+    "polo",
+    "data_limite",
+    "data_de_atendimento",
+    "status",
+)
+
+# Dates are parsed in Python while the rows are copied, with the formats
+# detected like the ORM engine does, so both engines read a file the same
+# way whatever the DateStyle of the database. The parsed values (NULL when
+# a value does not parse) are staged next to the raw ones.
+PARSED_DATE_COLUMNS = {
+    "data_limite": "data_limite_parsed",
+    "data_de_atendimento": "data_de_atendimento_parsed",
+}
+
+INTEGER_PATTERN = r"^\s*[-+]?\d+\s*$"
+
+# Mirrors the checks `validate_batch` does in Python, evaluated for every
+# staged row at once. A NULL result means the row is valid.
+ROW_ERROR_EXPRESSION = f"""
+    CASE
+        WHEN id_atendimento IS NOT NULL AND id_atendimento !~ '{INTEGER_PATTERN}'
+            THEN 'Invalid id_atendimento: ' || id_atendimento
+        WHEN id_cliente IS NOT NULL AND id_cliente !~ '{INTEGER_PATTERN}'
+            THEN 'Invalid id_cliente: ' || id_cliente
+        WHEN NULLIF(TRIM(angel), '') IS NULL
+            OR NULLIF(TRIM(polo), '') IS NULL
+            OR id_cliente IS NULL
+            OR data_de_atendimento_parsed IS NULL
+            THEN 'Missing required fields'
+        WHEN data_limite_parsed IS NULL
+            THEN 'Invalid data_limite: ' || COALESCE(data_limite, 'NULL')
+    END
+"""
+
+
+def _staging_columns(header: List[str]) -> List[str]:
+    columns = []
+    for position, name in enumerate(header):
+        name = name.strip()
+        if name in KNOWN_COLUMNS and name not in columns:
+            columns.append(name)
+        else:
+            columns.append(f"extra_{position}")
+    return columns
+
+
+def _create_staging_table(session: Session, columns: List[str]) -> None:
+    # Temporary tables skip the WAL like unlogged ones, are private to the
+    # connection (so parallel imports never collide) and are dropped on
+    # commit or rollback, even if the worker dies mid-import.
+    all_columns = list(KNOWN_COLUMNS) + [c for c in columns if c not in KNOWN_COLUMNS]
+    column_definitions = ", ".join(
+        [f'"{column}" text' for column in all_columns]
+        + [f'"{column}" timestamp' for column in PARSED_DATE_COLUMNS.values()]
+    )
+    session.execute(
+        text(
+            f"CREATE TEMPORARY TABLE {STAGING_TABLE} "
+            f"(line_no bigserial, {column_definitions}) ON COMMIT DROP"
+        )
+    )
+
+
+def _copy_rows(
+    session: Session,
+    rows: Iterator[List[str]],
+    columns: List[str],
+    on_rows: Callable[[int], None] | None = None,
+) -> int:
+    """COPY the raw CSV rows into the staging table, returning the row count.
+
+    Each row is copied along with its parsed dates. `on_rows` is called with
+    the number of rows copied so far every PROGRESS_ROWS rows.
+    """
+    # The staging engine only runs on psycopg connections.
+    driver_connection = cast(
+        psycopg.Connection[Any], session.connection().connection.driver_connection
+    )
+    statement = sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(STAGING_TABLE),
+        sql.SQL(", ").join(
+            sql.Identifier(column)
+            for column in chain(columns, PARSED_DATE_COLUMNS.values())
+        ),
+    )
+
+    width = len(columns)
+    date_positions = [
+        columns.index(column) if column in columns else None
+        for column in PARSED_DATE_COLUMNS
+    ]
+    # The date formats are detected once, from the first rows.
+    sample = list(islice(rows, DEFAULT_SAMPLE_SIZE))
+    date_parser = DateParser.detect(
+        row[position]
+        for row in sample
+        for position in date_positions
+        if position is not None and position < len(row)
+    )
+
+    total_rows = 0
+    with driver_connection.cursor() as cursor:
+        with cursor.copy(statement) as copy:
+            for row in chain(sample, rows):
+                # Ragged rows are padded/truncated instead of aborting the COPY.
+                values = (row + [None] * width)[:width]
+                dates = [
+                    None if position is None else date_parser.parse(values[position])
+                    for position in date_positions
+                ]
+                copy.write_row(values + dates)
+                total_rows += 1
+                if on_rows is not None and total_rows % PROGRESS_ROWS == 0:
+                    on_rows(total_rows)
+
+    return total_rows
+
+
+STAGED_ERRORS = (
+    f"(SELECT *, {ROW_ERROR_EXPRESSION} AS error FROM {STAGING_TABLE}) AS staged "
+    "WHERE error IS NOT NULL"
+)
+
+
+def _count_errors(session: Session) -> int:
+    return int(
+        session.execute(text(f"SELECT count(*) FROM {STAGED_ERRORS}")).scalar_one()
+    )
+
+
+def _store_errors(
+    session: Session,
+    columns: List[str],
+    header: List[str],
+    first_line: int,
+    import_job_id: int,
+) -> int:
+    """Copy the invalid staged rows to the import_error table in one statement."""
+    values = ", ".join(f'"{column}"' for column in columns)
+    result = session.execute(
+        text(
+            f"INSERT INTO import_error (import_job_id, line, error, data) "
+            f"SELECT :import_job_id, line_no + :first_line - 1, error, "
+            f"json_object(CAST(:header AS text[]), ARRAY[{values}]) FROM {STAGED_ERRORS}"
+        ),
+        {"import_job_id": import_job_id, "first_line": first_line, "header": header},
+    )
+    # DML statements return a CursorResult, which has the rowcount.
+    return cast(CursorResult[Any], result).rowcount
+
+
+def _collect_errors(
+    session: Session,
+    columns: List[str],
+    header: List[str],
+    first_line: int,
+    limit: int,
+) -> List[Dict]:
+    stmt = text(f"SELECT * FROM {STAGED_ERRORS} ORDER BY line_no LIMIT :limit")
+
+    errors = []
+    for row in session.execute(stmt, {"limit": limit}).mappings():
+        errors.append(
+            {
+                # line_no starts at 1 for the first row of the range.
+                "line": row["line_no"] + first_line - 1,
+                "error": row["error"],
+                "data": {
+                    name: row[column] for column, name in zip(columns, header)
+                },
+            }
+        )
+    return errors
+
+
+def _load_typed_rows(session: Session) -> None:
+    session.execute(
+        text(
+            f"""
+            CREATE TEMPORARY TABLE {TYPED_STAGING_TABLE} ON COMMIT DROP AS
+            SELECT
+                line_no,
+                TRIM(angel) AS angel,
+                TRIM(polo) AS polo,
+                NULLIF(TRIM(id_atendimento), '')::integer AS source_id,
+                id_cliente::integer AS id_cliente,
+                data_limite_parsed AS data_limite,
+                data_de_atendimento_parsed AS data_de_atendimento,
+                COALESCE(NULLIF(TRIM(status), ''), 'PENDING') AS status
+            FROM {STAGING_TABLE}
+            WHERE ({ROW_ERROR_EXPRESSION}) IS NULL
+            """
+        )
+    )
+
+
+def _insert_dimensions(session: Session) -> None:
+    # Dimensions are inserted in a stable order so concurrent chunks of the
+    # same import take their row locks in the same order and cannot deadlock.
+    session.execute(
+        text(
+            f"INSERT INTO angel (name) SELECT DISTINCT angel FROM {TYPED_STAGING_TABLE} "
+            "ORDER BY angel ON CONFLICT (name) DO NOTHING"
+        )
+    )
+    session.execute(
+        text(
+            f"INSERT INTO polo (name) SELECT DISTINCT polo FROM {TYPED_STAGING_TABLE} "
+            "ORDER BY polo ON CONFLICT (name) DO NOTHING"
+        )
+    )
+    session.execute(
+        text(
+            f"INSERT INTO cliente (id) SELECT DISTINCT id_cliente "
+            f"FROM {TYPED_STAGING_TABLE} ORDER BY id_cliente "
+            "ON CONFLICT (id) DO NOTHING"
+        )
+    )
+
+
+UPSERT_COLUMNS = (
+    "cliente_id",
+    "id_angel",
+    "id_polo",
+    "data_limite",
+    "data_de_atendimento",
+    "status",
+)
+
+
+def _insert_facts(session: Session) -> int:
+    # Rows whose id_atendimento was already imported, by this file or an
+    # earlier one, are skipped.
+    result = session.execute(
+        text(
+            f"""
+            INSERT INTO atendimento
+                (cliente_id, id_angel, id_polo, data_limite, data_de_atendimento,
+                 status, source_id)
+            SELECT s.id_cliente, a.id, p.id, s.data_limite, s.data_de_atendimento,
+                s.status, s.source_id
+            FROM {TYPED_STAGING_TABLE} s
+            JOIN angel a ON a.name = s.angel
+            JOIN polo p ON p.name = s.polo
+            ON CONFLICT (source_id) DO NOTHING
+            """
+        )
+    )
+    return cast(CursorResult[Any], result).rowcount
+
+
+def _upsert_facts(session: Session) -> tuple[int, int]:
+    """Insert the new facts and update the changed ones, by source id.
+
+    Returns the number of inserted and of updated rows; unchanged rows, and
+    soft-deleted deliveries, are left alone.
+    """
+    columns = ", ".join(UPSERT_COLUMNS)
+    stored = ", ".join(f"atendimento.{column}" for column in UPSERT_COLUMNS)
+    excluded = ", ".join(f"EXCLUDED.{column}" for column in UPSERT_COLUMNS)
+    # A statement cannot update the same row twice, so only the last row of
+    # each source id is kept; rows without one are all inserted.
+    distinct_key = "COALESCE(s.source_id, -s.line_no)"
+    row = session.execute(
+        text(
+            f"""
+            WITH upserted AS (
+                INSERT INTO atendimento ({columns}, source_id)
+                SELECT DISTINCT ON ({distinct_key})
+                    s.id_cliente, a.id, p.id, s.data_limite, s.data_de_atendimento,
+                    s.status, s.source_id
+                FROM {TYPED_STAGING_TABLE} s
+                JOIN angel a ON a.name = s.angel
+                JOIN polo p ON p.name = s.polo
+                ORDER BY {distinct_key}, s.line_no DESC
+                ON CONFLICT (source_id) DO UPDATE
+                SET ({columns}, updated_at) = ({excluded}, now())
+                WHERE atendimento.deleted_at IS NULL
+                    AND ({stored}) IS DISTINCT FROM ({excluded})
+                -- Inserted rows are the only ones without an updated_at.
+                RETURNING updated_at IS NULL AS inserted
+            )
+            SELECT count(*) FILTER (WHERE inserted) AS inserted,
+                count(*) FILTER (WHERE NOT inserted) AS updated
+            FROM upserted
+            """
+        )
+    ).one()
+    return row.inserted, row.updated
+
+
+def process_csv_staging(
+    file_path: str,
+    session: Session,
+    byte_range: ByteRange | None = None,
+    on_progress: Callable[[dict], None] | None = None,
+    import_job_id: int | None = None,
+    mode: str = INSERT_MODE,
+) -> dict:  # pragma: no cover
+    """Import a spooled CSV with COPY and set-based SQL (PostgreSQL only).
+
+    The raw rows are copied into a staging table, validated in SQL, and the
+    missing dimensions and the facts are written with `INSERT ... SELECT`
+    statements, all in a single transaction. The whole range is therefore
+    checkpointed at once: a retried import skips the ranges it committed.
+    """
+    total_rows = 0
+    successful_rows = 0
+    updated_rows = 0
+    duplicate_rows = 0
+    import_jobs = ImportJobService(ImportJobRepository(session=session))
+    errors = ErrorLog(import_jobs, import_job_id)
+    progress = ImportProgress(total_bytes=0, on_progress=on_progress)
+
+    logger.info("Starting CSV import process (staging engine)")
+
+    try:
+        layout = read_layout(file_path)
+        byte_range = byte_range or data_range(file_path, layout)
+        progress.total_bytes = byte_range.end - byte_range.start
+
+        checkpoint = None
+        if import_job_id is not None:
+            checkpoint = import_jobs.get_checkpoint(import_job_id, byte_range.start)
+        if checkpoint is not None:
+            logger.info("Range at byte %d was already imported", byte_range.start)
+            return _result(
+                checkpoint.rows_done,
+                checkpoint.successful_rows,
+                checkpoint.duplicate_rows,
+                errors,
+                mode,
+                checkpoint.updated_rows,
+            )
+
+        header = layout.fieldnames
+        columns = _staging_columns(header)
+
+        with progress.stage("parse"):
+            with open_spooled_csv(file_path, byte_range) as decoded_stream:
+                csv_input = csv.reader(decoded_stream, delimiter=layout.delimiter)
+
+                def copied(rows_read: int) -> None:
+                    progress.rows_read = rows_read
+                    progress.bytes_read = bytes_consumed(decoded_stream)
+                    progress.publish()
+
+                _create_staging_table(session, columns)
+                total_rows = _copy_rows(session, csv_input, columns, copied)
+                progress.bytes_read = bytes_consumed(decoded_stream)
+
+            # Row errors are committed along with the facts of the range.
+            if import_job_id is not None:
+                error_count = _store_errors(
+                    session, columns, header, byte_range.first_line, import_job_id
+                )
+            else:
+                error_count = _count_errors(session)
+            samples = _collect_errors(
+                session, columns, header, byte_range.first_line, errors.sample_size
+            )
+            errors.add_stored(error_count, samples)
+            _load_typed_rows(session)
+        progress.rows_read = total_rows
+        progress.errors = len(errors)
+        progress.publish()
+
+        with progress.stage("dimensions"):
+            _insert_dimensions(session)
+        progress.publish()
+
+        with progress.stage("insert"):
+            if mode == UPSERT_MODE:
+                inserted_rows, updated_rows = _upsert_facts(session)
+                successful_rows = inserted_rows + updated_rows
+            else:
+                successful_rows = _insert_facts(session)
+            duplicate_rows = total_rows - len(errors) - successful_rows
+            # The checkpoint is committed with the range it accounts for.
+            if import_job_id is not None:
+                import_jobs.save_checkpoint(
+                    import_job_id,
+                    byte_range.start,
+                    total_rows,
+                    successful_rows,
+                    duplicate_rows,
+                    updated_rows,
+                    commit=False,
+                )
+            session.commit()
+        progress.rows_committed = successful_rows
+        progress.publish()
+
+    except Exception as e:
+        session.rollback()
+        logger.error("File processing error: %s", str(e))
+        successful_rows = 0
+        updated_rows = 0
+        duplicate_rows = 0
+        # The row errors were rolled back with the rest of the range.
+        errors = ErrorLog(import_jobs, import_job_id)
+        errors.add(
+            {
+                "line": "file",
+                "error": f"File processing error: {str(e)}",
+                "data": None,
+            }
+        )
+
+    return _result(
+        total_rows, successful_rows, duplicate_rows, errors, mode, updated_rows
+    )
+
+
+def _result(
+    total_rows: int,
+    successful_rows: int,
+    duplicate_rows: int,
+    errors: ErrorLog,
+    mode: str = INSERT_MODE,
+    updated_rows: int = 0,
+) -> dict:
+    failed_rows = total_rows - successful_rows - duplicate_rows
+    logger.info(
+        "CSV import completed. Total rows: %d, Successful: %d, Duplicates: %d, Failed: %d",
+        total_rows,
+        successful_rows,
+        duplicate_rows,
+        failed_rows,
+    )
+
+    return {
+        "status": "completed",
+        "total_rows": total_rows,
+        "successful_rows": successful_rows,
+        "duplicate_rows": duplicate_rows,
+        "failed_rows": failed_rows,
+        **mode_counts(mode, successful_rows, updated_rows, duplicate_rows),
+        "error_count": errors.count,
+        "errors": errors.samples,
+    }
@@ -0,0 +1,64 @@
+import datetime
+import threading
+import time
+
+from celery import shared_task
+from celery.utils.log import get_task_logger
+
+from src.config import settings
+from src.database import get_celery_session
+from src.repositories import DeliveryRepository
+from src.services.atendimento_service import DeliveryService
+
+logger = get_task_logger(__name__)
+
+# Monotonic time until which this process has a refresh scheduled.
+_refresh_scheduled_until = 0.0
+_refresh_lock = threading.Lock()
+
+
+@shared_task(ignore_result=True)
+def refresh_productivity_views_task(
+    requested_at: str | None = None,
+) -> None:  # pragma: no cover
+    with get_celery_session() as session:
+        service = DeliveryService(DeliveryRepository(session=session))
+        refreshed_at = service.refresh_productivity_views(
+            datetime.datetime.fromisoformat(requested_at) if requested_at else None
+        )
+
+    if refreshed_at is not None:
+        logger.info("Refreshed the productivity views as of %s", refreshed_at)
+
+
+def schedule_productivity_refresh() -> bool:
+    """Refresh the productivity views `VIEW_REFRESH_DELAY` seconds from now.
+
+    Called after API writes. The writes of that delay share the refresh:
+    a process schedules at most one per delay, and a refresh finding the
+    views refreshed after it was requested is skipped. Returns whether a
+    refresh was scheduled; the write already committed, so a broker error
+    is only logged, and the next write tries again.
+    """
+    global _refresh_scheduled_until
+
+    if not DeliveryService().has_materialized_views():
+        return False
+
+    now = time.monotonic()
+    with _refresh_lock:
+        if now < _refresh_scheduled_until:
+            return False
+        _refresh_scheduled_until = now + settings.VIEW_REFRESH_DELAY
+
+    requested_at = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+    try:
+        refresh_productivity_views_task.apply_async(
+            args=(requested_at.isoformat(),), countdown=settings.VIEW_REFRESH_DELAY
+        )
+    except Exception as e:
+        logger.error("Could not schedule the productivity views refresh: %s", str(e))
+        with _refresh_lock:
+            _refresh_scheduled_until = 0.0
+        return False
+    return True
@@ -1,8 +1,13 @@
 # mypy: ignore-errors
 
+import gzip
+import hashlib
 import http
 from datetime import datetime
+from io import BytesIO
+from types import SimpleNamespace
 
+import pytest
 
 from src.models import Delivery
 from src.repositories import DeliveryRepository
@@ -19,12 +24,16 @@ class TestDeliveryRoutes:
     def test_query_all_atendimentos_with_pagination(
         self, client, atendimentos_fixture: list[Delivery]
     ):
-        response = client.get("/api/v1/atendimento?page=1&per_page=1")
+        response = client.get("/api/v1/atendimento?per_page=1")
         json_response = response.json
 
         assert response.status_code == http.HTTPStatus.OK
         assert len(json_response.get("data")) == 1
 
+        following = client.get(json_response.get("next")).json
+        assert len(following.get("data")) == 1
+        assert following.get("data") != json_response.get("data")
+
     def test_query_all_atendimentos_with_invalid_order_by(
         self, client, atendimentos_fixture: list[Delivery]
     ):
@@ -102,3 +111,749 @@ class TestDeliveryRoutes:
 
         assert response.status_code == http.HTTPStatus.BAD_REQUEST
         assert "Missing required fields" in json_response.get("error")
+
+
+class TestListPagination:
+    @pytest.fixture
+    def deliveries(self, make_deliveries):
+        # Pairs of deliveries share a data_limite, so id breaks the ties.
+        return make_deliveries(
+            [{"data_limite": datetime(2024, 6, 1 + day // 2)} for day in range(5)]
+        )
+
+    def walk(self, client, url, link):
+        ids = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == http.HTTPStatus.OK
+            ids.append([item["id"] for item in response.json["data"]])
+            url = response.json[link]
+        return ids
+
+    def test_next_links_walk_every_row_once(self, client, deliveries):
+        ids = self.walk(
+            client, "/api/v1/atendimento?per_page=2&order_by=-data_limite", "next"
+        )
+
+        expected = sorted(
+            deliveries, key=lambda delivery: (delivery.data_limite, delivery.id)
+        )
+        expected_ids = [delivery.id for delivery in reversed(expected)]
+        assert ids == [expected_ids[0:2], expected_ids[2:4], expected_ids[4:]]
+
+    def test_prev_links_walk_back(self, client, deliveries):
+        url = "/api/v1/atendimento?per_page=2"
+        first_page = client.get(url).json
+        assert first_page["prev"] is None
+        last_url = client.get(first_page["next"]).json["next"]
+
+        ids = self.walk(client, client.get(last_url).json["prev"], "prev")
+
+        all_ids = [delivery.id for delivery in deliveries]
+        assert ids == [all_ids[2:4], all_ids[0:2]]
+
+    def test_per_page_is_capped(self, client, deliveries, monkeypatch):
+        from src.config import settings
+
+        monkeypatch.setattr(settings, "MAX_PAGE_SIZE", 3)
+
+        response = client.get("/api/v1/atendimento?per_page=1000")
+
+        assert len(response.json["data"]) == 3
+
+    def test_cursor_of_another_order_is_rejected(self, client, deliveries):
+        next_url = client.get("/api/v1/atendimento?per_page=2").json["next"]
+
+        response = client.get(next_url.replace("order_by=id", "order_by=polo"))
+
+        assert response.status_code == http.HTTPStatus.BAD_REQUEST
+
+    def test_malformed_cursor_is_rejected(self, client):
+        response = client.get("/api/v1/atendimento?cursor=not-a-cursor")
+
+        assert response.status_code == http.HTTPStatus.BAD_REQUEST
+
+    @pytest.mark.parametrize(
+        "order_by, sort_key",
+        [
+            ("data_limite", "2024-06-01"),
+            ("-updated_at", 5),
+            ("polo", {"datetime": "2024-06-01T00:00:00"}),
+            ("id", True),
+            ("cliente_id", [1]),
+        ],
+    )
+    def test_forged_cursor_is_rejected(self, client, deliveries, order_by, sort_key):
+        from src.services.pagination import Cursor, encode_cursor
+
+        cursor = encode_cursor(Cursor(order_by, (sort_key, 1)))
+
+        response = client.get(
+            f"/api/v1/atendimento?order_by={order_by}&cursor={cursor}"
+        )
+
+        assert response.status_code == http.HTTPStatus.BAD_REQUEST
+
+    def test_page_is_rejected(self, client):
+        response = client.get("/api/v1/atendimento?page=2")
+
+        assert response.status_code == http.HTTPStatus.BAD_REQUEST
+        assert "cursor" in response.json["error"]
+
+    def test_a_page_is_a_single_statement(
+        self, client, deliveries, capture_statements
+    ):
+        with capture_statements() as statements:
+            response = client.get("/api/v1/atendimento?per_page=5")
+
+        assert len(response.json["data"]) == 5
+        assert response.json["data"][0]["angel"] == "John Doe"
+        assert response.json["data"][0]["status"] == "PENDING"
+        # The validator of the conditional GET, then the page itself.
+        assert len(statements) == 2
+
+
+class TestListFields:
+    @pytest.fixture
+    def deliveries(self, make_deliveries):
+        return make_deliveries(
+            [{"data_limite": datetime(2024, 6, 1 + day)} for day in range(3)]
+        )
+
+    def test_only_the_requested_fields_are_selected(
+        self, client, deliveries, capture_statements
+    ):
+        with capture_statements() as statements:
+            response = client.get("/api/v1/atendimento?fields=status,id")
+
+        assert response.json["data"][0] == {"id": deliveries[0].id, "status": "PENDING"}
+        assert "JOIN" not in statements[-1]
+
+    def test_sorting_by_a_dimension_that_is_not_selected(
+        self, client, deliveries, capture_statements
+    ):
+        with capture_statements() as statements:
+            response = client.get(
+                "/api/v1/atendimento?fields=id&order_by=angel&per_page=2"
+            )
+
+        assert [item["id"] for item in response.json["data"]] == [
+            deliveries[0].id,
+            deliveries[1].id,
+        ]
+        assert "JOIN angel" in statements[-1]
+        assert "JOIN polo" not in statements[-1]
+        assert "fields=id" in response.json["next"]
+        next_page = client.get(response.json["next"]).json["data"]
+        assert next_page == [{"id": deliveries[2].id}]
+
+    def test_unknown_field_is_rejected(self, client):
+        response = client.get("/api/v1/atendimento?fields=id,password")
+
+        assert response.status_code == http.HTTPStatus.BAD_REQUEST
+
+    def test_export_selects_the_fields(self, client, deliveries):
+        response = client.get("/api/v1/atendimento/export?fields=id,data_limite")
+
+        lines = response.get_data(as_text=True).splitlines()
+        assert lines[0] == "id,data_limite"
+        assert len(lines) == 4
+
+
+class TestListFilters:
+    @pytest.fixture
+    def deliveries(self, make_deliveries, polo_fixture):
+        from src.models import Polo
+        from src.services.dimension_cache import dimension_cache
+
+        # Ids cached by earlier tests belong to their (dropped) database.
+        dimension_cache.clear()
+        other_polo = Polo(name="RJ - RIO DE JANEIRO")
+        return make_deliveries(
+            [
+                {
+                    "polo": polo,
+                    "data_limite": datetime(2024, 6, day),
+                    "data_de_atendimento": datetime(2024, 6, 10),
+                    "status": status,
+                }
+                for polo, day, status in (
+                    (polo_fixture, 5, "DONE"),
+                    (polo_fixture, 15, "PENDING"),
+                    (other_polo, 20, "DONE"),
+                )
+            ]
+        )
+
+    def ids(self, client, query):
+        response = client.get(f"/api/v1/atendimento?{query}")
+        assert response.status_code == http.HTTPStatus.OK
+        return [item["id"] for item in response.json["data"]]
+
+    def test_filters(self, client, deliveries):
+        first, second, third = (delivery.id for delivery in deliveries)
+
+        assert self.ids(client, "polo=RJ - RIO DE JANEIRO") == [third]
+        assert self.ids(client, "angel=John Doe&status=DONE") == [first, third]
+        assert self.ids(client, "cliente_id=123456&late=true") == [first]
+        assert self.ids(client, "late=false") == [second, third]
+        assert self.ids(
+            client, "data_limite_from=2024-06-15&data_limite_to=2024-06-20"
+        ) == [second, third]
+        assert self.ids(client, "data_de_atendimento_to=2024-06-09") == []
+
+    def test_unknown_angel_matches_nothing(self, client, deliveries):
+        assert self.ids(client, "angel=Nobody") == []
+
+    def test_next_link_keeps_the_filters(self, client, deliveries):
+        response = client.get("/api/v1/atendimento?status=DONE&per_page=1")
+
+        assert "status=DONE" in response.json["next"]
+        assert self.ids(client, response.json["next"].split("?", 1)[1]) == [
+            deliveries[2].id
+        ]
+
+    def test_invalid_filter_is_rejected(self, client):
+        response = client.get("/api/v1/atendimento?data_limite_from=someday")
+
+        assert response.status_code == http.HTTPStatus.BAD_REQUEST
+
+
+class TestListTotals:
+    @pytest.fixture
+    def deliveries(self, make_deliveries):
+        from src.services.atendimento_service import total_cache
+
+        total_cache.clear()
+        return make_deliveries(
+            [{"status": status} for status in ["PENDING", "PENDING", "DONE"]]
+        )
+
+    def test_no_total_by_default(self, client, deliveries):
+        assert "total" not in client.get("/api/v1/atendimento").json
+
+    def test_exact_total_of_the_filters(self, client, deliveries):
+        response = client.get(
+            "/api/v1/atendimento?per_page=1&status=PENDING&include_total=exact"
+        )
+
+        assert response.json["total"] == 2
+        assert "include_total=exact" in response.json["next"]
+
+    def test_exact_total_is_cached_until_a_write(
+        self, client, deliveries, make_deliveries, monkeypatch
+    ):
+        url = "/api/v1/atendimento?include_total=exact"
+        assert client.get(url).json["total"] == 3
+
+        counted = []
+        count = DeliveryRepository.count
+        monkeypatch.setattr(
+            DeliveryRepository,
+            "count",
+            lambda self, filters=None: counted.append(filters) or count(self, filters),
+        )
+        assert client.get(url).json["total"] == 3
+        assert counted == []
+
+        make_deliveries([{"status": "DONE"}])
+        assert client.get(url).json["total"] == 4
+        assert len(counted) == 1
+
+    def test_estimated_total(self, client, deliveries, monkeypatch):
+        monkeypatch.setattr(
+            DeliveryRepository, "estimate_count", lambda self, filters=None: 40
+        )
+
+        response = client.get("/api/v1/atendimento?include_total=estimate")
+
+        assert response.json["total"] == 40
+
+    def test_estimate_without_statistics_is_exact(self, client, deliveries):
+        # SQLite has no planner statistics to estimate from.
+        response = client.get("/api/v1/atendimento?include_total=estimate")
+
+        assert response.json["total"] == 3
+
+    def test_unknown_total_mode_is_rejected(self, client):
+        response = client.get("/api/v1/atendimento?include_total=yes")
+
+        assert response.status_code == http.HTTPStatus.BAD_REQUEST
+
+
+class TestConditionalGet:
+    @pytest.fixture
+    def deliveries(self, make_deliveries):
+        return make_deliveries(2)
+
+    @pytest.mark.parametrize(
+        "url",
+        [
+            "/api/v1/atendimento/angel_productivity",
+            "/api/v1/atendimento/polo_productivity",
+        ],
+    )
+    def test_unchanged_productivity_is_not_recomputed(
+        self, client, deliveries, monkeypatch, url
+    ):
+        first = client.get(url)
+        assert first.status_code == http.HTTPStatus.OK
+        assert first.headers["ETag"]
+
+        def fail(*args, **kwargs):
+            raise AssertionError("the aggregate ran")
+
+        monkeypatch.setattr(DeliveryRepository, "get_angel_productivity_view", fail)
+        monkeypatch.setattr(DeliveryRepository, "get_polo_productivity_view", fail)
+        response = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+
+        assert response.status_code == http.HTTPStatus.NOT_MODIFIED
+        assert response.data == b""
+        assert response.headers["ETag"] == first.headers["ETag"]
+
+    def test_a_write_changes_the_etag(self, client, deliveries):
+        url = "/api/v1/atendimento/angel_productivity"
+        etag = client.get(url).headers["ETag"]
+
+        client.put(
+            f"/api/v1/atendimento/{deliveries[0].id}",
+            json={
+                "data_limite": "2024-06-02",
+                "data_de_atendimento": "2024-05-31",
+                "status": "DONE",
+            },
+        )
+        response = client.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == http.HTTPStatus.OK
+        assert response.headers["ETag"] != etag
+
+    def test_if_modified_since(self, client, deliveries):
+        url = "/api/v1/atendimento/polo_productivity"
+        last_modified = client.get(url).headers["Last-Modified"]
+
+        response = client.get(url, headers={"If-Modified-Since": last_modified})
+
+        assert response.status_code == http.HTTPStatus.NOT_MODIFIED
+
+    def test_list_etag_depends_on_the_query_string(self, client, deliveries):
+        etag = client.get("/api/v1/atendimento?per_page=1").headers["ETag"]
+
+        same = client.get(
+            "/api/v1/atendimento?per_page=1", headers={"If-None-Match": etag}
+        )
+        other = client.get(
+            "/api/v1/atendimento?per_page=2", headers={"If-None-Match": etag}
+        )
+
+        assert same.status_code == http.HTTPStatus.NOT_MODIFIED
+        assert other.status_code == http.HTTPStatus.OK
+        assert len(other.json["data"]) == 2
+
+
+class TestImportCsvRoute:
+    csv_content = (
+        b"id_atendimento;id_cliente;angel;polo;data_limite;data_de_atendimento\n"
+        b"1;123456;John Doe;SP - SAO PAULO;2021-06-30;2021-06-29 09:09:30\n"
+    )
+
+    @pytest.fixture
+    def delayed_calls(self, monkeypatch, tmp_path):
+        from src.config import settings
+        from src.tasks import import_csv_task
+
+        calls = []
+        monkeypatch.setattr(settings, "IMPORT_SPOOL_DIR", str(tmp_path))
+        monkeypatch.setattr(
+            import_csv_task,
+            "delay",
+            lambda *args: calls.append(args) or SimpleNamespace(id="task-id"),
+        )
+        return calls
+
+    def test_import_csv_spools_raw_body(self, client, delayed_calls):
+        response = client.post(
+            "/api/v1/atendimento/import_csv",
+            data=self.csv_content,
+            content_type="application/octet-stream",
+        )
+
+        assert response.status_code == http.HTTPStatus.ACCEPTED
+        assert response.json["task_id"] == "task-id"
+
+        file_path, checksum, _, file_format, mode = delayed_calls[0]
+        with open(file_path, "rb") as spooled:
+            assert spooled.read() == self.csv_content
+        assert checksum == hashlib.sha256(self.csv_content).hexdigest()
+        assert file_format == "csv"
+        assert mode == "insert"
+
+    def test_import_csv_spools_multipart_file(self, client, delayed_calls):
+        response = client.post(
+            "/api/v1/atendimento/import_csv",
+            data={"file": (BytesIO(self.csv_content), "atendimentos.csv")},
+            content_type="multipart/form-data",
+        )
+
+        assert response.status_code == http.HTTPStatus.ACCEPTED
+
+        file_path = delayed_calls[0][0]
+        with open(file_path, "rb") as spooled:
+            assert spooled.read() == self.csv_content
+
+    def test_import_csv_detects_parquet(self, client, delayed_calls):
+        response = client.post(
+            "/api/v1/atendimento/import_csv",
+            data=b"PAR1" + b"\0" * 16,
+            content_type="application/octet-stream",
+        )
+
+        assert response.status_code == http.HTTPStatus.ACCEPTED
+        assert delayed_calls[0][3] == "parquet"
+
+    def test_import_csv_accepts_gzip_content_encoding(self, client, delayed_calls):
+        compressed = gzip.compress(self.csv_content)
+        response = client.post(
+            "/api/v1/atendimento/import_csv",
+            data=compressed,
+            content_type="text/csv",
+            headers={"Content-Encoding": "gzip"},
+        )
+
+        assert response.status_code == http.HTTPStatus.ACCEPTED
+        file_path, _, _, file_format, _ = delayed_calls[0]
+        with open(file_path, "rb") as spooled:
+            assert spooled.read() == compressed
+        assert file_format == "csv"
+
+    @pytest.mark.parametrize("filename", ["atendimentos.csv.zst", "ATENDIMENTOS.CSV.GZ"])
+    def test_import_csv_rejects_mislabeled_compression(
+        self, client, delayed_calls, filename
+    ):
+        response = client.post(
+            "/api/v1/atendimento/import_csv",
+            data={"file": (BytesIO(self.csv_content), filename)},
+            content_type="multipart/form-data",
+        )
+
+        assert response.status_code == http.HTTPStatus.BAD_REQUEST
+        assert not delayed_calls
+
+    def test_import_csv_dry_run_skips_the_import_job(
+        self, client, delayed_calls, monkeypatch
+    ):
+        from src.models import ImportJob
+        from src.tasks import validate_csv_task
+
+        validated_calls = []
+        monkeypatch.setattr(
+            validate_csv_task,
+            "delay",
+            lambda *args: validated_calls.append(args) or SimpleNamespace(id="dry-id"),
+        )
+
+        response = client.post(
+            "/api/v1/atendimento/import_csv?dry_run=true",
+            data=self.csv_content,
+            content_type="application/octet-stream",
+        )
+
+        assert response.status_code == http.HTTPStatus.ACCEPTED
+        assert response.json["task_id"] == "dry-id"
+        assert validated_calls[0][2] == "csv"
+        assert not delayed_calls
+        assert ImportJob.query.count() == 0
+
+    def test_import_csv_empty_file(self, client, delayed_calls, tmp_path):
+        response = client.post(
+            "/api/v1/atendimento/import_csv",
+            data={"file": (BytesIO(b""), "atendimentos.csv")},
+            content_type="multipart/form-data",
+        )
+
+        assert response.status_code == http.HTTPStatus.BAD_REQUEST
+        assert response.json["error"] == "Empty file"
+        assert not delayed_calls
+        assert not list(tmp_path.iterdir())
+
+    def test_import_csv_reupload_returns_completed_import(
+        self, client, delayed_calls, tmp_path
+    ):
+        from src.services.import_job_service import ImportJobService
+
+        response = client.post(
+            "/api/v1/atendimento/import_csv",
+            data=self.csv_content,
+            content_type="application/octet-stream",
+        )
+        import_job_id = delayed_calls[0][2]
+        ImportJobService().complete(import_job_id, {"successful_rows": 1})
+
+        response = client.post(
+            "/api/v1/atendimento/import_csv",
+            data=self.csv_content,
+            content_type="application/octet-stream",
+        )
+
+        assert response.status_code == http.HTTPStatus.OK
+        assert response.json["task_id"] == "task-id"
+        assert response.json["result"] == {"successful_rows": 1}
+        assert len(delayed_calls) == 1
+        # Only the spooled file of the first upload is kept.
+        assert len(list(tmp_path.iterdir())) == 1
+
+    def test_import_csv_reupload_of_a_running_import(self, client, delayed_calls):
+        for _ in range(2):
+            response = client.post(
+                "/api/v1/atendimento/import_csv",
+                data=self.csv_content,
+                content_type="application/octet-stream",
+            )
+
+        assert response.status_code == http.HTTPStatus.ACCEPTED
+        assert response.json["message"] == "CSV file is already being processed"
+        assert len(delayed_calls) == 1
+
+    def test_import_csv_upload_while_the_job_is_being_dispatched(
+        self, client, delayed_calls
+    ):
+        from src.services.import_job_service import ImportJobService
+
+        # The job of a concurrent upload, created but not dispatched yet.
+        ImportJobService().get_or_create(hashlib.sha256(self.csv_content).hexdigest())
+
+        response = client.post(
+            "/api/v1/atendimento/import_csv",
+            data=self.csv_content,
+            content_type="application/octet-stream",
+        )
+
+        assert response.status_code == http.HTTPStatus.ACCEPTED
+        assert response.json["message"] == "CSV file is already being processed"
+        assert not delayed_calls
+
+    def test_import_csv_failed_import_is_claimed_once(self, client, delayed_calls):
+        from src.services.import_job_service import ImportJobService
+
+        client.post(
+            "/api/v1/atendimento/import_csv",
+            data=self.csv_content,
+            content_type="application/octet-stream",
+        )
+        import_job_service = ImportJobService()
+        import_job_service.fail(delayed_calls[0][2])
+
+        # A concurrent re-upload claimed the job first.
+        assert import_job_service.claim(delayed_calls[0][2])
+        response = client.post(
+            "/api/v1/atendimento/import_csv",
+            data=self.csv_content,
+            content_type="application/octet-stream",
+        )
+
+        assert response.json["message"] == "CSV file is already being processed"
+        assert len(delayed_calls) == 1
+
+    @pytest.mark.parametrize("outcome", ["stale", "failed"])
+    def test_import_csv_reupload_dispatches_lost_imports_again(
+        self, client, delayed_calls, monkeypatch, outcome
+    ):
+        from src.config import settings
+        from src.services.import_job_service import ImportJobService
+
+        client.post(
+            "/api/v1/atendimento/import_csv",
+            data=self.csv_content,
+            content_type="application/octet-stream",
+        )
+        if outcome == "stale":
+            monkeypatch.setattr(settings, "IMPORT_JOB_STALE_AFTER", 0)
+        else:
+            ImportJobService().fail(delayed_calls[0][2])
+
+        response = client.post(
+            "/api/v1/atendimento/import_csv",
+            data=self.csv_content,
+            content_type="application/octet-stream",
+        )
+
+        assert response.status_code == http.HTTPStatus.ACCEPTED
+        assert response.json["message"] == "CSV file is being processed"
+        assert len(delayed_calls) == 2
+        assert delayed_calls[1][2] == delayed_calls[0][2]
+
+    def test_import_csv_upsert_is_a_separate_import(self, client, delayed_calls):
+        from src.services.import_job_service import ImportJobService
+
+        client.post(
+            "/api/v1/atendimento/import_csv",
+            data=self.csv_content,
+            content_type="application/octet-stream",
+        )
+        ImportJobService().complete(delayed_calls[0][2], {"successful_rows": 1})
+
+        response = client.post(
+            "/api/v1/atendimento/import_csv?mode=upsert",
+            data=self.csv_content,
+            content_type="application/octet-stream",
+        )
+
+        assert response.status_code == http.HTTPStatus.ACCEPTED
+        assert len(delayed_calls) == 2
+        assert delayed_calls[1][4] == "upsert"
+        assert delayed_calls[1][2] != delayed_calls[0][2]
+
+    def test_import_csv_rejects_unknown_mode(self, client, delayed_calls):
+        response = client.post(
+            "/api/v1/atendimento/import_csv?mode=replace",
+            data=self.csv_content,
+            content_type="application/octet-stream",
+        )
+
+        assert response.status_code == http.HTTPStatus.BAD_REQUEST
+        assert not delayed_calls
+
+
+class TestTaskStatusRoute:
+    def test_task_status_reports_progress(self, client, monkeypatch):
+        import sys
+
+        progress = {"rows_read": 10_000, "rows_committed": 9_998, "errors": 2}
+        monkeypatch.setattr(
+            sys.modules["src.api.atendimento_routes"],
+            "AsyncResult",
+            lambda task_id: SimpleNamespace(state="PROGRESS", info=progress),
+        )
+
+        response = client.get("/api/v1/atendimento/task_status/task-id")
+
+        assert response.status_code == http.HTTPStatus.OK
+        assert response.json["state"] == "PROGRESS"
+        assert response.json["progress"] == progress
+
+
+class TestImportErrorsRoute:
+    def test_import_errors_are_paginated(self, client):
+        from src.services.import_job_service import ImportJobService
+
+        import_job_service = ImportJobService()
+        job, _ = import_job_service.get_or_create("checksum")
+        import_job_service.start(job.id, "task-id")
+        import_job_service.add_errors(
+            job.id,
+            [
+                {"line": line, "error": "Missing required fields", "data": {"angel": ""}}
+                for line in (2, 3, 4)
+            ]
+            + [{"line": "file", "error": "File processing error", "data": None}],
+        )
+
+        response = client.get("/api/v1/atendimento/import/task-id/errors?per_page=3")
+
+        assert response.status_code == http.HTTPStatus.OK
+        assert [error["line"] for error in response.json["data"]] == [2, 3, 4]
+        assert response.json["data"][0]["data"] == {"angel": ""}
+
+        response = client.get(response.json["next"])
+
+        assert response.json["data"] == [
+            {"line": None, "error": "File processing error", "data": None}
+        ]
+        assert response.json["next"] is None
+
+    def test_import_errors_page_size_is_capped(self, client, monkeypatch):
+        from src.config import settings
+        from src.services.import_job_service import ImportJobService
+
+        monkeypatch.setattr(settings, "MAX_PAGE_SIZE", 2)
+        import_job_service = ImportJobService()
+        job, _ = import_job_service.get_or_create("checksum")
+        import_job_service.start(job.id, "task-id")
+        import_job_service.add_errors(
+            job.id,
+            [
+                {"line": line, "error": "Missing required fields", "data": None}
+                for line in (2, 3, 4)
+            ],
+        )
+
+        response = client.get("/api/v1/atendimento/import/task-id/errors?per_page=0")
+        assert len(response.json["data"]) == 1
+
+        response = client.get(
+            "/api/v1/atendimento/import/task-id/errors?per_page=1000000"
+        )
+        assert len(response.json["data"]) == 2
+        assert "per_page=2" in response.json["next"]
+
+    def test_import_errors_unknown_task(self, client):
+        response = client.get("/api/v1/atendimento/import/unknown/errors")
+
+        assert response.status_code == http.HTTPStatus.NOT_FOUND
+
+
+class TestExportRoute:
+    @pytest.fixture
+    def deliveries(self, make_deliveries):
+        return make_deliveries(
+            [
+                {
+                    "data_limite": datetime(2024, 6, 30),
+                    "data_de_atendimento": datetime(2024, 6, 29, 9, 9, 30),
+                    "status": status,
+                    "deleted_at": deleted_at,
+                }
+                for status, deleted_at in (
+                    ("PENDING", None),
+                    ("DONE", None),
+                    ("CANCELED", datetime(2024, 7, 1)),
+                )
+            ]
+        )
+
+    def test_export_csv_streams_every_row(self, client, deliveries, monkeypatch):
+        from src.config import settings
+
+        # One chunk per row, to exercise the chunked response.
+        monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 1)
+
+        response = client.get("/api/v1/atendimento/export?format=csv&order_by=-id")
+
+        assert response.status_code == http.HTTPStatus.OK
+        assert response.is_streamed
+        assert response.mimetype == "text/csv"
+        lines = response.get_data(as_text=True).splitlines()
+        assert lines[0] == (
+            "id,cliente_id,angel,polo,data_limite,data_de_atendimento,status"
+        )
+        assert lines[1:] == [
+            f"{deliveries[1].id},123456,John Doe,SP - SÃO PAULO,"
+            "2024-06-30 00:00:00,2024-06-29 09:09:30,DONE",
+            f"{deliveries[0].id},123456,John Doe,SP - SÃO PAULO,"
+            "2024-06-30 00:00:00,2024-06-29 09:09:30,PENDING",
+        ]
+
+    def test_export_ndjson(self, client, deliveries):
+        import json
+
+        response = client.get("/api/v1/atendimento/export?format=ndjson")
+
+        assert response.mimetype == "application/x-ndjson"
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert [row["status"] for row in rows] == ["PENDING", "DONE"]
+        assert rows[0]["polo"] == "SP - SÃO PAULO"
+
+    def test_export_ndjson_in_debug_mode(self, app, client, deliveries):
+        # Debug mode indents responses, never the NDJSON lines.
+        app.debug = True
+
+        response = client.get("/api/v1/atendimento/export?format=ndjson")
+
+        lines = response.get_data(as_text=True).splitlines()
+        assert len(lines) == 2
+        assert all(line.startswith("{") and line.endswith("}") for line in lines)
+
+    def test_export_rejects_unknown_format(self, client):
+        response = client.get("/api/v1/atendimento/export?format=xlsx")
+
+        assert response.status_code == http.HTTPStatus.BAD_REQUEST
@@ -0,0 +1,84 @@
+# mypy: ignore-errors
+
+import gzip
+import http
+
+import brotli
+import pytest
+import zstandard
+
+from src.config import settings
+
+
+@pytest.fixture
+def deliveries(make_deliveries):
+    return make_deliveries(20)
+
+
+DECOMPRESS = {
+    "gzip": gzip.decompress,
+    "br": brotli.decompress,
+    "zstd": lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+}
+
+
+class TestCompression:
+    @pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+    def test_list_page_is_compressed(self, client, deliveries, encoding):
+        url = "/api/v1/atendimento?per_page=20"
+        plain = client.get(url)
+
+        response = client.get(url, headers={"Accept-Encoding": encoding})
+
+        assert response.headers["Content-Encoding"] == encoding
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert len(response.data) < len(plain.data)
+        assert DECOMPRESS[encoding](response.data) == plain.data
+
+    def test_best_accepted_encoding_is_chosen(self, client, deliveries):
+        response = client.get(
+            "/api/v1/atendimento?per_page=20",
+            headers={"Accept-Encoding": "gzip, br;q=0.5, zstd;q=0.8"},
+        )
+
+        assert response.headers["Content-Encoding"] == "gzip"
+
+    def test_small_bodies_are_sent_as_they_are(self, client, deliveries, monkeypatch):
+        monkeypatch.setattr(settings, "COMPRESSION_MIN_SIZE", 100_000)
+
+        response = client.get(
+            "/api/v1/atendimento?per_page=20", headers={"Accept-Encoding": "gzip"}
+        )
+
+        assert "Content-Encoding" not in response.headers
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert len(response.json["data"]) == 20
+
+    def test_compressed_etag_is_weak_and_still_matches(self, client, deliveries):
+        url = "/api/v1/atendimento?per_page=20"
+        response = client.get(url, headers={"Accept-Encoding": "gzip"})
+        etag = response.headers["ETag"]
+        assert etag.startswith("W/")
+
+        response = client.get(
+            url, headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+        )
+
+        assert response.status_code == http.HTTPStatus.NOT_MODIFIED
+        assert "Content-Encoding" not in response.headers
+        assert "Accept-Encoding" in response.headers["Vary"]
+
+    def test_export_is_compressed_as_it_streams(self, client, deliveries, monkeypatch):
+        monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 5)
+        plain = client.get("/api/v1/atendimento/export").data
+
+        response = client.get(
+            "/api/v1/atendimento/export", headers={"Accept-Encoding": "gzip"}
+        )
+        chunks = list(response.response)
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Content-Length" not in response.headers
+        # A chunk per batch of rows, and the gzip trailer.
+        assert len(chunks) == 5
+        assert gzip.decompress(b"".join(chunks)) == plain
@@ -1,5 +1,6 @@
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Generator
+from typing import Callable, ContextManager, Generator
 
 import pytest
 from dotenv import load_dotenv
@@ -126,3 +127,61 @@ def atendimentos_fixture(
     session.commit()
 
     return atendimentos
+
+
+@pytest.fixture
+def make_deliveries(
+    session: Session, angel_fixture, polo_fixture, client_fixture
+) -> Callable:
+    """Create deliveries: `count` of them, or one per dict of column overrides.
+
+    They belong to the angel, polo and client fixtures, are due on 2024-06-01,
+    were attended on 2024-05-30 and are PENDING, unless overridden.
+    """
+    from src.models import Delivery
+
+    def make(overrides: int | list[dict]) -> list[Delivery]:
+        if isinstance(overrides, int):
+            overrides = [{}] * overrides
+        deliveries = [
+            Delivery(
+                **{
+                    "cliente": client_fixture,
+                    "angel": angel_fixture,
+                    "polo": polo_fixture,
+                    "data_limite": datetime(2024, 6, 1),
+                    "data_de_atendimento": datetime(2024, 5, 30),
+                    "status": "PENDING",
+                    **values,
+                }
+            )
+            for values in overrides
+        ]
+        session.add_all(deliveries)
+        session.commit()
+        return deliveries
+
+    return make
+
+
+@pytest.fixture
+def capture_statements(app: Flask) -> Callable[[], ContextManager[list[str]]]:
+    """Collect the SQL statements run inside a `with capture_statements()` block."""
+    from sqlalchemy import event
+
+    from src.database import default_db as db
+
+    @contextmanager
+    def capture() -> Generator[list[str], None, None]:
+        statements: list[str] = []
+
+        def record(conn, cursor, statement, *args) -> None:  # type: ignore
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+    return capture
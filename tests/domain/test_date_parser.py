@@ -0,0 +1,63 @@
+# mypy: ignore-errors
+
+from datetime import date, datetime
+
+from src.domain import DateParser
+from src.domain import Delivery as DeliveryDT
+
+
+class TestDateParser:
+    def test_detects_iso_dates(self):
+        parser = DateParser.detect(["2024-06-29 09:09:30", "2024-06-30"])
+
+        assert parser.formats == ("iso",)
+        assert parser.parse("2024-06-29 09:09:30") == datetime(2024, 6, 29, 9, 9, 30)
+
+    def test_detects_day_first_dates(self):
+        parser = DateParser.detect(["29/06/2024", "05/06/2024"])
+
+        assert parser.formats == ("%d/%m/%Y",)
+        assert parser.parse("05/06/2024") == datetime(2024, 6, 5)
+
+    def test_ambiguous_dates_are_month_first_like_dateutil(self):
+        parser = DateParser.detect(["05/06/2024"])
+
+        assert parser.parse("05/06/2024") == datetime(2024, 5, 6)
+
+    def test_mixed_formats_keep_one_format_per_group(self):
+        parser = DateParser.detect(["2024-06-29", "29/06/2024 10:00:00"])
+
+        assert set(parser.formats) == {"iso", "%d/%m/%Y %H:%M:%S"}
+
+    def test_falls_back_to_dateutil(self):
+        parser = DateParser.detect(["2024-06-29"])
+
+        assert parser.parse("June 29, 2024") == datetime(2024, 6, 29)
+
+    def test_typed_values_skip_parsing(self):
+        parser = DateParser()
+
+        assert parser.parse(datetime(2024, 6, 29, 9)) == datetime(2024, 6, 29, 9)
+        assert parser.parse(date(2024, 6, 29)) == datetime(2024, 6, 29)
+
+    def test_invalid_and_empty_values(self):
+        parser = DateParser()
+
+        assert parser.parse("not a date") is None
+        assert parser.parse("  ") is None
+        assert parser.parse(None) is None
+
+    def test_delivery_from_dict_uses_the_given_parser(self):
+        parser = DateParser.detect(["29/06/2024"])
+        data = {
+            "id_cliente": "1",
+            "angel": "John Doe",
+            "polo": "SP",
+            "data_limite": "05/07/2024",
+            "data_de_atendimento": "01/07/2024",
+        }
+
+        delivery = DeliveryDT.from_dict(data, parser)
+
+        assert delivery.data_limite == datetime(2024, 7, 5)
+        assert delivery.data_de_atendimento == datetime(2024, 7, 1)
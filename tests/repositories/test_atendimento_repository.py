@@ -0,0 +1,90 @@
+# mypy: ignore-errors
+
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from src.domain import Delivery as DeliveryDomain
+from src.models import Delivery
+from src.repositories import DeliveryRepository
+
+
+def make_delivery(source_id, angel, polo, client):
+    delivery = DeliveryDomain(
+        id=source_id,
+        cliente_id=client.id,
+        angel=angel.name,
+        polo=polo.name,
+        data_limite=datetime(2021, 6, 30),
+        data_de_atendimento=datetime(2021, 6, 29),
+    )
+    delivery.id_angel = angel.id
+    delivery.id_polo = polo.id
+    return delivery
+
+
+class TestCreateMany:
+    def test_source_ids_are_imported_once(
+        self, session: Session, angel_fixture, polo_fixture, client_fixture
+    ):
+        repository = DeliveryRepository(session=session)
+        dimensions = (angel_fixture, polo_fixture, client_fixture)
+
+        inserted = repository.create_many(
+            [make_delivery(source_id, *dimensions) for source_id in (1, 2, 2)]
+        )
+        assert inserted == 2
+
+        inserted = repository.create_many(
+            [make_delivery(source_id, *dimensions) for source_id in (1, 3)]
+        )
+        assert inserted == 1
+        assert session.query(Delivery).count() == 3
+
+    def test_rows_without_source_id_are_always_inserted(
+        self, session: Session, angel_fixture, polo_fixture, client_fixture
+    ):
+        repository = DeliveryRepository(session=session)
+        deliveries = [
+            make_delivery(-999, angel_fixture, polo_fixture, client_fixture)
+            for _ in range(2)
+        ]
+
+        assert repository.create_many(deliveries) == 2
+        assert session.query(Delivery).filter(Delivery.source_id.is_(None)).count() == 2
+
+
+class TestUpsertMany:
+    def test_changed_rows_are_updated_and_new_ones_inserted(
+        self, session: Session, angel_fixture, polo_fixture, client_fixture
+    ):
+        repository = DeliveryRepository(session=session)
+        dimensions = (angel_fixture, polo_fixture, client_fixture)
+        repository.create_many(
+            [make_delivery(source_id, *dimensions) for source_id in (1, 2)]
+        )
+
+        changed = make_delivery(2, *dimensions)
+        changed.status = "DONE"
+        changed.data_de_atendimento = datetime(2021, 6, 30)
+        result = repository.upsert_many(
+            [make_delivery(1, *dimensions), changed, make_delivery(3, *dimensions)]
+        )
+
+        assert result == (1, 1)
+        updated = session.query(Delivery).filter(Delivery.source_id == 2).one()
+        assert updated.status == "DONE"
+        assert updated.data_de_atendimento == datetime(2021, 6, 30)
+        assert updated.updated_at is not None
+        assert session.query(Delivery).count() == 3
+
+    def test_last_occurrence_of_a_source_id_wins(
+        self, session: Session, angel_fixture, polo_fixture, client_fixture
+    ):
+        repository = DeliveryRepository(session=session)
+        first = make_delivery(1, angel_fixture, polo_fixture, client_fixture)
+        last = make_delivery(1, angel_fixture, polo_fixture, client_fixture)
+        last.status = "CANCELED"
+
+        assert repository.upsert_many([first, last]) == (1, 0)
+        assert session.query(Delivery).one().status == "CANCELED"
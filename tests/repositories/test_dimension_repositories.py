@@ -0,0 +1,38 @@
+# mypy: ignore-errors
+
+from sqlalchemy.orm import Session
+
+from src.models import Angel, Client, Polo
+from src.repositories import AngelRepository, ClientRepository, PoloRepository
+
+
+class TestBulkGetOrCreate:
+    def test_angels_are_created_once(self, session: Session, angel_fixture):
+        repository = AngelRepository(session=session)
+
+        ids = repository.bulk_get_or_create(["John Doe", "Maria", "Maria"])
+
+        assert ids["John Doe"] == angel_fixture.id
+        assert session.query(Angel).count() == 2
+        assert repository.bulk_get_or_create(["Maria"]) == {"Maria": ids["Maria"]}
+        assert session.query(Angel).count() == 2
+
+    def test_polos_are_created_once(self, session: Session, polo_fixture):
+        repository = PoloRepository(session=session)
+
+        ids = repository.bulk_get_or_create([polo_fixture.name, "RJ - RIO"])
+
+        assert ids[polo_fixture.name] == polo_fixture.id
+        assert set(ids) == {polo_fixture.name, "RJ - RIO"}
+        assert session.query(Polo).count() == 2
+
+    def test_clients_are_created_once(self, session: Session, client_fixture):
+        repository = ClientRepository(session=session)
+
+        ids = repository.bulk_get_or_create([client_fixture.id, 42, 42])
+
+        assert ids == {client_fixture.id: client_fixture.id, 42: 42}
+        assert session.query(Client).count() == 2
+
+    def test_empty_input(self, session: Session):
+        assert AngelRepository(session=session).bulk_get_or_create([]) == {}
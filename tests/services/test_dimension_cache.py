@@ -0,0 +1,133 @@
+# mypy: ignore-errors
+
+import fnmatch
+
+import pytest
+
+from src.services.dimension_cache import DimensionCache, LRUCache
+
+
+class FakeRedis(dict):
+    """The few Redis commands the shared tier uses."""
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def set(self, key, value, ex=None):
+        self[key] = str(value).encode()
+
+    def execute(self):
+        pass
+
+    def scan_iter(self, match="*", count=None):
+        return iter([key for key in self if fnmatch.fnmatch(key, match)])
+
+    def unlink(self, *keys):
+        for key in keys:
+            self.pop(key, None)
+
+
+class TestLRUCache:
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1, ttl=60)
+        cache.set("b", 2, ttl=60)
+        cache.get("a")
+        cache.set("c", 3, ttl=60)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_expired_entries_are_dropped(self):
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1, ttl=-1)
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+
+class TestDimensionCache:
+    @pytest.fixture
+    def calls(self):
+        return []
+
+    @pytest.fixture
+    def loader(self, calls):
+        def load(keys):
+            calls.append(sorted(keys))
+            return {key: len(key) for key in keys if key != "ghost"}
+
+        return load
+
+    def test_get_or_create_only_loads_misses(self, calls, loader):
+        cache = DimensionCache()
+
+        assert cache.get_or_create("angel", ["Ana", "Maria"], loader) == {
+            "Ana": 3,
+            "Maria": 5,
+        }
+        assert cache.get_or_create("angel", ["Ana", "Joao"], loader) == {
+            "Ana": 3,
+            "Joao": 4,
+        }
+        assert calls == [["Ana", "Maria"], ["Joao"]]
+
+    def test_lookup_caches_missing_keys(self, calls, loader):
+        cache = DimensionCache()
+
+        assert cache.lookup("angel", ["ghost"], loader) == {}
+        assert cache.lookup("angel", ["ghost"], loader) == {}
+        assert calls == [["ghost"]]
+
+    def test_get_or_create_ignores_negative_entries(self, calls):
+        cache = DimensionCache()
+        cache.lookup("angel", ["Maria"], lambda keys: {})
+
+        ids = cache.get_or_create("angel", ["Maria"], lambda keys: {"Maria": 7})
+
+        assert ids == {"Maria": 7}
+        assert cache.lookup("angel", ["Maria"], lambda keys: {}) == {"Maria": 7}
+
+    def test_kinds_do_not_collide(self):
+        cache = DimensionCache()
+        cache.get_or_create("angel", ["X"], lambda keys: {"X": 1})
+
+        assert cache.get_or_create("polo", ["X"], lambda keys: {"X": 2}) == {"X": 2}
+
+    def test_clear_flushes_the_shared_tier(self, calls, loader):
+        shared = FakeRedis({"other:key": b"1"})
+        cache = DimensionCache()
+        cache._redis = shared
+        cache.get_or_create("angel", ["Ana"], loader)
+        assert "dimension:angel:Ana" in shared
+
+        cache.clear()
+
+        assert shared == {"other:key": b"1"}
+        cache.get_or_create("angel", ["Ana"], loader)
+        assert calls == [["Ana"], ["Ana"]]
+
+
+class TestDeliveryServiceUsesCache:
+    def test_second_create_does_not_query_dimensions(self, client, monkeypatch):
+        from src.repositories import AngelRepository
+
+        data = {
+            "id_cliente": 123456,
+            "angel": "John Doe",
+            "polo": "SP - SÃO PAULO",
+            "data_limite": "2021-06-30",
+            "data_de_atendimento": "2021-06-29",
+        }
+        assert client.post("/api/v1/atendimento", json=data).status_code == 201
+
+        def fail(self, names):
+            raise AssertionError("angel should come from the cache")
+
+        monkeypatch.setattr(AngelRepository, "bulk_get_or_create", fail)
+
+        assert client.post("/api/v1/atendimento", json=data).status_code == 201
@@ -0,0 +1,77 @@
+# mypy: ignore-errors
+
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.models import Delivery
+from src.tasks.columnar_source import detect_format, open_record_batches
+from src.tasks.csv_processor import process_columnar
+
+TABLE = pa.table(
+    {
+        "id_atendimento": [1, 2, 3],
+        "id_cliente": [10, 10, None],
+        "angel": ["John Doe", "Maria", "Maria"],
+        "polo": ["SP - SAO PAULO"] * 3,
+        "data_limite": [datetime(2024, 6, 30)] * 3,
+        "data_de_atendimento": [datetime(2024, 6, 29, 9, 9, 30)] * 3,
+        "status": ["DONE", None, "DONE"],
+        "unused": ["x"] * 3,
+    }
+)
+
+
+@pytest.fixture(params=["parquet", "arrow_file", "arrow_stream"])
+def columnar_file(request, tmp_path):
+    file_path = str(tmp_path / request.param)
+    if request.param == "parquet":
+        pq.write_table(TABLE, file_path)
+    elif request.param == "arrow_file":
+        with pa.ipc.new_file(file_path, TABLE.schema) as writer:
+            writer.write_table(TABLE)
+    else:
+        with pa.ipc.new_stream(file_path, TABLE.schema) as writer:
+            writer.write_table(TABLE)
+    return file_path
+
+
+class TestColumnarSource:
+    def test_detects_format_by_magic_bytes(self, columnar_file):
+        expected = "parquet" if columnar_file.endswith("parquet") else "arrow"
+
+        assert detect_format(columnar_file) == expected
+
+    def test_falls_back_to_content_type(self, tmp_path):
+        file_path = tmp_path / "upload"
+        file_path.write_bytes(b"id_atendimento;id_cliente\n")
+
+        assert detect_format(str(file_path)) == "csv"
+        assert (
+            detect_format(str(file_path), "application/vnd.apache.parquet; charset=x")
+            == "parquet"
+        )
+
+    def test_reads_delivery_columns_in_batches(self, columnar_file):
+        file_format = detect_format(columnar_file)
+
+        with open_record_batches(columnar_file, file_format, 2) as (_, batches):
+            batches = list(batches)
+
+        assert [batch.num_rows for batch in batches] == [2, 1]
+        assert "unused" not in batches[0].schema.names
+
+    def test_process_columnar(self, session, columnar_file):
+        result = process_columnar(columnar_file, session, detect_format(columnar_file))
+
+        assert result["total_rows"] == 3
+        assert result["successful_rows"] == 2
+        assert result["error_count"] == 1
+        assert result["errors"][0]["line"] == 3
+        assert result["errors"][0]["data"]["data_limite"] == "2024-06-30 00:00:00"
+        assert [delivery.status for delivery in session.query(Delivery)] == [
+            "DONE",
+            "PENDING",
+        ]
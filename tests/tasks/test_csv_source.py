@@ -0,0 +1,176 @@
+# mypy: ignore-errors
+
+import csv
+import gzip
+import hashlib
+import os
+
+import pytest
+import zstandard
+
+from src.tasks.csv_processor import merge_import_results
+from src.tasks.csv_source import (
+    bytes_consumed,
+    data_range,
+    detect_compression,
+    open_spooled_csv,
+    plan_byte_ranges,
+    read_layout,
+)
+
+HEADER = "id_atendimento;id_cliente;angel;polo;data_limite;data_de_atendimento\n"
+
+
+def write_csv(tmp_path, rows: int):
+    path = tmp_path / "atendimentos.csv"
+    lines = [
+        f"{i};{1000 + i};Angel {i % 3};Polo {i % 2};2024-06-30;2024-06-29\n"
+        for i in range(1, rows + 1)
+    ]
+    path.write_text(HEADER + "".join(lines), encoding="UTF-8")
+    return str(path)
+
+
+class TestCsvSource:
+    def test_read_layout(self, tmp_path):
+        layout = read_layout(write_csv(tmp_path, 3))
+
+        assert layout.delimiter == ";"
+        assert layout.fieldnames[0] == "id_atendimento"
+        assert layout.data_offset == len(HEADER)
+
+    def test_plan_byte_ranges_cover_every_row_once(self, tmp_path):
+        file_path = write_csv(tmp_path, 100)
+        layout = read_layout(file_path)
+
+        byte_ranges = plan_byte_ranges(file_path, chunk_size=500)
+
+        assert len(byte_ranges) > 1
+        seen = []
+        for byte_range in byte_ranges:
+            with open_spooled_csv(file_path, byte_range) as stream:
+                rows = list(
+                    csv.DictReader(
+                        stream,
+                        fieldnames=layout.fieldnames,
+                        delimiter=layout.delimiter,
+                    )
+                )
+            # The first row of each range is on the line the plan announced.
+            assert int(rows[0]["id_atendimento"]) + 1 == byte_range.first_line
+            seen.extend(int(row["id_atendimento"]) for row in rows)
+
+        assert seen == list(range(1, 101))
+
+    @pytest.mark.parametrize(
+        "compression, compress",
+        [("gzip", gzip.compress), ("zstd", zstandard.ZstdCompressor().compress)],
+    )
+    def test_compressed_files_are_decoded_as_a_stream(
+        self, tmp_path, compression, compress
+    ):
+        plain_path = write_csv(tmp_path, 1000)
+        file_path = tmp_path / "atendimentos.csv.compressed"
+        with open(plain_path, "rb") as plain:
+            file_path.write_bytes(compress(plain.read()))
+        file_path = str(file_path)
+
+        layout = read_layout(file_path)
+        byte_ranges = plan_byte_ranges(file_path, chunk_size=500)
+        with open_spooled_csv(file_path, data_range(file_path, layout)) as stream:
+            rows = list(
+                csv.DictReader(
+                    stream, fieldnames=layout.fieldnames, delimiter=layout.delimiter
+                )
+            )
+            consumed = bytes_consumed(stream)
+
+        assert detect_compression(file_path) == compression
+        assert layout.fieldnames[0] == "id_atendimento"
+        assert byte_ranges == [data_range(file_path, layout)]
+        assert [int(row["id_atendimento"]) for row in rows] == list(range(1, 1001))
+        # Progress is measured in compressed bytes.
+        assert consumed == os.path.getsize(file_path)
+
+    def test_plan_byte_ranges_reads_the_file_once(self, tmp_path, monkeypatch):
+        from src.tasks import csv_source
+
+        file_path = write_csv(tmp_path, 100)
+        monkeypatch.setattr(csv_source, "SCAN_BLOCK_SIZE", 64)
+        digest = hashlib.sha256()
+        blocks = []
+
+        byte_ranges = plan_byte_ranges(
+            file_path,
+            chunk_size=500,
+            on_block=lambda block: blocks.append(block) or digest.update(block),
+        )
+
+        with open(file_path, "rb") as spooled:
+            content = spooled.read()
+        assert b"".join(blocks) == content
+        assert digest.hexdigest() == hashlib.sha256(content).hexdigest()
+        for byte_range in byte_ranges:
+            assert content.count(b"\n", 0, byte_range.start) + 1 == byte_range.first_line
+
+    def test_small_file_is_a_single_range(self, tmp_path):
+        file_path = write_csv(tmp_path, 10)
+
+        assert len(plan_byte_ranges(file_path, chunk_size=1024 * 1024)) == 1
+
+    def test_merge_import_results(self):
+        results = [
+            {
+                "total_rows": 3,
+                "successful_rows": 2,
+                "duplicate_rows": 0,
+                "error_count": 1,
+                "errors": [{"line": 4}],
+            },
+            {
+                "total_rows": 2,
+                "successful_rows": 1,
+                "duplicate_rows": 1,
+                "error_count": 0,
+                "errors": [],
+            },
+        ]
+
+        assert merge_import_results(results) == {
+            "status": "completed",
+            "total_rows": 5,
+            "successful_rows": 3,
+            "duplicate_rows": 1,
+            "failed_rows": 1,
+            "error_count": 1,
+            "errors": [{"line": 4}],
+        }
+
+    def test_merge_upsert_results(self):
+        results = [
+            {
+                "total_rows": 3,
+                "successful_rows": 2,
+                "duplicate_rows": 1,
+                "updated_rows": 1,
+                "error_count": 0,
+                "errors": [],
+            },
+            {
+                "total_rows": 2,
+                "successful_rows": 2,
+                "duplicate_rows": 0,
+                "updated_rows": 2,
+                "error_count": 0,
+                "errors": [],
+            },
+        ]
+
+        merged = merge_import_results(results, "upsert")
+
+        assert merged["successful_rows"] == 4
+        assert (
+            merged["inserted_rows"],
+            merged["updated_rows"],
+            merged["unchanged_rows"],
+        ) == (1, 3, 1)
@@ -0,0 +1,25 @@
+# mypy: ignore-errors
+
+from src.config import settings
+from src.tasks.csv_processor import select_import_engine
+from src.tasks.staging_import import _staging_columns
+
+
+class TestImportEngine:
+    def test_auto_engine_uses_orm_outside_postgres(self, session):
+        assert select_import_engine(session) == "orm"
+
+    def test_engine_can_be_forced(self, session, monkeypatch):
+        monkeypatch.setattr(settings, "IMPORT_ENGINE", "staging")
+
+        assert select_import_engine(session) == "staging"
+
+    def test_staging_columns_keep_known_and_rename_unknown(self):
+        header = ["id_atendimento", " angel ", "observacao", "angel"]
+
+        assert _staging_columns(header) == [
+            "id_atendimento",
+            "angel",
+            "extra_2",
+            "extra_3",
+        ]
@@ -0,0 +1,15 @@
+# mypy: ignore-errors
+
+from src.tasks.import_errors import ErrorLog
+
+
+class TestErrorLog:
+    def test_only_samples_are_kept(self):
+        errors = ErrorLog(sample_size=3)
+
+        errors.extend([{"line": line} for line in range(2, 4)])
+        errors.extend([{"line": line} for line in range(4, 10)])
+        errors.add_stored(5, [{"line": 20}])
+
+        assert errors.count == 13
+        assert errors.samples == [{"line": 2}, {"line": 3}, {"line": 4}]
@@ -0,0 +1,65 @@
+# mypy: ignore-errors
+
+import threading
+import time
+
+import pytest
+
+from src.tasks.pipeline import prefetch
+
+
+class TestPrefetch:
+    def test_items_keep_their_order(self):
+        assert list(prefetch(iter(range(100)), depth=2)) == list(range(100))
+
+    def test_producer_errors_are_raised_to_the_consumer(self):
+        def items():
+            yield 1
+            raise ValueError("broken row")
+
+        consumed = []
+        with pytest.raises(ValueError, match="broken row"):
+            for item in prefetch(items(), depth=2):
+                consumed.append(item)
+
+        assert consumed == [1]
+
+    def test_producer_stays_at_most_depth_items_ahead(self):
+        produced = []
+        waiting = threading.Event()
+
+        def items():
+            for item in range(10):
+                produced.append(item)
+                if len(produced) == 4:
+                    waiting.set()
+                yield item
+
+        consumer = prefetch(items(), depth=2)
+        assert next(consumer) == 0
+        # One item consumed, two queued and one blocked on the full queue.
+        assert waiting.wait(timeout=5)
+        time.sleep(0.2)
+        assert len(produced) == 4
+
+        assert list(consumer) == list(range(1, 10))
+
+    def test_closing_the_consumer_stops_the_producer(self):
+        consumer = prefetch(iter(range(1000)), depth=1)
+        next(consumer)
+
+        consumer.close()
+
+        assert not any(
+            thread.name == "import-prefetch" for thread in threading.enumerate()
+        )
+
+    def test_depth_zero_runs_inline(self):
+        threads = []
+
+        def items():
+            threads.append(threading.current_thread())
+            yield 1
+
+        assert list(prefetch(items(), depth=0)) == [1]
+        assert threads == [threading.main_thread()]
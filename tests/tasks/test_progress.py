@@ -0,0 +1,58 @@
+# mypy: ignore-errors
+
+from src.tasks.progress import ImportProgress, merge_progress
+
+
+class TestImportProgress:
+    def test_snapshot(self):
+        published = []
+        progress = ImportProgress(total_bytes=1000, on_progress=published.append)
+        progress.rows_read = 10
+        progress.rows_committed = 8
+        progress.errors = 2
+        progress.bytes_read = 250
+        with progress.stage("insert"):
+            pass
+
+        progress.publish()
+
+        snapshot = published[0]
+        assert snapshot["rows_read"] == 10
+        assert snapshot["rows_committed"] == 8
+        assert snapshot["errors"] == 2
+        assert snapshot["total_bytes"] == 1000
+        assert snapshot["eta_seconds"] is not None
+        assert set(snapshot["stage_seconds"]) == {"parse", "dimensions", "insert"}
+
+    def test_eta_is_unknown_before_reading(self):
+        assert ImportProgress(total_bytes=1000).snapshot()["eta_seconds"] is None
+
+    def test_merge_progress(self):
+        merged = merge_progress(
+            [
+                {
+                    "rows_read": 10,
+                    "rows_committed": 9,
+                    "errors": 1,
+                    "bytes_read": 100,
+                    "total_bytes": 200,
+                    "rows_per_second": 5.0,
+                    "eta_seconds": 3.0,
+                    "stage_seconds": {"parse": 1.0},
+                },
+                {
+                    "rows_read": 20,
+                    "rows_committed": 20,
+                    "errors": 0,
+                    "bytes_read": 200,
+                    "total_bytes": 200,
+                },
+            ]
+        )
+
+        assert merged["rows_read"] == 30
+        assert merged["rows_committed"] == 29
+        assert merged["bytes_read"] == 300
+        assert merged["rows_per_second"] == 5.0
+        assert merged["eta_seconds"] == 3.0
+        assert merged["stage_seconds"]["parse"] == 1.0
@@ -0,0 +1,196 @@
+# mypy: ignore-errors
+
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from src.database import default_db
+from src.models import Angel, Delivery, ImportCheckpoint, ImportJob, Polo
+from src.services.dimension_cache import dimension_cache
+from src.tasks.csv_processor import process_csv_orm
+from src.tasks.import_mode import UPSERT_MODE
+from src.tasks import staging_import
+from src.tasks.staging_import import process_csv_staging
+
+# The staging engine needs PostgreSQL; these tests run against the database
+# of TEST_POSTGRESQL_URL, which they empty, and are skipped without one.
+POSTGRESQL_URL = os.getenv("TEST_POSTGRESQL_URL")
+
+pytestmark = pytest.mark.skipif(
+    not POSTGRESQL_URL, reason="TEST_POSTGRESQL_URL is not set"
+)
+
+HEADER = "id_atendimento;id_cliente;angel;polo;data_limite;data_de_atendimento;status\n"
+
+
+@pytest.fixture
+def pg_session():
+    engine = create_engine(POSTGRESQL_URL)
+    default_db.metadata.drop_all(engine)
+    default_db.metadata.create_all(engine)
+    dimension_cache.clear()
+    session = Session(engine)
+    yield session
+    session.close()
+    default_db.metadata.drop_all(engine)
+    dimension_cache.clear()
+    engine.dispose()
+
+
+def write_csv(tmp_path, lines, name="atendimentos.csv"):
+    path = tmp_path / name
+    path.write_text(HEADER + "".join(f"{line}\n" for line in lines), encoding="UTF-8")
+    return str(path)
+
+
+def stored(session):
+    rows = session.execute(
+        select(
+            Delivery.source_id,
+            Delivery.cliente_id,
+            Delivery.data_limite,
+            Delivery.data_de_atendimento,
+            Delivery.status,
+        ).order_by(Delivery.source_id)
+    )
+    return [tuple(row) for row in rows]
+
+
+DAY_FIRST = [
+    "1;101;Angel A;Polo A;30/06/2021;29/06/2021;DONE",
+    "2;102;Angel B;Polo A;02/06/2021;01/06/2021;DONE",
+    "3;103;Angel A;Polo B;15/06/2021 10:30;14/06/2021 08:15;PENDING",
+]
+
+
+class TestStagingImport:
+    def test_dates_are_read_like_the_orm_engine(self, tmp_path, pg_session):
+        path = write_csv(tmp_path, DAY_FIRST)
+
+        staging = process_csv_staging(path, pg_session)
+        staged = stored(pg_session)
+        pg_session.execute(Delivery.__table__.delete())
+        pg_session.commit()
+        orm = process_csv_orm(path, pg_session)
+
+        assert staging["successful_rows"] == orm["successful_rows"] == 3
+        assert staged == stored(pg_session)
+        # 01/06/2021 is the 1st of June, as the rest of the file says.
+        assert staged[1][3] == datetime(2021, 6, 1)
+        assert staged[2][2] == datetime(2021, 6, 15, 10, 30)
+
+    def test_invalid_rows_are_reported(self, tmp_path, pg_session):
+        path = write_csv(
+            tmp_path,
+            DAY_FIRST
+            + [
+                "4;104;Angel A;Polo A;never;29/06/2021;DONE",
+                "5;105;Angel A;Polo A;30/06/2021;someday;DONE",
+                "6;abc;Angel A;Polo A;30/06/2021;29/06/2021;DONE",
+            ],
+        )
+
+        staging = process_csv_staging(path, pg_session)
+
+        assert staging["successful_rows"] == 3
+        assert staging["failed_rows"] == 3
+        assert [(e["line"], e["error"]) for e in staging["errors"]] == [
+            (5, "Invalid data_limite: never"),
+            (6, "Missing required fields"),
+            (7, "Invalid id_cliente: abc"),
+        ]
+        # The raw values are reported, not the parsed ones.
+        assert staging["errors"][0]["data"]["data_limite"] == "never"
+
+    def test_both_engines_store_and_reject_the_same_rows(self, tmp_path, pg_session):
+        path = write_csv(
+            tmp_path,
+            DAY_FIRST
+            + [
+                "4;104; Angel A ;Polo B  ;30/06/2021;29/06/2021;",
+                "5;105;   ;Polo A;30/06/2021;29/06/2021;DONE",
+                "6;106;Angel A;;30/06/2021;29/06/2021;DONE",
+            ],
+        )
+        names = (
+            select(Delivery.source_id, Angel.name, Polo.name, Delivery.status)
+            .join(Angel, Delivery.id_angel == Angel.id)
+            .join(Polo, Delivery.id_polo == Polo.id)
+            .order_by(Delivery.source_id)
+        )
+
+        results = []
+        for engine in (process_csv_staging, process_csv_orm):
+            result = engine(path, pg_session)
+            results.append(
+                (
+                    result["successful_rows"],
+                    [(e["line"], e["error"]) for e in result["errors"]],
+                    [tuple(row) for row in pg_session.execute(names)],
+                )
+            )
+            pg_session.execute(Delivery.__table__.delete())
+            pg_session.commit()
+
+        assert results[0] == results[1]
+        successful_rows, errors, rows = results[0]
+        assert successful_rows == 4
+        assert errors == [(6, "Missing required fields"), (7, "Missing required fields")]
+        assert rows[3] == (4, "Angel A", "Polo B", "PENDING")
+
+    def test_progress_is_published_while_copying(
+        self, tmp_path, pg_session, monkeypatch
+    ):
+        monkeypatch.setattr(staging_import, "PROGRESS_ROWS", 1)
+        published = []
+
+        process_csv_staging(
+            write_csv(tmp_path, DAY_FIRST), pg_session, on_progress=published.append
+        )
+
+        assert [snapshot["rows_read"] for snapshot in published[:3]] == [1, 2, 3]
+        assert 0 < published[0]["bytes_read"] <= published[2]["bytes_read"]
+        assert published[0]["rows_committed"] == 0
+
+    @pytest.mark.parametrize("engine", [process_csv_staging, process_csv_orm])
+    def test_checkpoint_is_committed_with_the_rows(
+        self, tmp_path, pg_session, engine
+    ):
+        job = ImportJob(checksum="checksum", status="PROCESSING", task_id="task-id")
+        pg_session.add(job)
+        pg_session.commit()
+
+        engine(write_csv(tmp_path, DAY_FIRST), pg_session, import_job_id=job.id)
+        pg_session.rollback()
+
+        checkpoint = pg_session.execute(select(ImportCheckpoint)).scalar_one()
+        assert (checkpoint.rows_done, checkpoint.successful_rows) == (3, 3)
+        assert len(stored(pg_session)) == 3
+        assert pg_session.get(ImportJob, job.id).updated_at is not None
+
+    def test_upsert_updates_the_changed_rows(self, tmp_path, pg_session):
+        process_csv_staging(write_csv(tmp_path, DAY_FIRST), pg_session)
+        changed = write_csv(
+            tmp_path,
+            [
+                "1;101;Angel A;Polo A;30/06/2021;29/06/2021;DONE",
+                "2;102;Angel B;Polo A;03/06/2021;01/06/2021;DONE",
+                "4;104;Angel C;Polo C;13/06/2021;12/06/2021;PENDING",
+            ],
+            name="changed.csv",
+        )
+
+        result = process_csv_staging(changed, pg_session, mode=UPSERT_MODE)
+
+        assert result["inserted_rows"] == 1
+        assert result["updated_rows"] == 1
+        assert result["unchanged_rows"] == 1
+        assert [row[2] for row in stored(pg_session)] == [
+            datetime(2021, 6, 30),
+            datetime(2021, 6, 3),
+            datetime(2021, 6, 15, 10, 30),
+            datetime(2021, 6, 13),
+        ]
@@ -0,0 +1,50 @@
+# mypy: ignore-errors
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.tasks.csv_processor import validate_csv
+
+CSV_CONTENT = (
+    "id_atendimento;id_cliente;angel;polo;data_limite;data_de_atendimento\n"
+    "1;10;John Doe;SP - SAO PAULO;30/06/2024;29/06/2024 09:09:30\n"
+    "2;abc;John Doe;SP - SAO PAULO;30/06/2024;29/06/2024 09:09:30\n"
+    "3;10;John Doe;SP - SAO PAULO;30/06/2024;\n"
+    "4;11;Maria;SP - SAO PAULO;01/07/2024;30/06/2024 10:00:00\n"
+)
+
+
+class TestValidateCsv:
+    def test_counts_and_errors(self, tmp_path):
+        file_path = tmp_path / "atendimentos.csv"
+        file_path.write_text(CSV_CONTENT, encoding="UTF-8")
+
+        result = validate_csv(str(file_path))
+
+        assert result["dry_run"] is True
+        assert result["total_rows"] == 4
+        assert result["successful_rows"] == 2
+        assert result["failed_rows"] == 2
+        assert result["error_count"] == 2
+        assert [error["line"] for error in result["errors"]] == [3, 4]
+        assert result["errors"][1]["error"] == "Missing required fields"
+
+    def test_columnar_file(self, tmp_path):
+        file_path = str(tmp_path / "atendimentos.parquet")
+        pq.write_table(
+            pa.table(
+                {
+                    "id_atendimento": [1, 2],
+                    "id_cliente": [10, None],
+                    "angel": ["John Doe", "Maria"],
+                    "polo": ["SP - SAO PAULO", "SP - SAO PAULO"],
+                }
+            ),
+            file_path,
+        )
+
+        result = validate_csv(file_path, file_format="parquet")
+
+        assert result["total_rows"] == 2
+        # Neither row has a data_de_atendimento.
+        assert result["error_count"] == 2
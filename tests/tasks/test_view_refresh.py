@@ -0,0 +1,135 @@
+# mypy: ignore-errors
+
+import http
+from datetime import datetime
+
+import pytest
+
+from src.models import ViewRefresh
+from src.repositories import DeliveryRepository
+from src.services.atendimento_service import DeliveryService
+from src.tasks import view_refresh
+from src.tasks.view_refresh import (
+    refresh_productivity_views_task,
+    schedule_productivity_refresh,
+)
+
+
+@pytest.fixture
+def materialized(monkeypatch):
+    """Pretend the database is PostgreSQL, recording the refreshes."""
+    refreshes = []
+    monkeypatch.setattr(DeliveryRepository, "has_materialized_views", lambda self: True)
+    monkeypatch.setattr(
+        DeliveryRepository,
+        "refresh_productivity_views",
+        lambda self: refreshes.append(True) or datetime(2024, 6, 1, 12),
+    )
+    return refreshes
+
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    calls = []
+    monkeypatch.setattr(view_refresh, "_refresh_scheduled_until", 0.0)
+    monkeypatch.setattr(
+        refresh_productivity_views_task,
+        "apply_async",
+        lambda args, countdown: calls.append((args, countdown)),
+    )
+    return calls
+
+
+def refreshed_at(session, when):
+    for name in ("angel_productivity", "polo_productivity"):
+        session.merge(ViewRefresh(name=name, refreshed_at=when))
+    session.commit()
+
+
+class TestScheduleProductivityRefresh:
+    def test_plain_views_are_never_refreshed(self, app, scheduled):
+        assert schedule_productivity_refresh() is False
+        assert scheduled == []
+
+    def test_writes_within_the_delay_share_a_refresh(
+        self, app, materialized, scheduled, monkeypatch
+    ):
+        from src.config import settings
+
+        monkeypatch.setattr(settings, "VIEW_REFRESH_DELAY", 60)
+
+        assert schedule_productivity_refresh() is True
+        assert schedule_productivity_refresh() is False
+
+        assert len(scheduled) == 1
+        (requested_at,), countdown = scheduled[0]
+        assert countdown == 60
+        assert datetime.fromisoformat(requested_at)
+
+
+    def test_broker_errors_do_not_fail_the_write(
+        self, client, materialized, scheduled, monkeypatch
+    ):
+        from kombu.exceptions import OperationalError
+
+        def unavailable(args, countdown):
+            raise OperationalError("Error 111 connecting to localhost:6379.")
+
+        monkeypatch.setattr(refresh_productivity_views_task, "apply_async", unavailable)
+        data = {
+            "id_cliente": 123456,
+            "angel": "John Doe",
+            "polo": "SP - SÃO PAULO",
+            "data_limite": "2021-06-30",
+            "data_de_atendimento": "2021-06-29",
+        }
+
+        response = client.post("/api/v1/atendimento", json=data)
+
+        assert response.status_code == http.HTTPStatus.CREATED
+        # The next write schedules the refresh again.
+        monkeypatch.setattr(
+            refresh_productivity_views_task,
+            "apply_async",
+            lambda args, countdown: scheduled.append((args, countdown)),
+        )
+        assert schedule_productivity_refresh() is True
+
+
+class TestRefreshProductivityViews:
+    def test_refresh_requested_before_the_last_one_is_skipped(
+        self, session, materialized
+    ):
+        refreshed_at(session, datetime(2024, 6, 1, 10))
+
+        service = DeliveryService()
+        assert service.refresh_productivity_views(datetime(2024, 6, 1, 9)) is None
+        assert materialized == []
+
+        assert service.refresh_productivity_views(datetime(2024, 6, 1, 11))
+        assert service.refresh_productivity_views()
+        assert len(materialized) == 2
+
+    def test_plain_views_report_no_snapshot(self, client):
+        response = client.get("/api/v1/atendimento/angel_productivity")
+
+        assert response.json["refreshed_at"] is None
+
+    def test_snapshot_is_reported_and_validates_the_response(
+        self, client, session, materialized
+    ):
+        url = "/api/v1/atendimento/polo_productivity"
+        refreshed_at(session, datetime(2024, 6, 1, 10))
+
+        response = client.get(url)
+        assert response.json["refreshed_at"] == "Sat, 01 Jun 2024 10:00:00 GMT"
+
+        etag = response.headers["ETag"]
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == (
+            http.HTTPStatus.NOT_MODIFIED
+        )
+
+        refreshed_at(session, datetime(2024, 6, 1, 11))
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == (
+            http.HTTPStatus.OK
+        )
@@ -0,0 +1,90 @@
+# mypy: ignore-errors
+
+import dataclasses
+import decimal
+import json
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from flask import Flask
+from sqlalchemy import column, create_engine, literal, select
+
+from src.json_provider import OrjsonProvider
+
+
+@pytest.fixture
+def flask_app():
+    return Flask(__name__)
+
+
+@pytest.fixture
+def provider(flask_app):
+    # The provider only holds a weak reference to its app.
+    flask_app.json = OrjsonProvider(flask_app)
+    return flask_app.json
+
+
+@dataclasses.dataclass
+class Point:
+    x: int
+    y: int
+
+
+class TestOrjsonProvider:
+    def test_reads_like_the_default_provider(self, provider):
+        default_app = Flask(__name__)
+        value = {
+            "b": [1, 2.5, None, True],
+            "a": "ç",
+            "price": decimal.Decimal("1.10"),
+            "at": datetime(2024, 6, 1, 12, 30),
+            "on": date(2024, 6, 1),
+            "zoned": datetime(2024, 6, 1, 23, 30, tzinfo=timezone(timedelta(hours=-3))),
+        }
+
+        assert json.loads(provider.dumps(value)) == json.loads(
+            default_app.json.dumps(value)
+        )
+        assert list(json.loads(provider.dumps(value))) == ["a", "at", "b", "on", "price", "zoned"]
+
+    def test_iso_datetimes(self, flask_app):
+        provider = OrjsonProvider(flask_app, datetime_format="iso")
+
+        assert provider.dumps({"at": datetime(2024, 6, 1, 12, 30)}) == (
+            '{"at":"2024-06-01T12:30:00+00:00"}'
+        )
+
+    def test_unknown_datetime_format(self):
+        with pytest.raises(ValueError):
+            OrjsonProvider(Flask(__name__), datetime_format="unix")
+
+    def test_dataclasses_and_rows(self, provider):
+        engine = create_engine("sqlite://")
+        with engine.connect() as connection:
+            row = connection.execute(
+                select(literal(1).label("id"), literal("DONE").label("status"))
+            ).one()
+
+        assert json.loads(provider.dumps([Point(1, 2), row])) == [
+            {"x": 1, "y": 2},
+            {"id": 1, "status": "DONE"},
+        ]
+
+    def test_unknown_types_are_rejected(self, provider):
+        with pytest.raises(TypeError):
+            provider.dumps({"column": column("id")})
+
+    def test_only_responses_are_indented_in_debug_mode(self, flask_app, provider):
+        flask_app.debug = True
+
+        with flask_app.app_context():
+            response = provider.response(status="DONE")
+
+        assert provider.dumps({"status": "DONE"}) == '{"status":"DONE"}'
+        assert response.data == b'{\n  "status": "DONE"\n}\n'
+
+    def test_requests_are_parsed(self, client):
+        response = client.get("/echo", data=b'{"message": "ol\\u00e1"}')
+
+        assert response.json == {"message": "olá"}
+        assert response.data.endswith(b"\n")